@@ -0,0 +1,48 @@
+import queue
+from contextlib import contextmanager
+
+from utils import setup_agent, get_result
+from mappings import MappingStore
+
+
+class AgentPool:
+    """
+    Fixed set of warmed (agent_executor, query_logger) slots sharing one engine and MappingStore.
+    A slot is only ever used by one question at a time, so its SQLQueryLogger is effectively
+    per-request and get_result's clear-then-read of intermediate_steps stays correct.
+    """
+
+    def __init__(self, engine, size: int = 4, llm_factory=None, mapping_store=None, **setup_kwargs):
+        """
+        llm_factory, if given, is called once per slot to build that slot's model (each slot needs
+        its own instance because fake models keep per-instance state).
+        """
+        self.engine = engine
+        self.size = size
+        self.mapping_store = mapping_store or MappingStore(engine)
+        self._slots = queue.Queue()
+        for _ in range(size):
+            llm = llm_factory() if llm_factory else None
+            agent_executor, query_logger = setup_agent(engine, mapping_store=self.mapping_store, llm=llm,
+                                                       verbose=False, **setup_kwargs)
+            self._slots.put((agent_executor, query_logger))
+
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None):
+        """Checks out a slot, blocking until one is free. Raises queue.Empty on timeout."""
+        slot = self._slots.get(timeout=timeout)
+        try:
+            yield slot
+        finally:
+            self._slots.put(slot)
+
+
+    def ask(self, question: str, cache=None, router=None, timeout: float | None = None, fewshot=None) -> tuple:
+        """Runs get_result on a free slot. Returns (answer, sql_query, export_path)."""
+        with self.acquire(timeout=timeout) as (agent_executor, query_logger):
+            return get_result(question, agent_executor, query_logger, cache=cache, router=router, fewshot=fewshot)
+
+
+    def available(self) -> int:
+        return self._slots.qsize()
@@ -0,0 +1,183 @@
+"""
+Concurrent HTTP front end for the SQL agent.
+
+    python agent_server.py --port 8080 --workers 4
+    curl -X POST localhost:8080/ask -d '{"question": "how many jobs are in HOLD"}'
+
+POST /ask   {"question": "..."}  ->  {"answer", "sql", "export", "seconds"}
+GET  /health                     ->  agent pool, queue and DB connection pool counters
+
+Request bodies above AGENT_MAX_BODY_BYTES (default 64 KiB) are rejected with a 413.
+"""
+import os
+import json
+import time
+import asyncio
+import functools
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import connect_postgres
+from agent_pool import AgentPool
+from answer_cache import AnswerCache
+from intent_router import IntentRouter
+from fake_llm import fake_sql_llm
+from db_pool import pool_stats
+from fewshot import FewShotIndex
+
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+MAX_BODY_BYTES = int(os.getenv("AGENT_MAX_BODY_BYTES", 64 * 1024))
+
+
+class AgentServer:
+    """
+    asyncio HTTP server that runs questions on an AgentPool. At most pool.size questions run at
+    once; up to max_queue more wait their turn, and anything beyond that is rejected with a 503.
+    A question that times out gets a 504 but keeps its slot until its agent actually finishes.
+    """
+
+    def __init__(self, pool: AgentPool, cache=None, router=None, max_queue: int = 64,
+                 request_timeout: float = 120.0, fewshot=None):
+        self.pool = pool
+        self.cache = cache
+        self.router = router
+        self.fewshot = fewshot
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="agent")
+        self.stats = {"in_flight": 0, "waiting": 0, "served": 0, "rejected": 0, "failed": 0}
+        self._semaphore = None
+
+
+    async def ask(self, question: str) -> tuple[int, dict]:
+        if self.stats["waiting"] >= self.max_queue:
+            self.stats["rejected"] += 1
+            return 503, {"error": "too many queued requests, retry later"}
+
+        start = time.perf_counter()
+        self.stats["waiting"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.stats["waiting"] -= 1
+
+        self.stats["in_flight"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, functools.partial(
+            self.pool.ask, question, self.cache, self.router, fewshot=self.fewshot))
+        # The slot is freed when the executor thread is done, not when we stop waiting for it:
+        # a timed-out question still holds an AgentPool agent until it returns
+        future.add_done_callback(self._release)
+        try:
+            answer, sql_query, export_path = await asyncio.wait_for(asyncio.shield(future),
+                                                                    timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self.stats["failed"] += 1
+            return 504, {"error": f"agent did not answer within {self.request_timeout}s"}
+        except Exception as e:
+            self.stats["failed"] += 1
+            return 500, {"error": str(e)}
+
+        self.stats["served"] += 1
+        return 200, {"answer": answer, "sql": sql_query, "export": export_path,
+                     "seconds": round(time.perf_counter() - start, 4)}
+
+
+    def _release(self, future: asyncio.Future) -> None:
+        self.stats["in_flight"] -= 1
+        self._semaphore.release()
+        if not future.cancelled():
+            future.exception()  # retrieved, so a late failure after a timeout is not logged as unhandled
+
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = headers.get("content-length", "0")
+
+            if not length.isdigit():
+                status, payload = 400, {"error": "invalid Content-Length"}
+            elif int(length) > MAX_BODY_BYTES:
+                status, payload = 413, {"error": f"request body is larger than {MAX_BODY_BYTES} bytes"}
+            elif len(request_line) < 2:
+                status, payload = 400, {"error": "malformed request"}
+            elif request_line[:2] == ["GET", "/health"]:
+                status, payload = 200, dict(self.stats, available_agents=self.pool.available(),
+                                            db_pool=pool_stats(self.pool.engine))
+            elif request_line[:2] == ["POST", "/ask"]:
+                body = await reader.readexactly(int(length))
+                try:
+                    question = json.loads(body or b"{}").get("question", "").strip()
+                except (ValueError, AttributeError):
+                    question = ""
+                if question:
+                    status, payload = await self.ask(question)
+                else:
+                    status, payload = 400, {"error": "expected a JSON body with a 'question'"}
+            else:
+                status, payload = 404, {"error": "not found"}
+
+            data = json.dumps(payload, default=str).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080, ready: asyncio.Event | None = None) -> None:
+        self._semaphore = asyncio.Semaphore(self.pool.size)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"sql agent server listening on {host}:{port} with {self.pool.size} agents")
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("AGENT_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("AGENT_SERVER_PORT", 8080)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AGENT_WORKERS", 4)))
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("AGENT_MAX_QUEUE", 64)))
+    parser.add_argument("--fake-llm-latency", type=float, default=None,
+                        help="serve with a fake LLM that takes this many seconds per call (load testing)")
+    args = parser.parse_args()
+
+    engine = connect_postgres()
+    if not engine:
+        return
+
+    llm_factory = None
+    if args.fake_llm_latency is not None:
+        llm_factory = lambda: fake_sql_llm(latency=args.fake_llm_latency)
+
+    pool = AgentPool(engine, size=args.workers, llm_factory=llm_factory)
+    server = AgentServer(pool,
+                         cache=AnswerCache(engine, max_entries=int(os.getenv("ANSWER_CACHE_SIZE", 256))),
+                         router=IntentRouter(engine, pool.mapping_store),
+                         max_queue=args.max_queue,
+                         fewshot=FewShotIndex.from_env())
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from sync_state import get_sync_version
+
+
+CachedAnswer = namedtuple("CachedAnswer", ["answer", "sql_query", "export_path"])
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation so trivially different phrasings share a key."""
+    q = re.sub(r"\s+", " ", question.strip().lower())
+    return q.rstrip(" ?.!")
+
+
+def get_data_version(engine, use_replica: bool = False) -> str:
+    """
+    Builds a version string for the synced data from the sync_state counter and
+    MAX(updated_at) in worklog_index. Either half changing invalidates cached answers.
+    With use_replica, it is the "replica" counter instead: the replica is written after
+    Postgres commits, so Postgres' version would key answers computed on older replica data.
+    """
+    if use_replica:
+        return f"replica:{get_sync_version(engine, 'replica')}"
+    sync_version = get_sync_version(engine, "worklog")
+    try:
+        with engine.connect() as conn:
+            last_update = conn.execute(text("SELECT MAX(updated_at) FROM worklog_index")).scalar()
+    except SQLAlchemyError:
+        last_update = None
+    # Drivers without a native timestamp type (SQLite) hand back the stored string
+    if hasattr(last_update, "isoformat"):
+        last_update = last_update.isoformat()
+    return f"{sync_version}:{last_update or ''}"
+
+
+class AnswerCache:
+    """
+    LRU cache of agent answers keyed on (normalized question, data version).
+    Entries written under an older data version are never returned, so a sync
+    invalidates the cache without anyone having to clear it. use_replica (default from
+    AGENT_USE_REPLICA, like setup_agent) must match where the agent's SQL runs.
+    """
+
+    def __init__(self, engine, max_entries: int = 256, use_replica: bool | None = None):
+        if use_replica is None:
+            use_replica = os.getenv("AGENT_USE_REPLICA", "0") == "1"
+        self.engine = engine
+        self.max_entries = max_entries
+        self.use_replica = use_replica
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def data_version(self) -> str:
+        return get_data_version(self.engine, self.use_replica)
+
+
+    def get(self, question: str, version: str) -> CachedAnswer | None:
+        key = (normalize_question(question), version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.export_path and not os.path.exists(entry.export_path):
+                # The answer points at an export that has since been cleaned up
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+
+    def put(self, question: str, version: str, answer, sql_query, export_path: str | None = None) -> None:
+        key = (normalize_question(question), version)
+        with self._lock:
+            self._entries[key] = CachedAnswer(answer, sql_query, export_path)
+            self._entries.move_to_end(key)
+            # Drop stale versions first, then fall back to plain LRU eviction
+            for stale in [k for k in self._entries if k[1] != version]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def discard(self, question: str) -> None:
+        """Forgets every cached answer to `question`, e.g. one that turned out to be wrong."""
+        q = normalize_question(question)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == q]:
+                del self._entries[key]
+
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._entries)
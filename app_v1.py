@@ -1,12 +1,15 @@
 
 import os
-import requests
 import pandas as pd
 from sqlalchemy import create_engine, text, inspect
 from dotenv import load_dotenv
 from time import sleep
 import psycopg2
 import datetime
+from sync_state import bump_sync_version
+from monday_client import post_graphql, item_rows, QueryBatch, add_items_by_id, estimate_complexity
+from column_config import SYNC_COLUMN_IDS
+from sync_metrics import SyncMetrics
 
 
 
@@ -195,16 +198,9 @@ def create_worklog_index_if_missing(engine):
 
 
 # --- Fetch all item metadata (id + updated_at) ---
-def fetch_updated_items_since(board_id, last_sync_time_iso):
-   url = "https://api.monday.com/v2"
-   headers = {
-      "Authorization": os.getenv("MONDAY_API_KEY"),
-      "Content-Type": "application/json"
-   }
-
-
-   query = f"""
-   query {{
+def updated_items_field(board_id, last_sync_time_iso):
+   """The change scan as a top-level field, so it can share a request with other fields."""
+   return f"""
      boards(ids: {board_id}) {{
       items_page(
         limit: 100,
@@ -229,23 +225,31 @@ def fetch_updated_items_since(board_id, last_sync_time_iso):
          id
          name
          updated_at
-         column_values {{
-           id
-           text
-         }}
         }}
       }}
      }}
+   """
+
+
+def fetch_updated_items_since(board_id, last_sync_time_iso, metrics=None):
+   headers = {
+      "Authorization": os.getenv("MONDAY_API_KEY"),
+      "Content-Type": "application/json"
+   }
+
+
+   query = f"""
+   query {{
+     {updated_items_field(board_id, last_sync_time_iso)}
    }}
    """
 
 
-   response = requests.post(url, headers=headers, json={"query": query})
-   data = response.json()
+   data = post_graphql(query, headers, metrics=metrics)
 
 
-   if response.status_code != 200 or "errors" in data:
-      raise Exception(f"Failed to fetch updated items: {response.status_code} - {data}")
+   if "errors" in data:
+      raise Exception(f"Failed to fetch updated items: {data}")
 
 
    items = data["data"]["boards"][0]["items_page"]["items"]
@@ -280,151 +284,97 @@ def ensure_columns_exist(engine, df, table_name):
 
 
 # --- Fetch full data only for changed items ---
-def fetch_full_items(board_id, changed_ids, column_mapping):
+def fetch_full_items(board_id, changed_ids, column_mapping, metrics=None):
+   """
+   Fetches the changed items by id, ITEMS_BY_ID_LIMIT ids per items(ids:) field and several
+   fields per request under GraphQL aliases, instead of paging the whole board to find them.
+   """
+   metrics = metrics or SyncMetrics("app_v1", metrics_dir=None)
    print("📦 Starting full item fetch...")
    all_rows = []
-   cursor = None
-   total_processed = 0
-
-
-   while True:
-      after_clause = f', cursor: "{cursor}"' if cursor else ""
-      query = f"""
-      {{
-        boards(ids: {board_id}) {{
-         items_page(limit: {PAGE_SIZE}{after_clause}) {{
-           cursor
-           items {{
-            id
-            name
-            updated_at
-            column_values {{
-              id
-              text
-            }}
-           }}
-         }}
-        }}
-      }}
-      """
-
+   processed_ids = set()
 
-      print("🌐 Sending page request...")
-      response = requests.post("https://api.monday.com/v2", headers=HEADERS, json={"query": query})
 
+   batch = QueryBatch(HEADERS, metrics=metrics)
+   add_items_by_id(batch, sorted(changed_ids), SYNC_COLUMN_IDS)
+   responses = batch.results()
 
-      if response.status_code != 200:
-         print("❌ Failed request.")
-         raise Exception(f"Request failed: {response.status_code}, {response.text}")
 
-
-      data = response.json()
-      items_page = data["data"]["boards"][0]["items_page"]
-      items = items_page["items"]
-      cursor = items_page["cursor"]
-
-
-      print(f"📬 Retrieved {len(items)} items on this page.")
-
-
-      if not items:
-         break
-
-
-      processed_ids = set()
-
-
-      for item in items:
-         if item["id"] not in changed_ids:
-            continue
-         row = {
-            "item_id": item["id"],
-            "Job Name": item["name"],
-            "updated_at": item["updated_at"]
-         }
-         for col in item["column_values"]:
-            title = column_mapping.get(col["id"], col["id"])
-            row[title] = col["text"]
-         all_rows.append(row)
-         processed_ids.add(item["id"])
-
-
-      # Stop early if we've processed all changed items
-      if processed_ids == changed_ids:
-         print("✅ All updated items processed.")
+   while True:
+      print("🌐 Sending batched request...")
+      with metrics.stage("fetch"):
+         data = next(responses, None)
+      if data is None:
          break
 
 
-      if not cursor:
-         break
+      with metrics.stage("decode"):
+         for items in data.values():
+            all_rows.extend(item_rows(items, SYNC_COLUMN_IDS))
+            processed_ids.update(item["id"] for item in items)
+            metrics.add(items=len(items))
+            metrics.add("fetch", items=len(items))
+      print(f"📬 Retrieved {len(processed_ids)} of {len(changed_ids)} items so far.")
 
 
-      # for item in items:
-      #  if item["id"] not in changed_ids:
-      #     continue
-      #
-      #  row = {
-      #     "item_id": item["id"],
-      #     "Job Name": item["name"],
-      #     "updated_at": item["updated_at"]
-      #  }
-      #  for col in item["column_values"]:
-      #     title = column_mapping.get(col["id"], col["id"])
-      #     row[title] = col["text"]
-      #
-      #  all_rows.append(row)
-      #  total_processed += 1
-      #
-      # print(f"✅ Processed so far: {total_processed} rows.")
-      # if not cursor:
-      #  break
       sleep(DELAY)
 
 
-   print(f"🎯 Done fetching all full items. Total: {total_processed}")
-   return pd.DataFrame(all_rows)
-
+   print(f"🎯 Done fetching all full items. Total: {len(all_rows)}")
+   with metrics.stage("decode"):
+      columns = ["item_id", "Job Name", "updated_at"] + [column_mapping.get(c, c) for c in SYNC_COLUMN_IDS]
+      return pd.DataFrame.from_records(all_rows, columns=columns)
 
 
 
 
 
 # --- Fetch column names (title mappings) ---
-def fetch_column_mapping(board_id):
+def column_mapping_field(board_id):
+   return f"boards(ids: {board_id}) {{ columns {{ id title }} }}"
+
+
+def fetch_column_mapping(board_id, metrics=None):
    query = f"""
    {{
-     boards(ids: {board_id}) {{
-      columns {{
-        id
-        title
-      }}
-     }}
+     {column_mapping_field(board_id)}
    }}
    """
-   response = requests.post("https://api.monday.com/v2", headers=HEADERS, json={"query": query})
-   data = response.json()
+   data = post_graphql(query, HEADERS, metrics=metrics)
    return {col["id"]: col["title"] for col in data["data"]["boards"][0]["columns"]}
 
 
+def fetch_mapping_and_updates(board_id, last_sync_time_iso, metrics=None):
+   """Column mapping and change scan in a single round trip, as two aliased fields."""
+   batch = QueryBatch(HEADERS, metrics=metrics)
+   batch.add("mapping", column_mapping_field(board_id))
+   batch.add("changes", updated_items_field(board_id, last_sync_time_iso), estimate_complexity(100))
+   data = batch.execute()
+   column_mapping = {col["id"]: col["title"] for col in data["mapping"][0]["columns"]}
+   items = data["changes"][0]["items_page"]["items"]
+   print(f"✅ Retrieved {len(items)} updated or backlogged items.")
+   return column_mapping, items
+
+
 
 
 # --- Update tables ---
-def sync_incremental(engine):
+def sync_incremental(engine, metrics=None):
+   metrics = metrics or SyncMetrics("app_v1", metrics_dir=None)
    print("🔧 Ensuring worklog_index exists...")
    create_worklog_index_if_missing(engine)
 
 
-   print("🔍 Fetching column mappings...")
-   column_mapping = fetch_column_mapping(BOARD_ID)
-   print(f"📚 Retrieved {len(column_mapping)} column mappings.")
-
-
    last_sync_time = get_last_sync_time(engine)
    print(f"⏰ Last sync time from worklog_index: {last_sync_time}")
 
 
-   print("📡 Requesting updated items from Monday.com...")
-   item_metadata = fetch_updated_items_since(BOARD_ID, last_sync_time)
+   # One round trip for both: they don't depend on each other
+   print("📡 Requesting column mappings and updated items from Monday.com...")
+   with metrics.stage("change_scan"):
+      column_mapping, item_metadata = fetch_mapping_and_updates(BOARD_ID, last_sync_time, metrics=metrics)
+      metrics.add(items=len(item_metadata))
+   print(f"📚 Retrieved {len(column_mapping)} column mappings.")
    print(f"✅ Received metadata for {len(item_metadata)} items.")
 
 
@@ -449,7 +399,7 @@ def sync_incremental(engine):
 
 
    print("📥 Fetching full row data for updated items...")
-   updated_df = fetch_full_items(BOARD_ID, updated_ids, column_mapping)
+   updated_df = fetch_full_items(BOARD_ID, updated_ids, column_mapping, metrics=metrics)
    print(f"📊 Retrieved full data for {len(updated_df)} rows.")
 
 
@@ -459,7 +409,7 @@ def sync_incremental(engine):
 
 
    print("📝 Upserting to worklog_index...")
-   with engine.begin() as conn:
+   with metrics.stage("index_upsert"), engine.begin() as conn:
       for row in updated_items:
          conn.execute(text("""
             INSERT INTO worklog_index (item_id, item_name, updated_at)
@@ -468,16 +418,20 @@ def sync_incremental(engine):
                item_name = EXCLUDED.item_name,
                updated_at = EXCLUDED.updated_at;
          """), parameters=row)
+      metrics.add(items=len(updated_items))
 
 
    print("📝 Upserting to worklog_index...")
    # ...
    print("cleaning all the fucking columns")
    updated_df.columns = [clean_col(c) for c in updated_df.columns]
-   print("making sure all the fucking columns exist....")
-   ensure_columns_exist(engine, updated_df, "worklog")
-   print("🛠 Inserting to worklog table...")
-   updated_df.to_sql("worklog", engine, if_exists="append", index=False)
+   with metrics.stage("db_write"):
+      print("making sure all the fucking columns exist....")
+      ensure_columns_exist(engine, updated_df, "worklog")
+      print("🛠 Inserting to worklog table...")
+      updated_df.to_sql("worklog", engine, if_exists="append", index=False)
+      bump_sync_version(engine, "worklog")
+      metrics.add(items=len(updated_df))
 
 
    print("✅ Incremental sync complete.")
@@ -490,7 +444,8 @@ def sync_incremental(engine):
 def main():
    print("🚀 Starting incremental sync...")
    engine = connect_postgres()
-   sync_incremental(engine)
+   with SyncMetrics("app_v1") as metrics:
+      sync_incremental(engine, metrics)
    print("🎉 Done.")
 
 
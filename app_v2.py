@@ -1,53 +1,33 @@
-
 import os
-import json
-import requests
+import argparse
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, text, inspect, bindparam
 from dotenv import load_dotenv
 from time import sleep
 import datetime
+import re
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from sync_state import bump_sync_version
+from sync_queue import (create_sync_queue_if_missing, board_lock, board_write_lock, enqueue_items, requeue_stale,
+                        requeue_failed, claim_batch, complete_batch, fail_batch, queue_depth)
+from monday_client import post_graphql, item_rows, QueryBatch, add_items_by_id
+from sync_metrics import SyncMetrics
+from profiling import Profiler
+from replica import replica_from_env
+from column_config import SYNC_COLUMN_IDS, WORKLOG_COLUMNS
 
 
 load_dotenv()
 
 
-# --- Unified Configuration (Cleaner and Easier to Maintain) ---
-# Single source of truth for column renames and their purpose.
-COLUMN_CONFIG = {
-   'Job Name': {'new_name': "job_name", 'desc': "The name of the job"},
-   'multiple_person_mkqnhsnf': {'new_name': "prep_team", 'desc': "Team responsible for prepping the job"},
-   'multiple_person': {'new_name': "production_team", 'desc': "Team responsible for executing the project"},
-   "people": {'new_name': "reviewer_deliverer", 'desc': "Person responsible for final review & delivery"},
-   "text2": {'new_name': "sender_name", 'desc': "Name of customer who submitted the project"},
-   "color56": {'new_name': "primary_status", 'desc': "Primary current status of the project"},
-   'color': {'new_name': "product", 'desc': "The product category"},
-   'date': {'new_name': "due_date", 'desc': "The internal due date for the project"},
-   'long_text_mkqwc9v8': {'new_name': "upload_notes", 'desc': "Notes from the upload process"},
-   'date_mkq9h641': {'new_name': "customer_due_date", 'desc': "The actual due date requested by the customer"},
-   'dropdown35': {'new_name': "scope_of_work", 'desc': "The defined scope of work for the project"},
-   'email': {'new_name': "sender_email", 'desc': "Email address of the person who submitted the project"},
-   'date9': {'new_name': "completion_date", 'desc': "Date the project was marked as complete"},
-   'text0': {'new_name': "customer_name", 'desc': "The name of the customer"},
-   'date46': {'new_name': "delivered_date", 'desc': "Date the project was delivered to the customer"},
-   'date4': {'new_name': "received_date", 'desc': "Date the project was received"},
-   'numeric': {'new_name': "page_count_standard_mto", 'desc': "Standard MTO page counts"},
-   'numeric8': {'new_name': "page_count_maintenance", 'desc': "Maintenance page count"},
-   'numeric4': {'new_name': "page_count_building_trades", 'desc': "Building trades page count"},
-   'numeric2': {'new_name': "page_count_irrigation_bid", 'desc': "Irrigation bid design page count"},
-   'numeric21': {'new_name': "page_count_irrigation_full", 'desc': "Irrigation full design page counts"},
-   'numeric7': {'new_name': "page_count_other_misc", 'desc': "Other/misc page counts"},
-   'numbers': {'new_name': "page_count_surcharge", 'desc': "Additional surcharge page counts"},
-   'numeric0': {'new_name': "page_count_trial", 'desc': "Trial page counts"},
-   'color8': {'new_name': "billing_status", 'desc': "The current billing status"},
-   'link': {'new_name': "completed_files_url", 'desc': "Dropbox URL for completed files"},
-   'item_id': {'new_name': "monday_item_id", 'desc': "The unique item ID from Monday.com"}
-}
-
-
 # --- API and DB Constants ---
 MONDAY_API_KEY = os.getenv("MONDAY_API_KEY")
 BOARD_ID = os.getenv("MONDAY_BOARD_ID", 3874058084)  # Best to get from .env
+# Boards to sync, comma separated. BOARD_ID is mapped by COLUMN_CONFIG into worklog; any other
+# board goes to its own worklog_<board id> table with columns named after its column titles.
+BOARD_IDS = [b.strip() for b in os.getenv("MONDAY_BOARD_IDS", str(BOARD_ID)).split(",") if b.strip()]
+SYNC_WORKERS = int(os.getenv("MONDAY_SYNC_WORKERS", 4))  # boards synced at once
 FETCH_BATCH_SIZE = 100  # Max items to fetch in a single API call
 DELAY = 0.5
 HEADERS = {"Authorization": MONDAY_API_KEY, "Content-Type": "application/json"}
@@ -73,11 +53,14 @@ def connect_postgres():
 
 
 # --- Get last update timestamp ---
-def get_last_sync_time(engine):
-   """Retrieves the most recent 'updated_at' timestamp from the index table."""
+def get_last_sync_time(engine, board_id=BOARD_ID):
+   """Retrieves the most recent 'updated_at' timestamp for a board from the index table."""
    with engine.begin() as conn:
-       result = conn.execute(text("SELECT MAX(updated_at) FROM worklog_index"))
+       result = conn.execute(text("SELECT MAX(updated_at) FROM worklog_index WHERE board_id = :board_id"),
+                             {"board_id": int(board_id)})
        ts = result.scalar()
+       if ts and not hasattr(ts, "isoformat"):
+           return str(ts)  # drivers without a timestamp type (SQLite) return the stored text
        return ts.isoformat() if ts else "1970-01-01T00:00:00Z"
 
 
@@ -85,7 +68,7 @@ def get_last_sync_time(engine):
 
 # --- Set up tracking table ---
 def create_worklog_index_if_missing(engine):
-   """Ensures the tracking table exists in the database."""
+   """Ensures the tracking table exists, with a board_id per item for per-board watermarks."""
    with engine.begin() as conn:
        conn.execute(text("""
                          CREATE TABLE IF NOT EXISTS worklog_index
@@ -100,17 +83,67 @@ def create_worklog_index_if_missing(engine):
                              TIMESTAMP
                              WITH
                              TIME
-                             ZONE
+                             ZONE,
+                             board_id
+                             BIGINT
                          );
                          """))
+       # Tables from before multi-board sync only ever held BOARD_ID's items
+       if "board_id" not in {c["name"] for c in inspect(conn).get_columns("worklog_index")}:
+           conn.execute(text("ALTER TABLE worklog_index ADD COLUMN board_id BIGINT"))
+           conn.execute(text("UPDATE worklog_index SET board_id = :board_id"), {"board_id": int(BOARD_ID)})
+       conn.execute(text("CREATE INDEX IF NOT EXISTS worklog_index_board_updated ON worklog_index (board_id, updated_at)"))
+
+
+
+
+# --- Per-board tables and columns ---
+def board_table(board_id):
+   return "worklog" if str(board_id) == str(BOARD_ID) else f"worklog_{board_id}"
+
+
+def fetch_board_columns(board_id, metrics=None):
+   """
+   Column ids to request for a board and the worklog column name for each. BOARD_ID uses
+   COLUMN_CONFIG; other boards get every column, named after its title.
+   """
+   if str(board_id) == str(BOARD_ID):
+       return SYNC_COLUMN_IDS, WORKLOG_COLUMNS[3:]
+   data = post_graphql(f"query {{ boards(ids: {board_id}) {{ columns {{ id title }} }} }}", HEADERS, metrics=metrics)
+   if "errors" in data:
+       raise Exception(f"Failed to fetch columns for board {board_id}: {data['errors']}")
+   column_ids, names = [], []
+   for col in data["data"]["boards"][0]["columns"]:
+       name = re.sub(r'\W+', '_', col["title"].strip().lower()).strip('_') or col["id"]
+       if name in names or name in WORKLOG_COLUMNS[:3]:
+           name = f"{name}_{col['id']}"
+       column_ids.append(col["id"])
+       names.append(name)
+   return column_ids, names
+
+
+def add_missing_columns(conn, table, df):
+   """Adds any DataFrame column the table lacks (as TEXT, board_id as BIGINT). Returns the added names."""
+   existing = {c["name"] for c in inspect(conn).get_columns(table)}
+   added = [col for col in df.columns if col not in existing]
+   for col in added:
+       print(f"🛠️ Adding missing column '{col}' to '{table}' table...")
+       conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN "{col}" {"BIGINT" if col == "board_id" else "TEXT"}'))
+   return added
 
 
 
 
 # --- Fetch metadata for updated items ---
-def fetch_updated_items_since(board_id, last_sync_time_iso):
+def fetch_updated_items_since(board_id, last_sync_time_iso, metrics=None):
    """Fetches metadata for items updated since last sync OR received today."""
    # This query is now corrected to use the 'today' operator for date columns.
+   # date4 (received date) only exists on the worklog board; other boards just use the watermark.
+   received_today = """,
+             {
+               column_id: "date4",
+               operator: today
+             }""" if str(board_id) == str(BOARD_ID) else ""
    query = f"""
    query {{
      boards(ids: {board_id}) {{
@@ -122,11 +155,7 @@ def fetch_updated_items_since(board_id, last_sync_time_iso):
                column_id: "__last_updated__",
                compare_value: ["{last_sync_time_iso}"],
                operator: greater_than
-             }},
-             {{
-               column_id: "date4",
-               operator: today
-             }}
+             }}{received_today}
            ],
            operator: or
          }}
@@ -140,12 +169,11 @@ def fetch_updated_items_since(board_id, last_sync_time_iso):
      }}
    }}
    """
-   response = requests.post("https://api.monday.com/v2", headers=HEADERS, json={"query": query})
-   data = response.json()
+   data = post_graphql(query, HEADERS, metrics=metrics)
 
 
-   if response.status_code != 200 or "errors" in data:
-       raise Exception(f"Failed to fetch updated items: {response.status_code} - {data}")
+   if "errors" in data:
+       raise Exception(f"Failed to fetch updated items: {data}")
 
 
    items = data["data"]["boards"][0]["items_page"]["items"]
@@ -156,152 +184,317 @@ def fetch_updated_items_since(board_id, last_sync_time_iso):
 
 
 # --- REFACTORED: Efficiently fetch full data for specific items ---
-def fetch_full_items_by_id(board_id, item_ids):
+def fetch_full_items_by_id(board_id, item_ids, metrics=None, columns=None):
    """
-   Fetches full item data for a specific list of item IDs in batches.
+   Fetches full item data for a specific list of item IDs in batches, several batches per request.
    This is much more efficient than paginating the entire board.
+   With a SyncMetrics, requests are counted under the "fetch" stage and row building under "decode".
+   `columns` is (column ids, names) from fetch_board_columns; by default rows come back with
+   WORKLOG_COLUMNS and columns outside COLUMN_CONFIG are not requested.
    """
+   column_ids, names = columns or (SYNC_COLUMN_IDS, WORKLOG_COLUMNS[3:])
+   metrics = metrics or SyncMetrics("app_v2", metrics_dir=None)
    print(f"📦 Starting batched fetch for {len(item_ids)} items...")
    all_rows = []
    item_ids_list = list(item_ids)  # Convert set to list for slicing
 
 
-   for i in range(0, len(item_ids_list), FETCH_BATCH_SIZE):
-       batch_ids = item_ids_list[i:i + FETCH_BATCH_SIZE]
+   # Chunks of FETCH_BATCH_SIZE ids, several chunks per request under GraphQL aliases
+   batch = QueryBatch(HEADERS, metrics=metrics)
+   add_items_by_id(batch, item_ids_list, column_ids, chunk=FETCH_BATCH_SIZE)
+   responses = batch.results()
+   print(f"🌐 Sending {len(batch.documents())} request(s) for {len(batch.fields)} batches of up to {FETCH_BATCH_SIZE} items...")
 
 
-       # The `json.dumps` is crucial to correctly format the list for the GraphQL query
-       query = f"""
-       query {{
-         items(ids: {json.dumps(batch_ids)}) {{
-           id
-           name
-           updated_at
-           column_values {{
-             id
-             text
-           }}
-         }}
-       }}
-       """
+   while True:
+       with metrics.stage("fetch"):
+           data = next(responses, None)
+       if data is None:
+           break
+
 
+       with metrics.stage("decode"):
+           for items in data.values():
+               # Tuples in column order rather than a dict per item
+               all_rows.extend(item_rows(items, column_ids))
+               metrics.add(items=len(items))
+               metrics.add("fetch", items=len(items))
 
-       print(f"🌐 Sending request for batch of {len(batch_ids)} items...")
-       response = requests.post("https://api.monday.com/v2", headers=HEADERS, json={"query": query})
 
+       sleep(DELAY)
 
-       if response.status_code != 200:
-           raise Exception(f"Request failed: {response.status_code}, {response.text}")
 
+   print(f"🎯 Done fetching. Retrieved full data for {len(all_rows)} items.")
+   with metrics.stage("decode"):
+       df = pd.DataFrame.from_records(all_rows, columns=WORKLOG_COLUMNS[:3] + list(names))
+       df["monday_item_id"] = df["monday_item_id"].astype("int64")
+       return df
 
-       data = response.json()
-       if "errors" in data:
-           raise Exception(f"GraphQL errors returned: {data['errors']}")
 
 
-       items = data.get("data", {}).get("items", [])
 
+# --- Main Sync Logic ---
+def sync_incremental(engine, metrics=None, board_id=BOARD_ID):
+   """
+   Orchestrates the entire incremental sync process for one board, from that board's watermark.
+   Under the board's advisory lock, changed items are found and queued on sync_queue; this run
+   then works the queue alongside any `app_v2.py --worker` processes. A run that finds the lock
+   taken (cron firing while the previous run is still going) leaves the board to that run.
+   Items of batches that failed SYNC_QUEUE_MAX_ATTEMPTS times are queued again on every run: the
+   watermark has moved past them, so this scan would not find them.
+   Each stage (change_scan, column_mapping, fetch, decode, db_write, index_upsert) is timed and counted in `metrics`.
+   """
+   metrics = metrics or SyncMetrics("app_v2", metrics_dir=None)
+   print("🔧 Ensuring worklog_index and sync_queue exist...")
+   create_worklog_index_if_missing(engine)
+   create_sync_queue_if_missing(engine)
 
-       for item in items:
-           row = {
-               "monday_item_id": int(item["id"]),
-               "job_name": item["name"],
-               "updated_at": item["updated_at"]
-           }
-           for col in item["column_values"]:
-               # Use the new_name from our config, fall back to original id if not found
-               col_config = next((v for k, v in COLUMN_CONFIG.items() if k == col["id"]), None)
-               col_name = col_config['new_name'] if col_config else col["id"]
-               row[col_name] = col["text"]
-           all_rows.append(row)
 
+   with board_lock(engine, board_id) as locked:
+       if not locked:
+           print(f"🔒 Another run is already syncing board {board_id}; leaving it to that run.")
+           return
 
-       sleep(DELAY)
 
+       last_sync_time = get_last_sync_time(engine, board_id)
+       print(f"⏰ Last sync time for board {board_id} from worklog_index: {last_sync_time}")
 
-   print(f"🎯 Done fetching. Retrieved full data for {len(all_rows)} items.")
-   return pd.DataFrame(all_rows)
 
+       print(f"📡 Requesting updated items for board {board_id} from Monday.com...")
+       with metrics.stage("change_scan"):
+           updated_item_metadata = fetch_updated_items_since(board_id, last_sync_time, metrics=metrics)
+           metrics.add(items=len(updated_item_metadata))
 
 
+       if updated_item_metadata:
+           updated_ids = {int(item["id"]) for item in updated_item_metadata}
+           queued = enqueue_items(engine, board_id, updated_ids)
+           print(f"🧩 Queued {queued} of {len(updated_ids)} updated item IDs (the rest are already queued)...")
+       else:
+           print(f"🎉 No new updates to process for board {board_id}.")
 
-# --- Main Sync Logic ---
-def sync_incremental(engine):
-   """Orchestrates the entire incremental sync process."""
-   print("🔧 Ensuring worklog_index exists...")
-   create_worklog_index_if_missing(engine)
 
+       retried = requeue_failed(engine, board_id)
+       if retried:
+           print(f"♻️ Re-queued {retried} item IDs from failed batches of board {board_id}.")
+           metrics.log("requeue_failed", board_id=int(board_id), items=retried)
 
-   last_sync_time = get_last_sync_time(engine)
-   print(f"⏰ Last sync time from worklog_index: {last_sync_time}")
 
+       # Still under the lock, so a run started meanwhile doesn't rescan items we are about to write
+       process_queue(engine, metrics, board_id=board_id)
 
-   print("📡 Requesting updated items from Monday.com...")
-   updated_item_metadata = fetch_updated_items_since(BOARD_ID, last_sync_time)
 
+   print(f"✅ Incremental sync complete for board {board_id}.")
 
-   if not updated_item_metadata:
-       print("🎉 No new updates to process.")
-       return
 
 
-   updated_ids = {int(item["id"]) for item in updated_item_metadata}
-   print(f"🧩 Processing {len(updated_ids)} updated item IDs...")
 
+@lru_cache(maxsize=None)
+def get_replica():
+   """The columnar copy for the agent when REPLICA_DIR is set, else None. Opened on first use, not on import."""
+   return replica_from_env()
 
-   print("📥 Fetching full row data for updated items...")
-   updated_df = fetch_full_items_by_id(BOARD_ID, updated_ids)
 
 
-   if updated_df.empty:
-       print("⚠️ No detailed item data was returned. Skipping database update.")
-       return
+
+def process_batch(engine, batch, metrics, columns_cache):
+   """Fetches one queued batch and writes it; the rows, index entries and batch status commit together."""
+   board_id = batch["board_id"]
+   table = board_table(board_id)
+   if board_id not in columns_cache:
+       with metrics.stage("column_mapping"):
+           columns_cache[board_id] = fetch_board_columns(board_id, metrics=metrics)
+
+
+   print(f"📥 Fetching full row data for {len(batch['item_ids'])} items of board {board_id}...")
+   updated_df = fetch_full_items_by_id(board_id, batch["item_ids"], metrics=metrics, columns=columns_cache[board_id])
+   updated_df["board_id"] = int(board_id)
 
 
    # Prepare data for the index table upsert
    index_data_to_upsert = [
-       {"item_id": int(item["id"]), "item_name": item["name"], "updated_at": item["updated_at"]}
-       for item in updated_item_metadata
+       {"item_id": int(item_id), "item_name": name, "updated_at": updated_at, "board_id": int(board_id)}
+       for item_id, name, updated_at in updated_df[["monday_item_id", "job_name", "updated_at"]].itertuples(index=False)
    ]
 
 
-   print("📝 Upserting to worklog_index...")
    with engine.begin() as conn:
-       for row in index_data_to_upsert:
-           conn.execute(text("""
-                             INSERT INTO worklog_index (item_id, item_name, updated_at)
-                             VALUES (:item_id, :item_name, :updated_at) ON CONFLICT (item_id) DO
-                             UPDATE SET
-                                 item_name = EXCLUDED.item_name,
-                                 updated_at = EXCLUDED.updated_at;
-                             """), parameters=row)
+       # Two workers holding batches with the same item must not both delete-then-append it
+       board_write_lock(conn, board_id)
+
+
+       print("📝 Upserting to worklog_index...")
+       with metrics.stage("index_upsert"):
+           for row in index_data_to_upsert:
+               conn.execute(text("""
+                                 INSERT INTO worklog_index (item_id, item_name, updated_at, board_id)
+                                 VALUES (:item_id, :item_name, :updated_at, :board_id) ON CONFLICT (item_id) DO
+                                 UPDATE SET
+                                     item_name = EXCLUDED.item_name,
+                                     updated_at = EXCLUDED.updated_at,
+                                     board_id = EXCLUDED.board_id;
+                                 """), parameters=row)
+           metrics.add(items=len(index_data_to_upsert))
+
+
+       print(f"🛠 Inserting/Updating {table} table...")
+       # A simple approach: delete old versions of rows before inserting new ones
+       with metrics.stage("db_write"):
+           if not updated_df.empty:
+               # Plain ints: formatting NumPy ints into the SQL gives np.int64(...) under NumPy 2
+               ids = [int(i) for i in updated_df['monday_item_id'].unique()]
+               if inspect(conn).has_table(table):
+                   conn.execute(text(f'DELETE FROM "{table}" WHERE monday_item_id IN :ids')
+                                .bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+                   # New board columns, and board_id on a worklog from before multi-board sync
+                   if "board_id" in add_missing_columns(conn, table, updated_df):
+                       conn.execute(text(f'UPDATE "{table}" SET board_id = :board_id'), {"board_id": int(board_id)})
+               updated_df.to_sql(table, conn, if_exists="append", index=False)
+           metrics.add(items=len(updated_df))
+
+
+       complete_batch(conn, batch["id"])
+
+
+   replica = get_replica()
+   if replica is not None:
+       # After the commit: Postgres is the source of truth, and a replica that missed a batch
+       # is repaired with `python replica.py --rebuild`
+       print("🦆 Updating the columnar replica...")
+       with metrics.stage("replica_write"):
+           try:
+               replica.upsert(table, updated_df)
+               index_df = pd.DataFrame(index_data_to_upsert, columns=["item_id", "item_name", "updated_at", "board_id"])
+               index_df["updated_at"] = pd.to_datetime(index_df["updated_at"], utc=True)
+               replica.upsert("worklog_index", index_df, key="item_id")
+               # Answers computed on the replica are cached under this counter, not Postgres' version
+               bump_sync_version(engine, "replica")
+               metrics.add(items=len(updated_df))
+           except Exception as e:
+               print(f"⚠️ Replica update failed, rebuild it with `python replica.py --rebuild`: {e}")
+   return len(updated_df)
+
+
+
+
+def process_queue(engine, metrics=None, board_id=None, worker=None):
+   """
+   Claims and processes queued batches (of one board, or of any) until none are pending, then
+   bumps the sync version of every table written. Returns the number of batches processed.
+   A batch that fails goes back on the queue (see sync_queue.fail_batch) and is not claimed again
+   by this call, so one bad item doesn't hold up the rest; the first error is raised at the end.
+   Either way the queue's batches per status end up in `metrics`, and failed batches are reported.
+   """
+   metrics = metrics or SyncMetrics("app_v2", metrics_dir=None)
+   if requeue_stale(engine):
+       print("♻️ Re-queued (or, past SYNC_QUEUE_MAX_ATTEMPTS, failed) batches from workers that stopped.")
+   columns_cache, tables_written, processed, errors = {}, set(), 0, {}
+   try:
+       while True:
+           batch = claim_batch(engine, board_id=board_id, worker=worker, skip=errors)
+           if batch is None:
+               break
+           try:
+               process_batch(engine, batch, metrics, columns_cache)
+           except Exception as e:
+               print(f"❌ Batch {batch['id']} of board {batch['board_id']} failed: {e}")
+               fail_batch(engine, batch["id"], e)
+               errors[batch["id"]] = e
+               continue
+           tables_written.add(board_table(batch["board_id"]))
+           processed += 1
+           sleep(DELAY)
+   finally:
+       depth = queue_depth(engine, board_id)
+       metrics.record_queue(depth)
+       if depth.get("failed"):
+           print(f"⚠️ {depth['failed']} sync_queue batches failed SYNC_QUEUE_MAX_ATTEMPTS times. The next scheduled "
+                 f"run re-queues them, or run `python app_v2.py --retry-failed` now.")
+
+
+   for table in tables_written:
+       bump_sync_version(engine, table)
+   if errors:
+       raise next(iter(errors.values()))
+   return processed
+
+
+
+
+def run_worker(engine, poll=None, profiler=None):
+   """Works the sync queue for every board; with `poll`, keeps checking every `poll` seconds."""
+   create_worklog_index_if_missing(engine)
+   create_sync_queue_if_missing(engine)
+   while True:
+       with SyncMetrics("app_v2_worker", profiler=profiler) as metrics:
+           processed = process_queue(engine, metrics)
+       print(f"👷 Processed {processed} queued batches.")
+       if poll is None:
+           return
+       sleep(poll)
 
 
-   print("🛠 Inserting/Updating worklog table...")
-   # For simplicity, we'll append. A true upsert here is more complex.
-   # You would typically load to a temp table, then merge.
-   # For now, you may need to handle duplicates downstream or by deleting old rows first.
 
 
-   # A simple approach: delete old versions of rows before inserting new ones
-   with engine.begin() as conn:
-       id_tuple = tuple(updated_df['monday_item_id'].unique())
-       if id_tuple:
-           conn.execute(text(f"DELETE FROM worklog WHERE monday_item_id IN {id_tuple}"))
+def sync_boards(engine, board_ids=None, workers=SYNC_WORKERS, profiler=None):
+   """
+   Syncs several boards concurrently, each from its own watermark and with its own SyncMetrics job
+   ("app_v2" for BOARD_ID, "app_v2_<board id>" otherwise). Requests from every board draw on
+   monday_client's shared complexity budget, so total time tracks the largest board rather than
+   the sum. Returns {board_id: SyncMetrics}; raises after all boards finish if any of them failed.
+   """
+   board_ids = board_ids or BOARD_IDS
+   # DDL once up front rather than racing from every thread
+   create_worklog_index_if_missing(engine)
+   create_sync_queue_if_missing(engine)
 
 
-   updated_df.to_sql("worklog", engine, if_exists="append", index=False)
+   def run(board_id):
+       job = "app_v2" if str(board_id) == str(BOARD_ID) else f"app_v2_{board_id}"
+       # cProfile and the stage profiler only follow one thread
+       with SyncMetrics(job, profiler=profiler if len(board_ids) == 1 else None) as metrics:
+           sync_incremental(engine, metrics, board_id=board_id)
+       return metrics
 
 
-   print("✅ Incremental sync complete.")
+   results, failures = {}, {}
+   with ThreadPoolExecutor(max_workers=max(1, min(workers, len(board_ids)))) as pool:
+       futures = {board_id: pool.submit(run, board_id) for board_id in board_ids}
+       for board_id, future in futures.items():
+           try:
+               results[board_id] = future.result()
+           except Exception as e:
+               print(f"❌ Sync failed for board {board_id}: {e}")
+               failures[board_id] = e
+   if failures:
+       raise Exception(f"Sync failed for {len(failures)} of {len(board_ids)} boards: {sorted(failures)}")
+   return results
 
 
 
 
 def main():
-   print("🚀 Starting incremental sync...")
+   parser = argparse.ArgumentParser(description="Incremental Monday.com -> Postgres sync.")
+   parser.add_argument("--profile", action="store_true", help="write CPU and per-stage memory profiles to PROFILE_DIR")
+   parser.add_argument("--worker", action="store_true",
+                       help="only work the sync_queue (batches queued by scheduled runs), e.g. on another host")
+   parser.add_argument("--poll", type=float, help="with --worker, keep polling the queue every POLL seconds")
+   parser.add_argument("--retry-failed", action="store_true",
+                       help="queue the items of every failed sync_queue batch again, then work the queue")
+   args = parser.parse_args()
+
    engine = connect_postgres()
-   sync_incremental(engine)
+   with Profiler("app_v2", enabled=args.profile) as profiler:
+       if args.retry_failed:
+           create_sync_queue_if_missing(engine)
+           print(f"♻️ Re-queued {requeue_failed(engine)} item IDs from failed batches.")
+           run_worker(engine, profiler=profiler)
+       elif args.worker:
+           print("👷 Starting sync queue worker...")
+           run_worker(engine, poll=args.poll, profiler=profiler)
+       else:
+           print("🚀 Starting incremental sync...")
+           sync_boards(engine, BOARD_IDS, profiler=profiler)
    print("🎉 Done.")
 
 
@@ -0,0 +1,106 @@
+"""
+Batch mode for the SQL agent: answers a file of questions concurrently and writes JSONL.
+
+    python sql_agent.py --batch questions.txt --out answers.jsonl --workers 4
+
+The questions file is either plain text (one question per line, blank lines and # comments
+ignored) or JSONL with a "question" field. Identical questions (after normalize_question) are
+only asked once; every input line still gets its own output record, in input order.
+"""
+import json
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils import get_result
+from answer_cache import normalize_question
+
+
+def read_questions(path: str) -> list[str]:
+    questions = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                line = json.loads(line)["question"]
+            questions.append(line)
+    return questions
+
+
+def _ask(pool, question: str, cache, router, fewshot, submitted: float) -> dict:
+    """Runs one question on a pool slot and returns its record (without per-line fields)."""
+    record = {"answer": None, "sql": None, "export": None, "error": None}
+    with pool.acquire() as (agent_executor, query_logger):
+        started = time.perf_counter()
+        record["queue_seconds"] = round(started - submitted, 4)
+        try:
+            record["answer"], record["sql"], record["export"] = get_result(
+                question, agent_executor, query_logger, cache=cache, router=router, fewshot=fewshot)
+        except Exception as e:
+            record["error"] = str(e)
+        record["seconds"] = round(time.perf_counter() - started, 4)
+        trace = query_logger.last_trace or {}
+    record["source"] = trace.get("source")
+    record["llm_seconds"] = trace.get("llm_seconds")
+    record["sql_seconds"] = trace.get("sql_seconds")
+    return record
+
+
+def run_batch(pool, questions: list[str], cache=None, router=None, fewshot=None) -> list[dict]:
+    """
+    Answers `questions` on the AgentPool, at most pool.size at a time. Returns one record per
+    input question, in input order; repeats point at the first occurrence via duplicate_of.
+    """
+    first_index = {}
+    for i, question in enumerate(questions):
+        first_index.setdefault(normalize_question(question), i)
+
+    answered = {}
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="batch") as executor:
+        submitted = time.perf_counter()
+        futures = {executor.submit(_ask, pool, questions[i], cache, router, fewshot, submitted): key
+                   for key, i in first_index.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            answered[key] = future.result()
+            status = "error" if answered[key]["error"] else f"{answered[key]['seconds']:.2f}s"
+            print(f"[{done}/{len(futures)}] {questions[first_index[key]][:70]} ({status})")
+
+    records = []
+    for i, question in enumerate(questions):
+        key = normalize_question(question)
+        record = {"index": i, "question": question, **answered[key]}
+        if first_index[key] != i:
+            record["duplicate_of"] = first_index[key]
+        records.append(record)
+    return records
+
+
+def write_jsonl(records: list[dict], path: str) -> None:
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def main(pool, questions_path: str, out_path: str | None = None, cache=None, router=None,
+         fewshot=None) -> list[dict]:
+    questions = read_questions(questions_path)
+    if out_path is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path = f"batch_{stamp}.jsonl"
+
+    unique = len({normalize_question(q) for q in questions})
+    print(f"\nanswering {unique} unique questions ({len(questions)} lines) with {pool.size} workers\n")
+    start = time.perf_counter()
+    records = run_batch(pool, questions, cache=cache, router=router, fewshot=fewshot)
+    wall = time.perf_counter() - start
+
+    write_jsonl(records, out_path)
+    firsts = [r for r in records if "duplicate_of" not in r]
+    failed = sum(1 for r in firsts if r["error"])
+    print(f"\nwall time {wall:.2f}s, sum of question times {sum(r['seconds'] for r in firsts):.2f}s, "
+          f"slowest {max((r['seconds'] for r in firsts), default=0):.2f}s, {failed} failed")
+    print(f"results written to {out_path}")
+    return records
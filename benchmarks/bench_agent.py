@@ -0,0 +1,161 @@
+"""
+Benchmark harness for the SQL agent over a seeded worklog fixture.
+
+Each question in agent_questions.json has a reference SQL query (or an expected answer
+fragment). The agent's captured SQL is run against the same fixture and its result compared
+with the reference, so prompt, model or schema changes can be judged on speed and accuracy.
+
+    python benchmarks/bench_agent.py                       # scripted fake model, harness smoke test
+    python benchmarks/bench_agent.py --llm record          # real Gemini (GEMINI_KEY), recording its completions
+    python benchmarks/bench_agent.py --llm replay          # replays that recording, no network
+
+The default fake mode scripts the model to emit each question's reference SQL, so its accuracy and
+latency say nothing about the agent; it only checks that the harness, fixture and agent plumbing run.
+Only record and replay measure Gemini.
+
+No recording ships with the repo. `--llm record` writes one to
+benchmarks/recordings/agent_llm_cache.sqlite (or --recording). Completions are keyed on the exact
+prompt, so any change to the system prompt, schema context, tools or fixture (including --items)
+needs a fresh recording before replay is meaningful again.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from fixtures import seed_database
+from fake_llm import ScriptedChatModel
+from llm_cache import SQLiteLLMCache, LLMCacheMiss
+from sql_guard import clean_query
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUESTIONS = os.path.join(HERE, "agent_questions.json")
+DEFAULT_RECORDING = os.path.join(HERE, "recordings", "agent_llm_cache.sqlite")
+
+
+def _normalize(rows) -> list:
+    """Order- and type-insensitive form of a result set, so equivalent queries compare equal."""
+    def cell(v):
+        if isinstance(v, (float, Decimal)):
+            return f"{float(v):.4f}"
+        return str(v)
+    return sorted(tuple(cell(v) for v in row) for row in rows)
+
+
+def run_sql(engine, sql: str):
+    with engine.connect() as conn:
+        return conn.execute(text(clean_query(sql))).fetchall()
+
+
+def judge(engine, case: dict, answer, sql) -> bool:
+    if "expected_answer_contains" in case:
+        return answer is not None and case["expected_answer_contains"].lower() in answer.lower()
+    if not sql:
+        return False
+    try:
+        return _normalize(run_sql(engine, sql)) == _normalize(run_sql(engine, case["reference_sql"]))
+    except Exception:
+        return False
+
+
+def scripted_llm(engine, case: dict) -> ScriptedChatModel:
+    """Builds the fake model for a question, filling {result} with the reference answer."""
+    result = ""
+    if "reference_sql" in case:
+        rows = run_sql(engine, case["reference_sql"])
+        result = rows[0][0] if len(rows) == 1 and len(rows[0]) == 1 else rows[:5]
+    return ScriptedChatModel(responses=[r.replace("{result}", str(result)) for r in case["responses"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS)
+    parser.add_argument("--llm", choices=["fake", "replay", "record"], default="fake")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING, help="LLM cache file for replay/record")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--json", help="also write per-question results to this JSONL file")
+    args = parser.parse_args()
+
+    # Everything the agent persists goes to a scratch directory, never the working tree
+    tmp = tempfile.mkdtemp()
+    os.environ["LLM_CACHE_MODE"] = "off"
+    os.environ["AGENT_TRACE_PATH"] = "off"
+    os.environ["SCHEMA_SNAPSHOT_PATH"] = os.path.join(tmp, "schema.json")
+    os.environ["AGENT_EXPORT_DIR"] = os.path.join(tmp, "exports")
+    if args.llm != "record":
+        os.environ.setdefault("GEMINI_KEY", "offline")
+    if args.llm == "replay" and not os.path.exists(args.recording):
+        sys.exit(f"No LLM recording at {args.recording}. Create it with `--llm record` (needs GEMINI_KEY), "
+                 f"or run `--llm fake` for a harness smoke test.")
+
+    from utils import setup_agent, get_result
+    from mappings import MappingStore
+
+    engine = seed_database(f"sqlite:///{os.path.join(tmp, 'fixture.db')}", n_items=args.items)
+    mapping_store = MappingStore(engine)
+    with open(args.questions) as f:
+        cases = json.load(f)
+
+    llm_cache = None
+    if args.llm != "fake":
+        os.makedirs(os.path.dirname(args.recording), exist_ok=True)
+        llm_cache = SQLiteLLMCache(args.recording, mode=args.llm, ttl_seconds=None)
+
+    if args.llm == "fake":
+        print("⚠️ fake LLM: harness smoke test only, the scripted answers are the reference SQL")
+
+    results = []
+    for case in cases:
+        llm = scripted_llm(engine, case) if args.llm == "fake" else None
+        agent_executor, query_logger = setup_agent(engine, llm_cache=llm_cache, mapping_store=mapping_store,
+                                                   llm=llm, verbose=False)
+        start = time.perf_counter()
+        try:
+            answer, sql, export_path = get_result(case["question"], agent_executor, query_logger)
+            error = None
+        except LLMCacheMiss as e:
+            answer, sql, export_path, error = None, None, None, f"{e}; the recording is stale, re-run with --llm record"
+        except Exception as e:
+            answer, sql, export_path, error = None, None, None, str(e)
+        latency = time.perf_counter() - start
+        trace = query_logger.last_trace or {}
+
+        results.append({
+            "question": case["question"],
+            "correct": error is None and judge(engine, case, answer, sql),
+            "latency_s": round(latency, 4),
+            "iterations": trace.get("iterations"),
+            "llm_calls": trace.get("llm_calls"),
+            "prompt_tokens": trace.get("input_tokens"),
+            "sql_seconds": trace.get("sql_seconds"),
+            "exported": bool(export_path),
+            "sql": sql,
+            "error": error,
+        })
+
+    print(f"\n{'question':<52} {'ok':>3} {'lat s':>7} {'iter':>5} {'llm':>4} {'p.tok':>7} {'sql s':>7}")
+    for r in results:
+        print(f"{r['question'][:52]:<52} {'Y' if r['correct'] else 'N':>3} {r['latency_s']:>7.3f} "
+              f"{r['iterations'] or 0:>5} {r['llm_calls'] or 0:>4} {r['prompt_tokens'] or 0:>7} {r['sql_seconds'] or 0:>7.4f}")
+        if r["error"]:
+            print(f"    error: {r['error'][:100]}")
+    correct = sum(r["correct"] for r in results)
+    print(f"\naccuracy {correct}/{len(results)}, total latency {sum(r['latency_s'] for r in results):.3f}s, "
+          f"prompt tokens {sum(r['prompt_tokens'] or 0 for r in results)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            for r in results:
+                f.write(json.dumps(r) + "\n")
+
+
+if __name__ == "__main__":
+    main()
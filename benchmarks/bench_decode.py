@@ -0,0 +1,94 @@
+"""
+Times parsing and decoding of monday items_page responses: the previous path (json.loads into
+nested dicts, then a row dict per item and pd.DataFrame) against monday_client's (orjson when
+installed, row tuples via item_rows and DataFrame.from_records). Pages come from the synthetic
+board, with every column or only SYNC_COLUMN_IDS. Peak memory is the tracemalloc peak of one run;
+neither path streams, and orjson's parse buffer puts a roughly constant overhead on the new one, so
+it only comes out ahead on memory once the retained rows dominate (tens of pages).
+
+    python benchmarks/bench_decode.py
+    python benchmarks/bench_decode.py --page-size 500 --pages 20 --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import pandas as pd
+
+import monday_client
+from column_config import SYNC_COLUMN_IDS, COLUMN_CONFIG, WORKLOG_COLUMNS
+from board_generator import SyntheticBoard
+
+
+def make_pages(board, page_size, pages, column_ids) -> list[bytes]:
+    out = []
+    for p in range(pages):
+        items = [board.item(i, column_ids) for i in range(p * page_size, min((p + 1) * page_size, board.n_items))]
+        body = {"data": {"boards": [{"items_page": {"cursor": None, "items": items}}]}}
+        out.append(json.dumps(body).encode())
+    return out
+
+
+def decode_dicts(pages) -> pd.DataFrame:
+    rows = []
+    for body in pages:
+        for item in json.loads(body)["data"]["boards"][0]["items_page"]["items"]:
+            row = {"monday_item_id": int(item["id"]), "job_name": item["name"], "updated_at": item["updated_at"]}
+            for col in item["column_values"]:
+                col_config = next((v for k, v in COLUMN_CONFIG.items() if k == col["id"]), None)
+                row[col_config['new_name'] if col_config else col["id"]] = col["text"]
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def decode_tuples(pages) -> pd.DataFrame:
+    rows = []
+    for body in pages:
+        items = monday_client.loads(body)["data"]["boards"][0]["items_page"]["items"]
+        rows.extend(monday_client.item_rows(items, SYNC_COLUMN_IDS))
+    df = pd.DataFrame.from_records(rows, columns=WORKLOG_COLUMNS)
+    df["monday_item_id"] = df["monday_item_id"].astype("int64")
+    return df
+
+
+def measure(decode, pages, repeat) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(pages)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    decode(pages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "peak_mb": peak / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    board = SyntheticBoard(args.page_size * args.pages)
+    n = board.n_items
+    print(f"JSON backend: {'orjson' if monday_client.orjson is not None else 'json'}, {args.pages} pages x {args.page_size} items")
+    print(f"{'payload':<14} {'decoder':<16} {'MB':>6} {'seconds':>8} {'items/s':>9} {'peak MB':>8}")
+    for label, column_ids in (("all columns", None), ("pruned", set(SYNC_COLUMN_IDS))):
+        pages = make_pages(board, args.page_size, args.pages, column_ids)
+        size = sum(len(p) for p in pages) / 2**20
+        for name, decode in (("json + dicts", decode_dicts), ("loads + tuples", decode_tuples)):
+            r = measure(decode, pages, args.repeat)
+            print(f"{label:<14} {name:<16} {size:>6.1f} {r['seconds']:>8.3f} {n / r['seconds']:>9.0f} {r['peak_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Times agent-style aggregations over worklog on the database against the columnar replica
+(DuckDB views over partitioned Parquet, see replica.py), plus one incremental replica upsert.
+
+    python benchmarks/bench_replica.py --items 200000
+    python benchmarks/bench_replica.py --items 1000000 --db-url postgresql://localhost/bench
+
+The database defaults to BENCH_DATABASE_URL, else a throwaway SQLite file.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from replica import Replica, replica_engine
+from board_generator import SyntheticBoard
+
+
+# Written to run unchanged on Postgres, SQLite and DuckDB
+QUERIES = {
+    "jobs per product": "SELECT product, COUNT(*) FROM worklog GROUP BY product",
+    "pages per month": """
+        SELECT substr(received_date, 1, 7) AS month, SUM(CAST(page_count_standard_mto AS REAL))
+        FROM worklog GROUP BY 1 ORDER BY 1
+    """,
+    "open jobs per customer": """
+        SELECT customer_name, COUNT(*) FROM worklog
+        WHERE primary_status <> 'Done' GROUP BY customer_name ORDER BY 2 DESC LIMIT 20
+    """,
+    "one month's jobs": "SELECT COUNT(*) FROM worklog WHERE received_date LIKE '2024-05%'",
+}
+
+
+def best_of(engine, query, repeat) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with engine.connect() as conn:
+            start = time.perf_counter()
+            conn.execute(text(query)).fetchall()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--touched", type=int, default=500, help="rows in the incremental upsert")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DATABASE_URL"))
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    db_url = args.db_url or f"sqlite:///{os.path.join(tmp, 'bench_replica.db')}"
+    engine = create_engine(db_url)
+    board = SyntheticBoard(args.items)
+
+    print(f"seeding {board.n_items} items...")
+    chunks = []
+    for start in range(0, board.n_items, 50_000):
+        df = pd.DataFrame([board.worklog_row(i) for i in range(start, min(start + 50_000, board.n_items))])
+        df.to_sql("worklog", engine, if_exists="replace" if start == 0 else "append", index=False)
+        chunks.append(df)
+    replica = Replica(os.path.join(tmp, "replica"))
+    start = time.perf_counter()
+    replica.replace("worklog", chunks)
+    print(f"replica built in {time.perf_counter() - start:.2f}s")
+
+    touched = pd.DataFrame([board.worklog_row(board.index_of(i)) for i in board.touch(args.touched)])
+    start = time.perf_counter()
+    replica.upsert("worklog", touched)
+    print(f"upsert of {len(touched)} rows: {time.perf_counter() - start:.3f}s")
+
+    duck = replica_engine(replica.directory)
+    print(f"\n{'query':<24} {engine.dialect.name + ' s':>10} {'replica s':>10} {'speedup':>8}")
+    for name, query in QUERIES.items():
+        db_s, replica_s = best_of(engine, query, args.repeat), best_of(duck, query, args.repeat)
+        print(f"{name:<24} {db_s:>10.3f} {replica_s:>10.3f} {db_s / replica_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
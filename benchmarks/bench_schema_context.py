@@ -0,0 +1,79 @@
+"""
+Compares the raw CREATE TABLE + sample rows schema context with the compact summary
+built by schema_summary, and optionally times real questions through the agent with each.
+
+    python benchmarks/bench_schema_context.py
+    python benchmarks/bench_schema_context.py --questions questions.txt
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from langchain_community.utilities import SQLDatabase
+from utils import connect_postgres, setup_agent, get_result, build_agent_prefix
+from schema_summary import build_schema_summary, estimate_tokens, SUMMARY_TABLES
+
+
+def context_sizes(engine, token_budget):
+    existing = set(inspect(engine).get_table_names())
+    raw_db = SQLDatabase(engine=engine, include_tables=[t for t in SUMMARY_TABLES if t in existing])
+    raw = raw_db.get_table_info()
+    summary = build_schema_summary(engine, token_budget=token_budget)
+    return {
+        "raw_schema_tokens": estimate_tokens(raw),
+        "summary_tokens": estimate_tokens(summary),
+        "prefix_tokens_before": estimate_tokens(build_agent_prefix("")),
+        "prefix_tokens_after": estimate_tokens(build_agent_prefix(summary)),
+    }
+
+
+def time_questions(engine, questions, compact_schema):
+    agent_executor, query_logger = setup_agent(engine, compact_schema=compact_schema)
+    timings = []
+    for q in questions:
+        start = time.perf_counter()
+        get_result(q, agent_executor, query_logger)
+        steps = sum(1 for event_type, _ in query_logger.intermediate_steps if event_type == "action")
+        timings.append((q, time.perf_counter() - start, steps))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", help="file with one question per line to time through the live agent")
+    parser.add_argument("--budget", type=int, default=int(os.getenv("SCHEMA_CONTEXT_TOKENS", 800)))
+    args = parser.parse_args()
+
+    # Measure the model, not recorded completions
+    os.environ["LLM_CACHE_MODE"] = "off"
+
+    engine = connect_postgres()
+    if not engine:
+        return
+
+    sizes = context_sizes(engine, args.budget)
+    print("\n ---- schema context (estimated tokens) ----")
+    for k, v in sizes.items():
+        print(f"{k:>24}: {v}")
+
+    if not args.questions:
+        return
+
+    with open(args.questions) as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    before = time_questions(engine, questions, compact_schema=False)
+    after = time_questions(engine, questions, compact_schema=True)
+    print("\n ---- latency per question (s) / agent actions ----")
+    print(f"{'question':<50} {'before':>8} {'after':>8} {'steps':>7}")
+    for (q, t0, s0), (_, t1, s1) in zip(before, after):
+        print(f"{q[:50]:<50} {t0:>8.2f} {t1:>8.2f} {s0:>3}->{s1:<3}")
+    print(f"{'total':<50} {sum(t for _, t, _ in before):>8.2f} {sum(t for _, t, _ in after):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
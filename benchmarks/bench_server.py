@@ -0,0 +1,94 @@
+"""
+Offline load test for agent_server: seeded SQLite fixture, fake LLM, N concurrent clients.
+
+    python benchmarks/bench_server.py --workers 1 4 8 --requests 64 --latency 0.25
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import seed_database
+from agent_pool import AgentPool
+from agent_server import AgentServer
+from fake_llm import fake_sql_llm
+
+
+async def post(port: int, question: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"question": question}).encode()
+    writer.write(b"POST /ask HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    return status, time.perf_counter() - start
+
+
+async def load(port: int, n_requests: int, concurrency: int) -> list[tuple[int, float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            # Distinct questions so nothing is served from a cache or the intent router
+            return await post(port, f"benchmark question number {i}")
+
+    return await asyncio.gather(*(one(i) for i in range(n_requests)))
+
+
+def run_server(server: AgentServer, port: int) -> None:
+    ready = threading.Event()
+
+    def target():
+        loop = asyncio.new_event_loop()
+        event = asyncio.Event()
+        loop.create_task(server.serve("127.0.0.1", port, ready=event))
+        loop.run_until_complete(event.wait())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=target, daemon=True).start()
+    ready.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.25, help="fake LLM seconds per call")
+    parser.add_argument("--items", type=int, default=2000)
+    args = parser.parse_args()
+
+    os.environ["LLM_CACHE_MODE"] = "off"
+    tmp = tempfile.mkdtemp()
+    os.environ["SCHEMA_SNAPSHOT_PATH"] = os.path.join(tmp, "schema.json")
+    engine = seed_database(f"sqlite:///{os.path.join(tmp, 'fixture.db')}", n_items=args.items)
+
+    print(f"{'workers':>8} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'errors':>7}")
+    for i, workers in enumerate(args.workers):
+        pool = AgentPool(engine, size=workers, llm_factory=lambda: fake_sql_llm(latency=args.latency))
+        port = 18080 + i
+        run_server(AgentServer(pool, max_queue=args.requests), port)
+
+        start = time.perf_counter()
+        results = asyncio.run(load(port, args.requests, args.concurrency))
+        wall = time.perf_counter() - start
+
+        latencies = sorted(t for status, t in results if status == 200)
+        errors = sum(1 for status, _ in results if status != 200)
+        p50 = latencies[len(latencies) // 2] if latencies else float("nan")
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else float("nan")
+        print(f"{workers:>8} {args.requests / wall:>8.2f} {p50:>8.3f} {p95:>8.3f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
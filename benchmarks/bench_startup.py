@@ -0,0 +1,88 @@
+"""
+Tracks cold-start cost: the import time of each entry point, measured in fresh interpreters,
+and the slowest imports under it according to `python -X importtime`.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --top 25 --max-seconds 0.5
+
+"sql_agent" is what stands between launching the CLI and its prompt; "agent setup" is what
+sql_agent now imports in the background while the first question is typed (setup_agent's
+LangChain toolkits and Gemini client). --max-seconds exits non-zero when sql_agent's import
+is slower, so a stray top-level import of a heavy package shows up in CI.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "sql_agent": "import sql_agent",
+    "utils": "import utils",
+    "batch_agent": "import batch_agent",
+    "agent_server": "import agent_server",
+    "app_v2": "import app_v2",
+    "agent setup": ("import utils, schema_cache, sql_guard, mappings, llm_cache, langchain_core.tools, "
+                    "langchain_community.agent_toolkits, langchain_google_genai"),
+}
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def run(statement: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(args, cwd=ROOT, capture_output=True, text=True)
+
+
+def import_seconds(statement: str, repeat: int) -> float | None:
+    """Best wall time of the import over `repeat` fresh interpreters, None if it fails."""
+    best = None
+    for _ in range(repeat):
+        proc = run(statement)
+        if proc.returncode != 0:
+            return None
+        seconds = float(proc.stdout.strip().splitlines()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def slowest_imports(statement: str, top: int, depth: int) -> list[tuple[str, float, float]]:
+    """(module, own seconds, cumulative seconds) of the `top` slowest imports nested at most `depth` deep."""
+    rows = []
+    for line in run(statement, importtime=True).stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        # importtime indents two spaces per nesting level
+        if match and len(match.group(3)) <= 2 * depth:
+            rows.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    return sorted(rows, key=lambda r: -r[2])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports listed for sql_agent")
+    parser.add_argument("--depth", type=int, default=3, help="import nesting depth of the listed imports")
+    parser.add_argument("--max-seconds", type=float, help="fail if importing sql_agent takes longer")
+    args = parser.parse_args()
+
+    print(f"{'entry point':<14} {'import s':>9}")
+    results = {}
+    for name, statement in TARGETS.items():
+        results[name] = import_seconds(statement, args.repeat)
+        shown = f"{results[name]:>9.3f}" if results[name] is not None else f"{'failed':>9}"
+        print(f"{name:<14} {shown}")
+
+    print("\nslowest imports under sql_agent (python -X importtime):")
+    print(f"{'module':<40} {'own s':>8} {'cum s':>8}")
+    for module, own, cumulative in slowest_imports(TARGETS["sql_agent"], args.top, args.depth):
+        print(f"{module:<40} {own:>8.3f} {cumulative:>8.3f}")
+
+    if args.max_seconds is not None and (results["sql_agent"] or float("inf")) > args.max_seconds:
+        print(f"\nsql_agent import exceeds {args.max_seconds:.2f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
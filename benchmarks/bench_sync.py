@@ -0,0 +1,214 @@
+"""
+Sync benchmarks against the fake monday API (fake_monday.py) and a local database.
+
+    python benchmarks/bench_sync.py --items 10000 --touched 200
+    python benchmarks/bench_sync.py --items 1000000 --scenarios incremental --db-url postgresql://localhost/bench
+
+Scenarios, each run in its own process so peak RSS is per scenario:
+  full            local_db_update: column mapping, fetch_all_items over the whole board, replace worklog
+  incremental     app_v2.sync_incremental after --touched items changed (worklog/worklog_index pre-seeded)
+  incremental_v1  app_v1's monday side: column mapping plus change scan, then fetch_full_items by id
+  multi_board     app_v2.sync_boards over --boards boards of --items, --items/2, --items/4, ... items,
+                  --touched items changed on each
+
+Comparison runs repeat every scenario with one optimization switched off and report what it saves:
+  --compare-unpruned   MONDAY_PRUNE_COLUMNS=0, every column_values requested (payload, complexity, decode)
+  --compare-unbatched  MONDAY_MAX_BATCH_FIELDS=1, one GraphQL field per request (round trips, wall time;
+                       use --latency to model the network)
+  --compare-sequential MONDAY_SYNC_WORKERS=1, boards synced one after another
+
+The database defaults to BENCH_DATABASE_URL; without it a throwaway SQLite file is used, which is
+fine for comparing fetch/decode changes but not for judging DB write paths.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+SCENARIOS = ["full", "incremental", "incremental_v1", "multi_board"]
+VARIANTS = {"unpruned": {"MONDAY_PRUNE_COLUMNS": "0"}, "unbatched": {"MONDAY_MAX_BATCH_FIELDS": "1"},
+            "sequential": {"MONDAY_SYNC_WORKERS": "1"}}
+
+
+def seed_incremental(engine, boards) -> None:
+    """
+    worklog (for the first board) and worklog_index (for every board) as app_v2 would have left
+    them before the touched items changed. Other boards' worklog_<id> tables start empty.
+    """
+    import pandas as pd
+    from sqlalchemy import text
+    import app_v2
+
+    board = boards[0]
+    batch = 50_000
+    for start in range(0, board.n_items, batch):
+        rows = [board.worklog_row(i) for i in range(start, min(start + batch, board.n_items))]
+        pd.DataFrame(rows).to_sql("worklog", engine, if_exists="replace" if start == 0 else "append", index=False)
+    app_v2.create_worklog_index_if_missing(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM worklog_index"))
+        for other in boards[1:]:
+            conn.execute(text(f'DROP TABLE IF EXISTS "worklog_{other.board_id}"'))
+    for board in boards:
+        index = pd.DataFrame({"item_id": [board.item_id(i) for i in range(board.n_items)],
+                              "item_name": [f"Job {board.item_id(i)}" for i in range(board.n_items)],
+                              "updated_at": pd.to_datetime(board.updated_at, unit="s", utc=True),
+                              "board_id": board.board_id})
+        index.to_sql("worklog_index", engine, if_exists="append", index=False)
+
+
+def run_child(scenario: str, db_url: str) -> dict:
+    """Runs one scenario in this process and returns its measurements."""
+    from sqlalchemy import create_engine
+    from sync_metrics import SyncMetrics
+    import app_v1
+    import app_v2
+    import local_db_update
+
+    for module in (app_v1, app_v2, local_db_update):
+        module.DELAY = 0  # measure the work, not the politeness sleeps
+    engine = create_engine(db_url)
+    metrics = SyncMetrics(f"bench_{scenario}", metrics_dir=None)
+
+    start = time.perf_counter()
+    if scenario == "full":
+        with metrics.stage("column_mapping"):
+            column_mapping = local_db_update.fetch_column_mapping(local_db_update.BOARD_ID, metrics=metrics)
+        df = local_db_update.fetch_all_items(local_db_update.BOARD_ID, column_mapping, metrics=metrics)
+        with metrics.stage("db_write"):
+            df.to_sql("worklog_full", engine, if_exists="replace", index=False)
+            metrics.add(items=len(df))
+        rows = len(df)
+    elif scenario == "incremental":
+        app_v2.sync_incremental(engine, metrics)
+        rows = metrics.stages.get("db_write", {}).get("items", 0)
+    elif scenario == "multi_board":
+        for board_metrics in app_v2.sync_boards(engine, app_v2.BOARD_IDS).values():
+            metrics.merge(board_metrics)  # stage seconds are summed across boards, unlike wall time
+        rows = metrics.stages.get("db_write", {}).get("items", 0)
+    elif scenario == "incremental_v1":
+        with metrics.stage("change_scan"):
+            column_mapping, items = app_v1.fetch_mapping_and_updates(app_v1.BOARD_ID, os.environ["BENCH_SINCE"],
+                                                                     metrics=metrics)
+        df = app_v1.fetch_full_items(app_v1.BOARD_ID, {item["id"] for item in items}, column_mapping, metrics=metrics)
+        rows = len(df)
+    else:
+        raise ValueError(f"Unknown scenario {scenario}")
+    wall = time.perf_counter() - start
+
+    totals = {c: sum(s[c] for s in metrics.stages.values()) for c in ("requests", "bytes", "retries", "complexity")}
+    return {
+        "scenario": scenario,
+        "wall_s": round(wall, 3),
+        "rows": rows,
+        "rows_per_s": round(rows / wall, 1) if wall else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        **totals,
+        "stages": {name: metrics.stage_summary(name) for name in metrics.stages},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--touched", type=int, default=200, help="items changed before the incremental scenarios")
+    parser.add_argument("--boards", type=int, default=3, help="boards in the multi_board scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--db-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--budget", type=int, default=5_000_000, help="fake API complexity budget per minute")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake API seconds per response")
+    parser.add_argument("--compare-unpruned", action="store_true",
+                        help="also run each scenario requesting every column and report what pruning saves")
+    parser.add_argument("--compare-unbatched", action="store_true",
+                        help="also run each scenario with one GraphQL field per request and report what batching saves")
+    parser.add_argument("--compare-sequential", action="store_true",
+                        help="also run each scenario syncing one board at a time")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.db_url)))
+        return
+
+    from sqlalchemy import create_engine
+    from board_generator import SyntheticBoard, format_ts, BOARD_ID, FIRST_ITEM_ID
+    from fake_monday import FakeMondayAPI, serve
+
+    tmp = tempfile.mkdtemp()
+    db_url = args.db_url or f"sqlite:///{os.path.join(tmp, 'bench_sync.db')}"
+    if not args.db_url:
+        print("BENCH_DATABASE_URL not set, using a temporary SQLite database")
+
+    # Board k has items/2**k items and its own item id range
+    boards = [SyntheticBoard(max(args.items >> k, 1), board_id=BOARD_ID + k, first_item_id=FIRST_ITEM_ID + k * 10**8)
+              for k in range(max(args.boards, 1))]
+    board = boards[0]
+    api = FakeMondayAPI(boards, complexity_budget=args.budget, latency=args.latency)
+    server = serve(api)
+    env = {**os.environ, "MONDAY_API_URL": f"http://127.0.0.1:{server.server_port}/v2",
+           "SYNC_METRICS_DIR": os.path.join(tmp, "metrics"),
+           "MONDAY_BOARD_IDS": ",".join(str(b.board_id) for b in boards)}
+
+    variants = ["default"] + [v for v in VARIANTS if getattr(args, f"compare_{v}")]
+    scenarios = args.scenarios.split(",")
+    results = []
+    for scenario in scenarios:
+        for variant in variants:
+            since = format_ts(time.time() - 1)
+            if scenario.startswith("incremental") or scenario == "multi_board":
+                seeded = boards if scenario == "multi_board" else [board]
+                print(f"seeding {sum(b.n_items for b in seeded)} items for {scenario}...")
+                for b in seeded:
+                    b.updated_at[:] = SyntheticBoard(b.n_items).updated_at
+                if scenario != "incremental_v1":
+                    seed_incremental(create_engine(db_url), seeded)
+                for b in seeded:
+                    b.touch(args.touched)
+            print(f"running {scenario} ({variant})...")
+            proc = subprocess.run([sys.executable, __file__, "--child", scenario, "--db-url", db_url],
+                                  env={**env, "BENCH_SINCE": since, **VARIANTS.get(variant, {})},
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(proc.stdout[-2000:], proc.stderr[-2000:])
+                continue
+            results.append({**json.loads(proc.stdout.strip().splitlines()[-1]), "variant": variant})
+
+    print(f"\n{'scenario':<15} {'variant':<10} {'wall s':>8} {'rows':>8} {'rows/s':>9} {'reqs':>6} {'MB recv':>8} "
+          f"{'retries':>7} {'complexity':>11} {'peak RSS MB':>12}")
+    for r in results:
+        print(f"{r['scenario']:<15} {r['variant']:<10} {r['wall_s']:>8.2f} {r['rows']:>8} {r['rows_per_s'] or 0:>9.0f} "
+              f"{r['requests']:>6} {r['bytes'] / 2**20:>8.1f} {r['retries']:>7} {r['complexity']:>11} "
+              f"{r['peak_rss_mb']:>12.1f}")
+        for name, s in r["stages"].items():
+            print(f"    {name:<16} {s['seconds']:>8.3f}s {s['items']:>8} items")
+
+    by_run = {(r["scenario"], r["variant"]): r for r in results}
+    for scenario in scenarios:
+        default = by_run.get((scenario, "default"))
+        for variant in variants[1:]:
+            other = by_run.get((scenario, variant))
+            if not (default and other):
+                continue
+            decode = [r["stages"].get("decode", {}).get("seconds", 0) for r in (other, default)]
+            print(f"{scenario} vs {variant}: {(other['bytes'] - default['bytes']) / 1024:.0f} KB saved "
+                  f"({1 - default['bytes'] / other['bytes']:.0%}), requests {other['requests']} -> {default['requests']}, "
+                  f"complexity {other['complexity']} -> {default['complexity']}, decode {decode[0]:.3f}s -> {decode[1]:.3f}s, "
+                  f"wall {other['wall_s']:.2f}s -> {default['wall_s']:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Deterministic synthetic monday.com boards for sync benchmarks.
+
+Items are generated on demand from (seed, index), so a 1M-item board costs a few MB of NumPy
+arrays rather than a few GB of dicts. Column ids are the real board's (every column described in
+local_db_update.COLUMN_DESCRIPTIONS, a superset of column_config.COLUMN_CONFIG), titles come from
+COLUMN_RENAMES, and values follow the fixture's distributions: mostly delivered jobs, one or two
+page count columns filled per job, long free-text upload notes on a minority of items.
+"""
+import os
+import sys
+import json
+import random
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from column_config import COLUMN_CONFIG
+from local_db_update import COLUMN_RENAMES, COLUMN_DESCRIPTIONS, JOB_TYPE_MAP
+from fixtures import CUSTOMERS, PEOPLE, STATUS_WEIGHTS, ANCHOR_DATE
+
+
+BOARD_ID = 3874058084
+FIRST_ITEM_ID = 5_000_000_000
+PSEUDO_COLUMNS = {"Job Name", "item_id"}  # item name and id, not column_values
+PAGE_COUNT_COLUMNS = ["numeric", "numeric8", "numeric4", "numeric2", "numeric21", "numeric7", "numbers", "numeric0"]
+NOTE_WORDS = ("see attached plans revised sheet L1.02 irrigation only exclude pavers per addendum customer "
+              "called confirm quantities before delivery hold for missing civil set").split()
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def column_type(column_id: str) -> str:
+    for prefix, kind in (("color", "status"), ("date", "date"), ("numeric", "numbers"), ("numbers", "numbers"),
+                         ("multiple_person", "people"), ("people", "people"), ("long_text", "long_text"),
+                         ("dropdown", "dropdown"), ("email", "email"), ("link", "link"), ("file", "file"),
+                         ("mirror", "mirror"), ("duration", "time_tracking"), ("formula", "formula")):
+        if column_id.startswith(prefix):
+            return kind
+    return "text"
+
+
+def format_ts(seconds: float) -> str:
+    return (EPOCH + datetime.timedelta(seconds=int(seconds))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticBoard:
+    def __init__(self, n_items: int, seed: int = 7, board_id: int = BOARD_ID, first_item_id: int = FIRST_ITEM_ID):
+        self.n_items = n_items
+        self.seed = seed
+        self.board_id = board_id
+        self.first_item_id = first_item_id  # item ids are unique across an account, so boards need disjoint ranges
+        self.columns = [{"id": cid, "title": COLUMN_RENAMES.get(cid, cid), "type": column_type(cid)}
+                        for cid in COLUMN_DESCRIPTIONS if cid not in PSEUDO_COLUMNS]
+        rng = np.random.default_rng(seed)
+        # Only what filters need is materialized: received day offset and last update time per item
+        self.received_offset = rng.integers(0, 540, n_items)
+        anchor = datetime.datetime.combine(ANCHOR_DATE, datetime.time(12), tzinfo=datetime.timezone.utc)
+        received_ts = anchor.timestamp() - self.received_offset * 86400.0
+        self.updated_at = received_ts + rng.integers(0, 14 * 86400, n_items)
+        self.received_day = [(ANCHOR_DATE - datetime.timedelta(days=int(d))) for d in range(540)]
+
+
+    def item_id(self, index: int) -> int:
+        return self.first_item_id + index
+
+
+    def index_of(self, item_id) -> int | None:
+        index = int(item_id) - self.first_item_id
+        return index if 0 <= index < self.n_items else None
+
+
+    def touch(self, count: int, now: float | None = None, seed: int = 0) -> list[int]:
+        """Marks `count` random items as updated at `now` (default: the current time). Returns their ids."""
+        now = now or datetime.datetime.now(datetime.timezone.utc).timestamp()
+        picked = np.random.default_rng(seed).choice(self.n_items, size=min(count, self.n_items), replace=False)
+        self.updated_at[picked] = now
+        return [self.item_id(int(i)) for i in picked]
+
+
+    def values(self, index: int) -> dict:
+        """Column id -> text for one item."""
+        rng = random.Random(self.seed * 1_000_003 + index)
+        received = self.received_day[int(self.received_offset[index])]
+        due = received + datetime.timedelta(days=rng.randint(2, 14))
+        status = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0]
+        delivered = due + datetime.timedelta(days=rng.randint(-3, 4)) if status == "Delivered" else None
+        customer = rng.choice(CUSTOMERS)
+        sender = rng.choice(PEOPLE)
+        values = {c["id"]: "" for c in self.columns}
+        values.update({
+            "multiple_person_mkqnhsnf": rng.choice(PEOPLE),
+            "multiple_person": ", ".join(rng.sample(PEOPLE, rng.randint(1, 3))),
+            "people": rng.choice(PEOPLE),
+            "text2": sender,
+            "color56": status,
+            "color": rng.choice(list(JOB_TYPE_MAP)),
+            "date": due.isoformat(),
+            "date_mkq9h641": (due + datetime.timedelta(days=2)).isoformat(),
+            "dropdown35": rng.choice(["Hardscape", "Softscape", "Irrigation", "Maintenance", "Hardscape, Softscape"]),
+            "email": f"{sender.lower()}@{customer.lower().replace(' ', '')}.com",
+            "date4": received.isoformat(),
+            "text0": customer,
+            "mirror_15": customer,
+            "color8": rng.choice(["Billed", "Not Billed", "N/A"]),
+            "mirror6": rng.choice(["Monthly", "Per Job", ""]),
+            "multiple_person9": rng.choice(PEOPLE),
+            "formula0": f"{rng.randint(100, 9999)} {rng.choice(['Oak', 'Elm', 'Main', 'Park'])} St",
+            "duration": f"{rng.randint(0, 9):02d}:{rng.randint(0, 59):02d}:00",
+            "duration_mkqh5ne1": f"{rng.randint(0, 3):02d}:{rng.randint(0, 59):02d}:00",
+            "file": ", ".join(f"sheet_{n}.pdf" for n in range(rng.randint(1, 4))),
+        })
+        for column_id in rng.sample(PAGE_COUNT_COLUMNS, rng.randint(1, 2)):
+            values[column_id] = str(rng.randint(1, 60))
+        if rng.random() < 0.3:
+            values["long_text_mkqwc9v8"] = " ".join(rng.choices(NOTE_WORDS, k=rng.randint(10, 80)))
+        if delivered:
+            values["date46"] = delivered.isoformat()
+            values["date9"] = delivered.isoformat()
+            values["link"] = f"https://www.dropbox.com/sh/{rng.getrandbits(48):012x}/completed"
+            values["link9"] = f"https://www.dropbox.com/sh/{rng.getrandbits(48):012x}/source"
+        return values
+
+
+    def item(self, index: int, column_ids=None) -> dict:
+        """One item in monday's API shape, with column_values limited to column_ids if given."""
+        values = self.values(index)
+        columns = self.columns if column_ids is None else [c for c in self.columns if c["id"] in column_ids]
+        return {
+            "id": str(self.item_id(index)),
+            "name": f"Job {self.item_id(index)}",
+            "updated_at": format_ts(self.updated_at[index]),
+            "column_values": [{"id": c["id"], "text": values[c["id"]] or None, "type": c["type"],
+                               "value": json.dumps(values[c["id"]]) if values[c["id"]] else None}
+                              for c in columns],
+        }
+
+
+    def worklog_row(self, index: int) -> dict:
+        """The row app_v2 would write to worklog for this item (COLUMN_CONFIG names, raw ids otherwise)."""
+        values = self.values(index)
+        row = {"monday_item_id": self.item_id(index), "job_name": f"Job {self.item_id(index)}",
+               "updated_at": format_ts(self.updated_at[index])}
+        for c in self.columns:
+            row[COLUMN_CONFIG.get(c["id"], {}).get("new_name", c["id"])] = values[c["id"]] or None
+        return row
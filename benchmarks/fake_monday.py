@@ -0,0 +1,381 @@
+"""
+Local stand-in for the monday.com GraphQL API, serving one or more SyntheticBoards.
+
+    python benchmarks/fake_monday.py --items 100000 --port 8765
+    MONDAY_API_URL=http://127.0.0.1:8765/v2 python app_v2.py
+
+Implements the subset the sync scripts use: boards(ids) { columns, items_page(limit, cursor,
+query_params) }, next_items_page, items(ids), column_values(ids), aliases, variables and the
+complexity field. Complexity is charged per requested item (10 points plus 1 per column value)
+against a per-minute budget; going over returns monday's "Complexity budget exhausted" error.
+"""
+import re
+import json
+import time
+import base64
+import datetime
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from board_generator import SyntheticBoard
+
+
+MAX_PAGE_LIMIT = 500
+MAX_ITEM_IDS = 100
+MAX_QUERY_COMPLEXITY = 5_000_000
+TOKEN = re.compile(r'\s+|,|#[^\n]*|(?P<punct>[{}()\[\]:!$=])|(?P<string>"(?:[^"\\]|\\.)*")'
+                   r'|(?P<number>-?\d+(?:\.\d+)?)|(?P<name>[_A-Za-z][_0-9A-Za-z]*)|(?P<spread>\.\.\.)')
+
+
+class GraphQLError(Exception):
+    pass
+
+
+# --- a small GraphQL parser: selections, aliases, arguments, variables ---
+
+def tokenize(source: str) -> list[tuple[str, object]]:
+    tokens, pos = [], 0
+    while pos < len(source):
+        m = TOKEN.match(source, pos)
+        if not m:
+            raise GraphQLError(f"Syntax error at {source[pos:pos + 20]!r}")
+        pos = m.end()
+        if m.group("punct"):
+            tokens.append(("punct", m.group("punct")))
+        elif m.group("string"):
+            tokens.append(("value", json.loads(m.group("string"))))
+        elif m.group("number"):
+            n = m.group("number")
+            tokens.append(("value", float(n) if "." in n else int(n)))
+        elif m.group("name"):
+            tokens.append(("name", m.group("name")))
+    return tokens
+
+
+class Parser:
+    def __init__(self, source: str, variables: dict | None = None):
+        self.tokens = tokenize(source)
+        self.pos = 0
+        self.variables = variables or {}
+
+
+    def peek(self, value=None):
+        token = self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+        return token if value is None else token[1] == value and token[0] != "value"
+
+
+    def take(self, value=None):
+        kind, v = self.peek()
+        if value is not None and (v != value or kind == "value"):
+            raise GraphQLError(f"Expected {value!r}, got {v!r}")
+        self.pos += 1
+        return v
+
+
+    def document(self) -> list:
+        if self.peek() == ("name", "query"):
+            self.take()
+            if self.peek()[0] == "name":
+                self.take()
+            if self.peek("("):
+                # Variable definitions: values come from the request's "variables"
+                depth = 0
+                while True:
+                    v = self.take()
+                    depth += v == "("
+                    depth -= v == ")"
+                    if depth == 0:
+                        break
+        return self.selection_set()
+
+
+    def selection_set(self) -> list:
+        self.take("{")
+        fields = []
+        while not self.peek("}"):
+            name = self.take()
+            alias = name
+            if self.peek(":"):
+                self.take()
+                name = self.take()
+            args = self.arguments() if self.peek("(") else {}
+            children = self.selection_set() if self.peek("{") else None
+            fields.append((alias, name, args, children))
+        self.take("}")
+        return fields
+
+
+    def arguments(self) -> dict:
+        self.take("(")
+        args = {}
+        while not self.peek(")"):
+            key = self.take()
+            self.take(":")
+            args[key] = self.value()
+        self.take(")")
+        return args
+
+
+    def value(self):
+        kind, v = self.peek()
+        if kind == "value":
+            self.take()
+            return v
+        if v == "$":
+            self.take()
+            return self.variables.get(self.take())
+        if v == "[":
+            self.take()
+            items = []
+            while not self.peek("]"):
+                items.append(self.value())
+            self.take("]")
+            return items
+        if v == "{":
+            self.take()
+            obj = {}
+            while not self.peek("}"):
+                key = self.take()
+                self.take(":")
+                obj[key] = self.value()
+            self.take("}")
+            return obj
+        self.take()
+        return {"true": True, "false": False, "null": None}.get(v, v)  # enum values stay strings
+
+
+# --- resolvers ---
+
+def as_list(value) -> list:
+    """GraphQL input coercion: a single value passed for a list argument is a one-element list."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+class FakeMondayAPI:
+    def __init__(self, board: SyntheticBoard | list[SyntheticBoard], complexity_budget: int = 5_000_000,
+                 latency: float = 0.0):
+        boards = board if isinstance(board, list) else [board]
+        self.boards = {b.board_id: b for b in boards}
+        self.board = boards[0]
+        self.complexity_budget = complexity_budget
+        self.latency = latency
+        self.stats = {"requests": 0, "bytes": 0, "complexity": 0, "items": 0, "errors": 0}
+        self._window_start = time.time()
+        self._used = 0
+        self._lock = threading.Lock()
+
+
+    def execute(self, query: str, variables: dict | None = None) -> dict:
+        fields = Parser(query, variables).document()
+        cost = sum(self._cost(name, args, children) for _, name, args, children in fields)
+        if cost > MAX_QUERY_COMPLEXITY:
+            self.stats["errors"] += 1
+            return {"errors": [{"message": f"Query has complexity of {cost}, which exceeds max complexity of "
+                                           f"{MAX_QUERY_COMPLEXITY}", "extensions": {"code": "ComplexityException"}}]}
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= 60:
+                self._window_start, self._used = now, 0
+            reset_in = int(60 - (now - self._window_start)) + 1
+            before = self.complexity_budget - self._used
+            if cost > before:
+                self.stats["errors"] += 1
+                return {"errors": [{"message": f"Complexity budget exhausted, query cost {cost} budget remaining "
+                                               f"{before} out of {self.complexity_budget} reset in {reset_in} seconds",
+                                    "extensions": {"code": "ComplexityException"}}]}
+            self._used += cost
+            self.stats["complexity"] += cost
+
+        data = {}
+        for alias, name, args, children in fields:
+            if name == "complexity":
+                data[alias] = self._project({"query": cost, "before": before, "after": before - cost,
+                                             "reset_in_x_seconds": reset_in}, children)
+            elif name == "boards":
+                data[alias] = [self._board(self.boards[int(board_id)], children)
+                               for board_id in as_list(args.get("ids", list(self.boards)))
+                               if int(board_id) in self.boards]
+            elif name == "items":
+                ids = as_list(args.get("ids"))
+                if len(ids) > MAX_ITEM_IDS:
+                    raise GraphQLError(f"items(ids:) accepts at most {MAX_ITEM_IDS} ids")
+                located = [self._locate(x) for x in ids]
+                data[alias] = [self._item(board, i, children) for board, i in located if board is not None]
+            elif name == "next_items_page":
+                data[alias] = self._items_page(None, args, children)
+            else:
+                raise GraphQLError(f"Unknown field {name}")
+        return {"data": data, "account_id": 1}
+
+
+    def _cost(self, name, args, children) -> int:
+        """Charges for the requested item capacity, like monday does, not for what is returned."""
+        if not children:
+            return 0
+        if name in ("items_page", "next_items_page", "items"):
+            n = args.get("limit", 25) if name != "items" else len(as_list(args.get("ids"))) or 25
+            per_item = 10
+            if name != "items":  # items_page { cursor items { ... } }
+                children = next((sub for _, child, _, sub in children if child == "items"), None) or []
+            for _, child, child_args, _ in children:
+                if child == "column_values":
+                    ids = as_list(child_args.get("ids"))
+                    per_item += len(ids) if ids else len(self.board.columns)
+            return min(n, MAX_PAGE_LIMIT) * per_item
+        return 1 + sum(self._cost(*c[1:]) for c in children)
+
+
+    def _project(self, obj: dict, children) -> dict:
+        return {alias: obj.get(name) for alias, name, _, _ in children or []}
+
+
+    def _locate(self, item_id) -> tuple[SyntheticBoard | None, int | None]:
+        for board in self.boards.values():
+            index = board.index_of(item_id)
+            if index is not None:
+                return board, index
+        return None, None
+
+
+    def _board(self, board, children) -> dict:
+        out = {}
+        for alias, name, args, sub in children:
+            if name == "id":
+                out[alias] = str(board.board_id)
+            elif name == "name":
+                out[alias] = f"Board {board.board_id} (synthetic)"
+            elif name == "columns":
+                out[alias] = [self._project(c, sub) for c in board.columns]
+            elif name == "items_page":
+                out[alias] = self._items_page(board, args, sub)
+            else:
+                out[alias] = None
+        return out
+
+
+    def _matching(self, board, rules: dict | None) -> np.ndarray:
+        """Item indexes matching items_page query_params (the rules the sync scripts send)."""
+        if not rules:
+            return np.arange(board.n_items)
+        masks = []
+        for rule in rules.get("rules", []):
+            column, operator = rule.get("column_id"), rule.get("operator")
+            if column == "__last_updated__" and operator == "greater_than":
+                since = datetime.datetime.fromisoformat(rule["compare_value"][0].replace("Z", "+00:00"))
+                if since.tzinfo is None:
+                    since = since.replace(tzinfo=datetime.timezone.utc)
+                masks.append(board.updated_at > since.timestamp())
+            elif column == "date4" and (operator == "today" or rule.get("compare_value") == ["TODAY"]):
+                today = time.strftime("%Y-%m-%d")
+                masks.append(np.array([d.isoformat() == today for d in board.received_day])[board.received_offset])
+            else:
+                raise GraphQLError(f"Unsupported rule {rule}")
+        combine = np.logical_and if rules.get("operator", "and") == "and" else np.logical_or
+        return np.flatnonzero(combine.reduce(masks)) if masks else np.arange(board.n_items)
+
+
+    def _items_page(self, board, args, children) -> dict:
+        limit = min(int(args.get("limit", 25)), MAX_PAGE_LIMIT)
+        if args.get("cursor"):
+            state = json.loads(base64.urlsafe_b64decode(args["cursor"]))
+            offset, rules, board = state["offset"], state["rules"], self.boards[state["board"]]
+        else:
+            offset, rules = 0, args.get("query_params")
+        matching = self._matching(board, rules)
+        page = matching[offset:offset + limit]
+        next_offset = offset + len(page)
+        cursor = None
+        if next_offset < len(matching):
+            cursor = base64.urlsafe_b64encode(json.dumps({"offset": next_offset, "rules": rules,
+                                                        "board": board.board_id}).encode()).decode()
+        out = {}
+        for alias, name, _, sub in children:
+            if name == "cursor":
+                out[alias] = cursor
+            elif name == "items":
+                out[alias] = [self._item(board, int(i), sub) for i in page]
+        return out
+
+
+    def _item(self, board, index: int, children) -> dict:
+        self.stats["items"] += 1
+        column_ids = None
+        for _, name, args, _ in children:
+            if name == "column_values" and args.get("ids"):
+                column_ids = set(as_list(args["ids"]))
+        item = board.item(index, column_ids)
+        out = {}
+        for alias, name, _, sub in children:
+            if name == "column_values":
+                out[alias] = [self._project(cv, sub) for cv in item["column_values"]]
+            else:
+                out[alias] = item.get(name)
+        return out
+
+
+class Handler(BaseHTTPRequestHandler):
+    api: FakeMondayAPI = None
+
+    def log_message(self, *args):
+        pass
+
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        try:
+            status, payload = 200, self.api.execute(body["query"], body.get("variables"))
+        except GraphQLError as e:
+            self.api.stats["errors"] += 1
+            status, payload = 200, {"errors": [{"message": str(e)}]}
+        except Exception as e:
+            self.api.stats["errors"] += 1
+            status, payload = 500, {"error_message": f"{type(e).__name__}: {e}"}
+        out = json.dumps(payload).encode()
+        self.api.stats["requests"] += 1
+        self.api.stats["bytes"] += len(out)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+
+def serve(api: FakeMondayAPI, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Starts the fake API on a background thread. The server's URL is http://host:server_port/v2."""
+    handler = type("BoundHandler", (Handler,), {"api": api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-monday", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--budget", type=int, default=5_000_000, help="complexity points per minute")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    api = FakeMondayAPI(SyntheticBoard(args.items, seed=args.seed), complexity_budget=args.budget,
+                        latency=args.latency)
+    server = serve(api, port=args.port)
+    print(f"fake monday API with {args.items} items on http://127.0.0.1:{server.server_port}/v2")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(api.stats))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
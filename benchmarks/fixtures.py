@@ -0,0 +1,80 @@
+"""
+Seeded local worklog fixture for offline benchmarks: a SQLite database with a worklog table
+shaped like app_v2's output plus the four mapping tables from local_db_update.
+"""
+import os
+import sys
+import random
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from column_config import COLUMN_CONFIG
+from local_db_update import COLUMN_RENAMES, COLUMN_DESCRIPTIONS, STATUS_MAP, JOB_TYPE_MAP
+
+
+CUSTOMERS = ["Brightview", "Yellowstone", "Gothic Landscape", "LandCare", "Acme Grounds", "Juniper", "Heritage"]
+PEOPLE = ["Ana", "Bilal", "Chen", "Dara", "Eli", "Fatima", "Goran", "Hui"]
+# Rough shape of the real board: most jobs end up delivered, a long tail of other statuses
+STATUS_WEIGHTS = {"Delivered": 60, "In Process": 8, "HOLD": 5, "Pending": 5, "Complete": 5, "PREP": 4,
+                  "CANCELLED": 4, "ISSUES": 3, "Uploaded": 3, "PROCESSED": 2, "Convo": 1}
+ANCHOR_DATE = datetime.date(2025, 6, 30)
+
+
+def make_worklog(n_items: int = 2000, seed: int = 7) -> pd.DataFrame:
+    """Builds a deterministic worklog DataFrame with app_v2's column names."""
+    rng = random.Random(seed)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    products = list(JOB_TYPE_MAP)
+    rows = []
+    for i in range(n_items):
+        received = ANCHOR_DATE - datetime.timedelta(days=rng.randint(0, 540))
+        due = received + datetime.timedelta(days=rng.randint(2, 14))
+        status = rng.choices(statuses, weights)[0]
+        delivered = due + datetime.timedelta(days=rng.randint(-3, 4)) if status == "Delivered" else None
+        row = {cfg["new_name"]: None for cfg in COLUMN_CONFIG.values()}
+        row.update({
+            "monday_item_id": 5_000_000_000 + i,
+            "job_name": f"{rng.choice(['Park', 'Plaza', 'HOA', 'Campus', 'Retail'])} {i:05d}",
+            "prep_team": rng.choice(PEOPLE),
+            "production_team": ", ".join(rng.sample(PEOPLE, 2)),
+            "reviewer_deliverer": rng.choice(PEOPLE),
+            "sender_name": rng.choice(PEOPLE),
+            "primary_status": status,
+            "product": rng.choice(products),
+            "due_date": due.isoformat(),
+            "customer_due_date": (due + datetime.timedelta(days=2)).isoformat(),
+            "customer_name": rng.choice(CUSTOMERS),
+            "received_date": received.isoformat(),
+            "delivered_date": delivered.isoformat() if delivered else None,
+            "completion_date": delivered.isoformat() if delivered else None,
+            "page_count_standard_mto": str(rng.randint(0, 40)),
+            "billing_status": rng.choice(["Billed", "Not Billed", "N/A"]),
+            "updated_at": f"{received.isoformat()}T12:00:00Z",
+        })
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def seed_database(url: str = "sqlite:///bench_fixture.db", n_items: int = 2000, seed: int = 7):
+    """Creates (or replaces) the fixture tables at `url` and returns an engine for it."""
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    df = make_worklog(n_items, seed)
+    df.to_sql("worklog", engine, if_exists="replace", index=False)
+    df[["monday_item_id", "job_name", "updated_at"]].rename(
+        columns={"monday_item_id": "item_id", "job_name": "item_name"}
+    ).assign(updated_at=lambda d: pd.to_datetime(d["updated_at"])).to_sql(
+        "worklog_index", engine, if_exists="replace", index=False)
+    for table, mapping, key_col, value_col in [
+        ("column_renames", COLUMN_RENAMES, "column_id", "friendly_name"),
+        ("column_descriptions", COLUMN_DESCRIPTIONS, "column_id", "description"),
+        ("status_map", STATUS_MAP, "status", "description"),
+        ("job_type_map", JOB_TYPE_MAP, "job_type", "description"),
+    ]:
+        pd.DataFrame({key_col: list(mapping), value_col: list(mapping.values())}).to_sql(
+            table, engine, if_exists="replace", index=False)
+    return engine
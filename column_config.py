@@ -0,0 +1,35 @@
+# --- Unified Configuration (Cleaner and Easier to Maintain) ---
+# Single source of truth for column renames and their purpose.
+# Columns of the main board (BOARD_ID) synced into worklog, shared by app_v2, app_v1 and local_db_update.
+COLUMN_CONFIG = {
+    'Job Name': {'new_name': "job_name", 'desc': "The name of the job"},
+    'multiple_person_mkqnhsnf': {'new_name': "prep_team", 'desc': "Team responsible for prepping the job"},
+    'multiple_person': {'new_name': "production_team", 'desc': "Team responsible for executing the project"},
+    "people": {'new_name': "reviewer_deliverer", 'desc': "Person responsible for final review & delivery"},
+    "text2": {'new_name': "sender_name", 'desc': "Name of customer who submitted the project"},
+    "color56": {'new_name': "primary_status", 'desc': "Primary current status of the project"},
+    'color': {'new_name': "product", 'desc': "The product category"},
+    'date': {'new_name': "due_date", 'desc': "The internal due date for the project"},
+    'long_text_mkqwc9v8': {'new_name': "upload_notes", 'desc': "Notes from the upload process"},
+    'date_mkq9h641': {'new_name': "customer_due_date", 'desc': "The actual due date requested by the customer"},
+    'dropdown35': {'new_name': "scope_of_work", 'desc': "The defined scope of work for the project"},
+    'email': {'new_name': "sender_email", 'desc': "Email address of the person who submitted the project"},
+    'date9': {'new_name': "completion_date", 'desc': "Date the project was marked as complete"},
+    'text0': {'new_name': "customer_name", 'desc': "The name of the customer"},
+    'date46': {'new_name': "delivered_date", 'desc': "Date the project was delivered to the customer"},
+    'date4': {'new_name': "received_date", 'desc': "Date the project was received"},
+    'numeric': {'new_name': "page_count_standard_mto", 'desc': "Standard MTO page counts"},
+    'numeric8': {'new_name': "page_count_maintenance", 'desc': "Maintenance page count"},
+    'numeric4': {'new_name': "page_count_building_trades", 'desc': "Building trades page count"},
+    'numeric2': {'new_name': "page_count_irrigation_bid", 'desc': "Irrigation bid design page count"},
+    'numeric21': {'new_name': "page_count_irrigation_full", 'desc': "Irrigation full design page counts"},
+    'numeric7': {'new_name': "page_count_other_misc", 'desc': "Other/misc page counts"},
+    'numbers': {'new_name': "page_count_surcharge", 'desc': "Additional surcharge page counts"},
+    'numeric0': {'new_name': "page_count_trial", 'desc': "Trial page counts"},
+    'color8': {'new_name': "billing_status", 'desc': "The current billing status"},
+    'link': {'new_name': "completed_files_url", 'desc': "Dropbox URL for completed files"},
+    'item_id': {'new_name': "monday_item_id", 'desc': "The unique item ID from Monday.com"}
+}
+# Board column ids actually requested from Monday ('Job Name' and 'item_id' are item fields, not columns)
+SYNC_COLUMN_IDS = [column_id for column_id in COLUMN_CONFIG if column_id not in ("Job Name", "item_id")]
+WORKLOG_COLUMNS = ["monday_item_id", "job_name", "updated_at"] + [COLUMN_CONFIG[c]['new_name'] for c in SYNC_COLUMN_IDS]
@@ -0,0 +1,27 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+
+class ScriptedChatModel(FakeListChatModel):
+    """
+    FakeListChatModel that pays its simulated latency once per call. The stock model sleeps per
+    streamed character, and the SQL agent streams, so its latency would scale with response length.
+    """
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content=self._call(messages, stop=stop, **kwargs)))
+
+
+def react_script(sql: str, final_answer: str) -> list[str]:
+    """ReAct completions for a one-query agent run: run `sql`, then answer."""
+    return [
+        f"Thought: I can answer this with a single query.\nAction: sql_db_query\nAction Input: {sql}",
+        f"Thought: I now know the final answer\nFinal Answer: {final_answer}",
+    ]
+
+
+def fake_sql_llm(sql: str = "SELECT COUNT(*) FROM worklog", final_answer: str = "Done.",
+                 latency: float = 0.0) -> ScriptedChatModel:
+    """Stand-in for Gemini in load tests: every question costs two LLM calls of `latency` seconds and one real query."""
+    return ScriptedChatModel(responses=react_script(sql, final_answer), sleep=latency or None)
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import math
+import datetime
+import threading
+from collections import Counter
+
+import numpy as np
+
+from answer_cache import normalize_question
+
+
+FEWSHOT_PATH = os.getenv("FEWSHOT_PATH", ".fewshot_examples.json")
+WORD = re.compile(r"[a-z0-9_]+")
+
+
+def question_terms(question: str) -> Counter:
+    """Word unigrams and bigrams plus character trigrams inside words, so 'delivered'/'delivery' still overlap."""
+    words = WORD.findall(normalize_question(question))
+    terms = Counter(words)
+    terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for w in words:
+        padded = f" {w} "
+        terms.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return terms
+
+
+class FewShotIndex:
+    """
+    Local TF-IDF index of (question, SQL) pairs the agent has answered successfully.
+    Pairs are persisted as JSON at `path`; the term matrix is rebuilt in NumPy on load and
+    whenever new pairs arrive, which is cheap at the few-thousand-examples scale this holds.
+    """
+
+    def __init__(self, path: str | None = FEWSHOT_PATH, k: int = 3, min_score: float = 0.35,
+                 max_examples: int = 2000):
+        self.path = path
+        self.k = k
+        self.min_score = min_score
+        self.max_examples = max_examples
+        self._examples = []
+        self._matrix = None
+        self._vocab = {}
+        self._idf = None
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._examples = json.load(f)
+
+
+    @classmethod
+    def from_env(cls) -> "FewShotIndex | None":
+        """FEWSHOT_PATH=off disables the index."""
+        if FEWSHOT_PATH == "off":
+            return None
+        return cls(FEWSHOT_PATH, k=int(os.getenv("FEWSHOT_K", 3)),
+                   min_score=float(os.getenv("FEWSHOT_MIN_SCORE", 0.35)))
+
+
+    def _vectorize(self, terms: Counter) -> np.ndarray:
+        vec = np.zeros(len(self._vocab))
+        for term, count in terms.items():
+            col = self._vocab.get(term)
+            if col is not None:
+                vec[col] = (1 + math.log(count)) * self._idf[col]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+    def _build(self) -> None:
+        docs = [question_terms(e["question"]) for e in self._examples]
+        df = Counter(term for doc in docs for term in doc)
+        self._vocab = {term: i for i, term in enumerate(df)}
+        self._idf = np.array([math.log((1 + len(docs)) / (1 + n)) + 1 for n in df.values()])
+        self._matrix = np.vstack([self._vectorize(doc) for doc in docs]) if docs else None
+
+
+    def search(self, question: str, k: int | None = None) -> list[tuple[float, dict]]:
+        """Returns up to k (score, example) pairs with cosine similarity at or above min_score, best first."""
+        with self._lock:
+            if not self._examples:
+                return []
+            if self._matrix is None:
+                self._build()
+            scores = self._matrix @ self._vectorize(question_terms(question))
+            best = np.argsort(-scores)[:k or self.k]
+            return [(float(scores[i]), self._examples[i]) for i in best if scores[i] >= self.min_score]
+
+
+    def add(self, question: str, sql_query: str) -> None:
+        """Stores a successful pair. A repeat of a known question replaces its SQL."""
+        key = normalize_question(question)
+        with self._lock:
+            self._examples = [e for e in self._examples if normalize_question(e["question"]) != key]
+            self._examples.append({"question": question.strip(), "sql": sql_query.strip(),
+                                   "added_at": datetime.datetime.now().isoformat(timespec="seconds")})
+            # Oldest examples go first once the index is full
+            del self._examples[:-self.max_examples]
+            self._matrix = None
+            self._save()
+
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._examples, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+    @staticmethod
+    def as_prompt(hits: list[tuple[float, dict]]) -> str:
+        """Formats search() hits as a block to put in front of the question ("" if there are none)."""
+        if not hits:
+            return ""
+        lines = ["Similar questions that were answered correctly before. If one matches, adapt its SQL "
+                 "and check it with sql_db_query instead of exploring the schema again:"]
+        for _, example in hits:
+            lines.append(f"Q: {example['question']}\nSQL: {example['sql']}")
+        return "\n\n".join(lines) + "\n\nNow answer this question: "
+
+
+    def __len__(self) -> int:
+        return len(self._examples)
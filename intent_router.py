@@ -0,0 +1,156 @@
+import re
+import datetime
+from collections import namedtuple
+
+from sqlalchemy import text, inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+from answer_cache import normalize_question
+
+
+RoutedAnswer = namedtuple("RoutedAnswer", ["answer", "sql_query", "intent"])
+
+# worklog column names as written by app_v2 (column_config.COLUMN_CONFIG new_name values)
+STATUS_COL = "primary_status"
+CUSTOMER_COL = "customer_name"
+RECEIVED_COL = "received_date"
+JOB_NAME_COL = "job_name"
+
+MAX_LISTED_ROWS = 25
+
+
+def period_bounds(period: str, today: datetime.date | None = None) -> tuple[datetime.date, datetime.date]:
+    """Returns [start, end) dates for a named period relative to today."""
+    today = today or datetime.date.today()
+    if period == "today":
+        return today, today + datetime.timedelta(days=1)
+    if period == "this week":
+        start = today - datetime.timedelta(days=today.weekday())
+        return start, start + datetime.timedelta(days=7)
+    if period == "this month":
+        start = today.replace(day=1)
+        return start, (start + datetime.timedelta(days=32)).replace(day=1)
+    if period == "last month":
+        end = today.replace(day=1)
+        return (end - datetime.timedelta(days=1)).replace(day=1), end
+    if period == "this year":
+        return today.replace(month=1, day=1), today.replace(year=today.year + 1, month=1, day=1)
+    raise ValueError(f"Unknown period: {period}")
+
+
+class IntentRouter:
+    """
+    Matches common templated questions against parameterized SQL and answers them directly,
+    without the LLM. Anything it does not recognise returns None and falls through to the agent.
+    Statuses and job types are validated against the in-memory MappingStore so a near miss
+    never produces a confidently wrong count. Intents whose worklog columns are missing (a
+    local_db_update reload names them by Monday title) are turned off at startup, and a query
+    that fails anyway also falls through to the agent.
+    """
+
+    PERIODS = r"today|this week|this month|last month|this year"
+
+    def __init__(self, engine, mapping_store):
+        self.engine = engine
+        self.mappings = mapping_store
+        # (pattern, handler, worklog columns its SQL reads)
+        intents = [
+            (re.compile(r"^what does (?:the )?(?:status |job type |product )?['\"]?(?P<code>.+?)['\"]? mean$"),
+             self._explain_code, ()),
+            (re.compile(r"^how many (?:jobs|projects|items) (?:are |were )?(?:there )?(?:by|per) status$"),
+             self._count_by_status, (STATUS_COL,)),
+            (re.compile(r"^how many (?:jobs|projects|items) (?:are |were )?(?:there )?(?:in |with status |marked |on )?"
+                        r"['\"]?(?P<status>.+?)['\"]?(?: status)?$"),
+             self._count_in_status, (STATUS_COL,)),
+            (re.compile(r"^(?:list |show |show me |get )?(?:all )?(?:the )?(?:jobs|projects) (?:for|from) (?:customer )?"
+                        rf"(?P<customer>.+?) (?P<period>{self.PERIODS})$"),
+             self._customer_jobs, (JOB_NAME_COL, STATUS_COL, RECEIVED_COL, CUSTOMER_COL)),
+        ]
+        columns = self._worklog_columns()
+        self.intents = [(pattern, handler) for pattern, handler, needed in intents if set(needed) <= columns]
+        disabled = [handler.__name__.lstrip("_") for _, handler, needed in intents if not set(needed) <= columns]
+        if disabled:
+            missing = sorted({c for _, _, needed in intents for c in needed} - columns)
+            print(f"⚠️ worklog has no {', '.join(missing)} column; {', '.join(disabled)} questions go to the agent.")
+
+
+    def _worklog_columns(self) -> set:
+        try:
+            return {c["name"] for c in inspect(self.engine).get_columns("worklog")}
+        except SQLAlchemyError:
+            return set()
+
+
+    def route(self, question: str) -> RoutedAnswer | None:
+        q = normalize_question(question)
+        for pattern, handler in self.intents:
+            match = pattern.match(q)
+            if match:
+                try:
+                    routed = handler(**match.groupdict())
+                except SQLAlchemyError as e:
+                    # e.g. worklog reloaded with different columns since startup; the agent can still answer
+                    print(f"⚠️ Intent {handler.__name__.lstrip('_')} failed, passing the question to the agent: {e}")
+                    continue
+                if routed is not None:
+                    return routed
+        return None
+
+
+    def _resolve(self, table: str, value: str) -> str | None:
+        """Case-insensitive match of a user-typed code against a mapping table's keys."""
+        for key in self.mappings.get(table):
+            if key.lower() == value.lower():
+                return key
+        return None
+
+
+    def _explain_code(self, code):
+        for table, label in (("status_map", "Status"), ("job_type_map", "Job type")):
+            key = self._resolve(table, code)
+            if key:
+                return RoutedAnswer(f"{label} '{key}': {self.mappings.get(table)[key]}", None, "explain_code")
+        return None
+
+
+    def _count_in_status(self, status):
+        key = self._resolve("status_map", status)
+        if key is None:
+            return None
+        sql = f"SELECT COUNT(*) FROM worklog WHERE {STATUS_COL} = :status"
+        with self.engine.connect() as conn:
+            count = conn.execute(text(sql), {"status": key}).scalar()
+        return RoutedAnswer(f"There are {count} jobs with status '{key}'.",
+                            sql.replace(":status", f"'{key}'"), "count_in_status")
+
+
+    def _count_by_status(self):
+        sql = (f"SELECT {STATUS_COL}, COUNT(*) AS jobs FROM worklog "
+               f"GROUP BY {STATUS_COL} ORDER BY jobs DESC")
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(sql)).fetchall()
+        lines = [f"{status or '(no status)'}: {n}" for status, n in rows]
+        return RoutedAnswer("Jobs by status:\n" + "\n".join(lines), sql, "count_by_status")
+
+
+    def _customer_jobs(self, customer, period):
+        start, end = period_bounds(period)
+        # received_date holds Monday's date text (YYYY-MM-DD), so string comparison orders correctly
+        sql = (f"SELECT {JOB_NAME_COL}, {STATUS_COL}, {RECEIVED_COL} FROM worklog "
+               f"WHERE LOWER({CUSTOMER_COL}) = :customer "
+               f"AND {RECEIVED_COL} >= :start AND {RECEIVED_COL} < :end "
+               f"ORDER BY {RECEIVED_COL}")
+        params = {"customer": customer.lower(), "start": start.isoformat(), "end": end.isoformat()}
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(sql), params).fetchall()
+
+        shown_sql = sql
+        for k, v in params.items():
+            shown_sql = shown_sql.replace(f":{k}", f"'{v}'")
+        if not rows:
+            return RoutedAnswer(f"No jobs found for customer '{customer}' {period}.", shown_sql, "customer_jobs")
+        lines = [f"- {name} ({status}, received {received})" for name, status, received in rows[:MAX_LISTED_ROWS]]
+        if len(rows) > MAX_LISTED_ROWS:
+            lines.append(f"... and {len(rows) - MAX_LISTED_ROWS} more")
+        return RoutedAnswer(f"{len(rows)} jobs for customer '{customer}' {period}:\n" + "\n".join(lines),
+                            shown_sql, "customer_jobs")
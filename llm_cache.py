@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Sequence
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+
+LLM_CACHE_MODES = ("off", "record", "replay")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded completion."""
+
+
+def tool_schema_hash(tools: Sequence) -> str:
+    """Hashes tool names, descriptions and argument schemas so a tool change invalidates recorded completions."""
+    schema = []
+    for tool in sorted(tools, key=lambda t: t.name):
+        schema.append([tool.name, tool.description, tool.args])
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent record/replay cache for LLM calls, keyed on the model configuration
+    (LangChain's llm_string), the serialized prompt and the agent's tool schema.
+
+    mode="record" looks up first and stores every new completion.
+    mode="replay" never lets a call reach the network: a miss raises LLMCacheMiss.
+    """
+
+    def __init__(self, path: str = ".llm_cache.sqlite", mode: str = "record",
+                 ttl_seconds: float | None = 7 * 24 * 3600, max_entries: int = 5000,
+                 tool_schema: str = ""):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported LLM cache mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.tool_schema = tool_schema
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    llm_string TEXT,
+                    return_val TEXT,
+                    created_at REAL,
+                    last_used REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256("\x1f".join([llm_string, prompt, self.tool_schema]).encode()).hexdigest()
+
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT return_val, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds and self.mode == "record":
+                # Expired entries are only dropped while recording; replay keeps fixtures stable
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row:
+                with self._conn:
+                    self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+
+        if row:
+            return loads(row[0])
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No recorded completion for prompt (key {key[:12]}) in {self.path}")
+        return None
+
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode == "replay":
+            return
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, return_val, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, llm_string, dumps(return_val), now, now),
+            )
+            self._evict(now)
+
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+
+
+    def clear(self, **kwargs) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
+
+
+def llm_cache_from_env() -> SQLiteLLMCache | None:
+    """Builds the LLM cache from LLM_CACHE_MODE / LLM_CACHE_PATH / LLM_CACHE_TTL / LLM_CACHE_SIZE. Returns None when off."""
+    mode = os.getenv("LLM_CACHE_MODE", "record").lower()
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"LLM_CACHE_MODE must be one of {LLM_CACHE_MODES}, got {mode!r}")
+    if mode == "off":
+        return None
+    return SQLiteLLMCache(
+        path=os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite"),
+        mode=mode,
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600)),
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", 5000)),
+    )
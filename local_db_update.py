@@ -1,5 +1,5 @@
-import requests
 import os
+import argparse
 import json
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, Engine, text
@@ -9,6 +9,11 @@ from rich.console import Console
 from rich.syntax import Syntax
 from sqlalchemy import create_engine, Engine
 from time import sleep
+from sync_state import bump_sync_version
+from monday_client import post_graphql, item_rows
+from sync_metrics import SyncMetrics
+from profiling import Profiler
+from replica import replica_from_env
 
 load_dotenv()
 
@@ -173,7 +178,7 @@ def create_metadata_tables(engine):
         """))
 
 def upsert_dict_to_table(engine, table_name, mapping, key_col, value_col):
-    with engine.connect() as conn:
+    with engine.begin() as conn:
         for key, value in mapping.items():
             conn.execute(
                 text(f"""
@@ -186,7 +191,7 @@ def upsert_dict_to_table(engine, table_name, mapping, key_col, value_col):
 
 
 
-def fetch_column_mapping(board_id):
+def fetch_column_mapping(board_id, metrics=None):
     query = f"""
         {{
           boards(ids: {board_id}) {{
@@ -197,13 +202,19 @@ def fetch_column_mapping(board_id):
           }}
         }}
         """
-    response = requests.post("https://api.monday.com/v2", headers=headers, json={"query": query})
-    data = response.json()
+    data = post_graphql(query, headers, metrics=metrics)
     return {col["id"]: col["title"] for col in data["data"]["boards"][0]["columns"]}
 
 
 #  step 2 - fetch all items w pagination
-def fetch_all_items(board_id, column_mapping):
+def fetch_all_items(board_id, column_mapping, metrics=None):
+    """
+    Every column of the board, named by its title. Unlike the incremental syncs this is not limited
+    to column_config.SYNC_COLUMN_IDS: the full reload keeps storing the columns the agent's mapping
+    tables describe (invoice type, client team, customer address, time tracking, files, ...).
+    """
+    metrics = metrics or SyncMetrics("local_db_update", metrics_dir=None)
+    column_ids = list(column_mapping)
     all_rows = []
     cursor = None
 
@@ -225,11 +236,8 @@ def fetch_all_items(board_id, column_mapping):
           }}
         }}
         """
-        response = requests.post("https://api.monday.com/v2", headers=headers, json={"query": query})
-        if response.status_code != 200:
-            raise Exception(f"Request failed: {response.status_code}, {response.text}")
-
-        data = response.json()
+        with metrics.stage("fetch"):
+            data = post_graphql(query, headers, metrics=metrics)
         items_page = data["data"]["boards"][0]["items_page"]
         items = items_page["items"]
         cursor = items_page["cursor"]
@@ -237,12 +245,10 @@ def fetch_all_items(board_id, column_mapping):
         if not items:
             break
 
-        for item in items:
-            row = {"Job Name": item["name"]}
-            for col in item["column_values"]:
-                title = column_mapping.get(col["id"], col["id"])
-                row[title] = col["text"]
-            all_rows.append(row)
+        with metrics.stage("decode"):
+            all_rows.extend(item_rows(items, column_ids, fields=("name",)))
+            metrics.add(items=len(items))
+            metrics.add("fetch", items=len(items))
 
         print(f"Fetched {len(items)} items...")
         if not cursor:
@@ -250,18 +256,21 @@ def fetch_all_items(board_id, column_mapping):
 
         sleep(DELAY)
 
-    return pd.DataFrame(all_rows)
+    with metrics.stage("decode"):
+        columns = ["Job Name"] + [column_mapping[c] for c in column_ids]
+        return pd.DataFrame.from_records(all_rows, columns=columns)
 
 
-def save_df_to_postgres(df):
-    db = os.getenv("POSTGRES_DB")
-    user = os.getenv("POSTGRES_USER")
-    password = os.getenv("POSTGRES_PASSWORD")
-    host = os.getenv("POSTGRES_HOST")
-    port = os.getenv("POSTGRES_PORT", "5432")
-
-    engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{db}')
+def save_df_to_postgres(df, engine=None):
+    if engine is None:
+        db = os.getenv("POSTGRES_DB")
+        user = os.getenv("POSTGRES_USER")
+        password = os.getenv("POSTGRES_PASSWORD")
+        host = os.getenv("POSTGRES_HOST")
+        port = os.getenv("POSTGRES_PORT", "5432")
+        engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{db}')
     df.to_sql('worklog', engine, if_exists='replace', index=False)
+    bump_sync_version(engine, "worklog")
     print("dataframe saved to postgreSQL successfully!")
 
 
@@ -277,6 +286,10 @@ def main_postgres():
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Full Monday.com -> Postgres reload plus the mapping tables.")
+    parser.add_argument("--profile", action="store_true", help="write CPU and per-stage memory profiles to PROFILE_DIR")
+    args = parser.parse_args()
+
     # 1. Create your DB engine (using your env variables)
     db = os.getenv("POSTGRES_DB")
     user = os.getenv("POSTGRES_USER")
@@ -285,23 +298,41 @@ def main():
     port = os.getenv("POSTGRES_PORT", "5432")
     engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{db}')
 
-    # 2. Create metadata tables
-    create_metadata_tables(engine)
-
-    # 3. Upsert mapping dictionaries into tables
-    upsert_dict_to_table(engine, 'column_renames', COLUMN_RENAMES, "column_id", "friendly_name")
-    upsert_dict_to_table(engine, 'column_descriptions', COLUMN_DESCRIPTIONS, "column_id", "description")
-    upsert_dict_to_table(engine, 'status_map', STATUS_MAP, "status", "description")
-    upsert_dict_to_table(engine, 'job_type_map', JOB_TYPE_MAP, "job_type", "description")
-
-    # 4. Fetch and upload your Monday.com data as usual
-    print("🔗 Fetching column mapping...")
-    column_mapping = fetch_column_mapping(BOARD_ID)
-
-    print("📥 Fetching all worklog items from Monday.com...")
-    df = fetch_all_items(BOARD_ID, column_mapping)
-
-    save_df_to_postgres(df)
+    with Profiler("local_db_update", enabled=args.profile) as profiler, \
+            SyncMetrics("local_db_update", profiler=profiler) as metrics:
+        # 2. Create metadata tables
+        create_metadata_tables(engine)
+
+        # 3. Upsert mapping dictionaries into tables
+        with metrics.stage("mapping_upsert"):
+            upsert_dict_to_table(engine, 'column_renames', COLUMN_RENAMES, "column_id", "friendly_name")
+            upsert_dict_to_table(engine, 'column_descriptions', COLUMN_DESCRIPTIONS, "column_id", "description")
+            upsert_dict_to_table(engine, 'status_map', STATUS_MAP, "status", "description")
+            upsert_dict_to_table(engine, 'job_type_map', JOB_TYPE_MAP, "job_type", "description")
+            bump_sync_version(engine, "mappings")
+            metrics.add(items=len(COLUMN_RENAMES) + len(COLUMN_DESCRIPTIONS) + len(STATUS_MAP) + len(JOB_TYPE_MAP))
+
+        # 4. Fetch and upload your Monday.com data as usual
+        print("🔗 Fetching column mapping...")
+        with metrics.stage("column_mapping"):
+            column_mapping = fetch_column_mapping(BOARD_ID, metrics=metrics)
+
+        print("📥 Fetching all worklog items from Monday.com...")
+        df = fetch_all_items(BOARD_ID, column_mapping, metrics=metrics)
+
+        with metrics.stage("db_write"):
+            save_df_to_postgres(df, engine)
+            metrics.add(items=len(df))
+
+        # 5. Mirror the reload into the columnar replica, if there is one
+        replica = replica_from_env()
+        if replica is not None:
+            print("🦆 Rebuilding the columnar replica...")
+            with metrics.stage("replica_write"):
+                replica.replace("worklog", df)
+                replica.rebuild_from(engine, ["column_renames", "column_descriptions", "status_map", "job_type_map"])
+                bump_sync_version(engine, "replica")
+                metrics.add(items=len(df))
     print("great success motherfuckers!!!!!")
 
 
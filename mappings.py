@@ -0,0 +1,111 @@
+import time
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from sync_state import get_sync_version
+
+
+# table -> (key column, value column), as created by local_db_update.create_metadata_tables
+MAPPING_TABLES = {
+    "status_map": ("status", "description"),
+    "job_type_map": ("job_type", "description"),
+    "column_renames": ("column_id", "friendly_name"),
+    "column_descriptions": ("column_id", "description"),
+}
+
+
+class MappingStore:
+    """
+    In-memory copy of the four mapping tables, versioned by the "mappings" sync_state counter.
+    The version is checked at most every `check_interval` seconds and the tables are only
+    reloaded when local_db_update has bumped it.
+    """
+
+    def __init__(self, engine, check_interval: float = 60.0):
+        self.engine = engine
+        self.check_interval = check_interval
+        self.version = None
+        self._maps = {table: {} for table in MAPPING_TABLES}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads the mapping tables if their version changed. Returns True if a reload happened."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            version = get_sync_version(self.engine, "mappings")
+            if not force and version == self.version:
+                return False
+            maps = {}
+            with self.engine.connect() as conn:
+                for table, (key_col, value_col) in MAPPING_TABLES.items():
+                    try:
+                        rows = conn.execute(text(f"SELECT {key_col}, {value_col} FROM {table}")).fetchall()
+                    except SQLAlchemyError:
+                        conn.rollback()
+                        rows = []
+                    maps[table] = {str(k): v for k, v in rows}
+            self._maps = maps
+            self.version = version
+            return True
+
+
+    def get(self, table: str) -> dict:
+        self.refresh()
+        return self._maps[table]
+
+
+    def lookup(self, query: str) -> str:
+        """
+        Tool entry point. Accepts 'HOLD' or 'status_map: HOLD'; matching is case-insensitive.
+        An empty key after a table name lists the whole table.
+        """
+        self.refresh()
+        query = query.strip().strip("'\"")
+        tables = list(MAPPING_TABLES)
+        if ":" in query and query.split(":", 1)[0].strip() in MAPPING_TABLES:
+            table, query = (part.strip() for part in query.split(":", 1))
+            tables = [table]
+
+        if not query:
+            return "\n".join(f"{k}: {v}" for k, v in self._maps[tables[0]].items())
+
+        hits = []
+        for table in tables:
+            for key, value in self._maps[table].items():
+                if key.lower() == query.lower():
+                    hits.append(f"{table}[{key}] = {value}")
+        if not hits:
+            return f"No mapping found for '{query}'. Known tables: {', '.join(MAPPING_TABLES)}."
+        return "\n".join(hits)
+
+
+    def as_prompt_context(self) -> str:
+        """Inlines the status and job type maps, the two the agent is asked to translate most often."""
+        self.refresh()
+        lines = ["Status meanings (status_map):"]
+        lines += [f"  {k}: {v}" for k, v in self._maps["status_map"].items()]
+        lines.append("Job type / product meanings (job_type_map):")
+        lines += [f"  {k}: {v}" for k, v in self._maps["job_type_map"].items()]
+        return "\n".join(lines)
+
+
+    def as_tool(self):
+        from langchain_core.tools import Tool  # slow to import, and only setup_agent needs it
+
+        return Tool(
+            name="mapping_lookup",
+            func=self.lookup,
+            description=(
+                "Look up the meaning of a status, job type or column id without querying the database. "
+                "Input is the code to explain, optionally prefixed with the table, e.g. 'status_map: HOLD' "
+                "or 'column_renames: color56'. Use 'status_map:' alone to list every status."
+            ),
+        )
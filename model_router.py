@@ -0,0 +1,134 @@
+import os
+import re
+import time
+from collections import namedtuple
+
+from utils import setup_agent, get_result
+from mappings import MappingStore
+from answer_cache import normalize_question
+
+
+FAST_MODEL = os.getenv("AGENT_FAST_MODEL", "gemini-2.0-flash-lite")
+STRONG_MODEL = os.getenv("AGENT_STRONG_MODEL", "gemini-2.0-flash-exp")
+
+Complexity = namedtuple("Complexity", ["score", "reasons"])
+
+# Phrasings that usually mean grouping, several tables or multi-step reasoning
+COMPLEX_PATTERNS = [
+    (r"\b(compare|comparison|versus|vs)\b", 2, "comparison"),
+    (r"\b(trend|over time|growth|month over month|year over year)\b", 2, "trend"),
+    (r"\b(ratio|percentage|percent|share|proportion|rate)\b", 2, "ratio"),
+    (r"\b(per|each|by)\s+(customer|product|month|week|year|status|type|job type)\b", 1, "grouping"),
+    (r"\b(average|avg|median|mean|sum|total)\b", 1, "aggregate"),
+    (r"\b(top|most|least|highest|lowest|rank)\b", 1, "ranking"),
+    (r"\b(between|after|before|since|late|overdue)\b", 1, "date logic"),
+    (r"\b(why|explain|correlat\w*)\b", 2, "reasoning"),
+]
+
+
+def complexity_score(question: str) -> Complexity:
+    """Cheap heuristic score of how hard a question is for the agent. 0 is a single-table lookup or count."""
+    q = normalize_question(question)
+    score, reasons = 0, []
+    for pattern, weight, reason in COMPLEX_PATTERNS:
+        if re.search(pattern, q):
+            score += weight
+            reasons.append(reason)
+    conjunctions = len(re.findall(r"\b(and|or|but|also|then)\b", q))
+    if conjunctions:
+        score += conjunctions
+        reasons.append(f"{conjunctions} clauses")
+    if len(q.split()) > 20:
+        score += 1
+        reasons.append("long question")
+    return Complexity(score, reasons)
+
+
+def failure_reason(answer, query_logger) -> str | None:
+    """Why an agent run should be retried on the strong tier, or None if it looks fine."""
+    if answer is None:
+        return "no answer"
+    if answer.startswith("Agent stopped"):
+        return "iteration or time limit"
+    sql_spans = [s for s in query_logger.spans if s["type"] == "tool" and s["name"] == "sql_db_query"]
+    if sql_spans and sql_spans[-1].get("error"):
+        return "sql error"
+    return None
+
+
+class TieredAgent:
+    """
+    Two agents over the same engine: a fast, cheap model for simple questions and a stronger one
+    for complex questions and for anything the fast tier fails on (exception, no answer, hit the
+    iteration limit, or its last query errored). Every routing decision is printed and recorded in
+    the question's trace, and per-tier call counts and latency are kept in `stats`.
+    """
+
+    def __init__(self, engine, fast_llm=None, strong_llm=None, max_fast_complexity: int | None = None,
+                 mapping_store=None, verbose: bool = False, **setup_kwargs):
+        """fast_llm / strong_llm replace the Gemini models (e.g. stub models in tests)."""
+        if max_fast_complexity is None:
+            max_fast_complexity = int(os.getenv("AGENT_FAST_MAX_COMPLEXITY", 2))
+        self.max_fast_complexity = max_fast_complexity
+        self.mapping_store = mapping_store or MappingStore(engine)
+        self.tiers = {}
+        for tier, model, llm in (("fast", FAST_MODEL, fast_llm), ("strong", STRONG_MODEL, strong_llm)):
+            agent_executor, query_logger = setup_agent(engine, mapping_store=self.mapping_store, llm=llm,
+                                                       model=model, verbose=verbose, **setup_kwargs)
+            self.tiers[tier] = (model if llm is None else type(llm).__name__, agent_executor, query_logger)
+        self.stats = {tier: {"calls": 0, "failures": 0, "seconds": 0.0} for tier in self.tiers}
+        self.escalations = 0
+        self.last_logger = None
+
+
+    def choose_tier(self, question: str) -> tuple[str, Complexity]:
+        complexity = complexity_score(question)
+        return ("fast" if complexity.score <= self.max_fast_complexity else "strong"), complexity
+
+
+    def _run(self, tier: str, question: str, fields: dict, **kwargs) -> tuple:
+        model, agent_executor, query_logger = self.tiers[tier]
+        fields = {**fields, "tier": tier, "model": model}
+        start = time.perf_counter()
+        try:
+            result = get_result(question, agent_executor, query_logger, trace_fields=fields, **kwargs)
+            reason = failure_reason(result[0], query_logger)
+        except Exception as e:
+            result, reason = None, f"exception: {e}"
+        seconds = time.perf_counter() - start
+        self.stats[tier]["calls"] += 1
+        self.stats[tier]["seconds"] += seconds
+        if reason:
+            self.stats[tier]["failures"] += 1
+        self.last_logger = query_logger
+        print(f"[model router] {tier} ({model}) {seconds:.2f}s" + (f", failed: {reason}" if reason else ""))
+        return result, reason
+
+
+    def ask(self, question: str, cache=None, router=None, fewshot=None) -> tuple:
+        """Same contract as get_result: returns (answer, sql_query, export_path)."""
+        tier, complexity = self.choose_tier(question)
+        print(f"[model router] complexity {complexity.score} ({', '.join(complexity.reasons) or 'simple'}) -> {tier}")
+        fields = {"complexity": complexity.score}
+        result, reason = self._run(tier, question, fields, cache=cache, router=router, fewshot=fewshot)
+        if reason and cache is not None:
+            # get_result cached the answer before we could judge it; only accepted answers stay cached
+            cache.discard(question)
+        if reason and tier == "fast":
+            self.escalations += 1
+            result, reason = self._run("strong", question, {**fields, "escalated_from": "fast",
+                                                            "escalation_reason": reason},
+                                       cache=None, router=None, fewshot=fewshot)
+            if cache is not None and not reason:
+                cache.put(question, cache.data_version(), *result)
+        if result is None:
+            raise RuntimeError(f"agent failed on both tiers: {reason}")
+        return result
+
+
+    def summary(self) -> str:
+        parts = []
+        for tier, s in self.stats.items():
+            avg = s["seconds"] / s["calls"] if s["calls"] else 0
+            parts.append(f"{tier}: {s['calls']} calls, {s['failures']} failed, avg {avg:.2f}s")
+        return "; ".join(parts) + f"; {self.escalations} escalations"
@@ -0,0 +1,258 @@
+import os
+import re
+import json
+import time
+import threading
+
+import requests
+
+try:
+    import orjson  # several times faster than json on 500-item pages
+except ImportError:
+    orjson = None
+
+
+MONDAY_API_URL = os.getenv("MONDAY_API_URL", "https://api.monday.com/v2")
+MAX_RETRIES = int(os.getenv("MONDAY_MAX_RETRIES", 3))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+COMPLEXITY_ERROR = re.compile(r"complexity budget exhausted", re.IGNORECASE)
+RESET_IN = re.compile(r"reset in (\d+) seconds")
+PRUNE_COLUMNS = os.getenv("MONDAY_PRUNE_COLUMNS", "1") != "0"
+# monday rejects any single query costing more than 5M complexity points
+MAX_QUERY_COMPLEXITY = int(os.getenv("MONDAY_MAX_QUERY_COMPLEXITY", 5_000_000))
+MAX_BATCH_FIELDS = int(os.getenv("MONDAY_MAX_BATCH_FIELDS", 20))
+ITEMS_BY_ID_LIMIT = 100  # ids accepted by one items(ids:) field
+# Complexity points per minute for the whole account, shared by concurrent syncs
+COMPLEXITY_BUDGET = int(os.getenv("MONDAY_COMPLEXITY_BUDGET", 10_000_000))
+
+
+class RateBudget:
+    """
+    monday's per-minute complexity budget, shared by every thread posting through post_graphql,
+    so boards synced concurrently pace themselves against one budget rather than each running
+    into the limit. A request waits while the points used this minute plus its estimate would
+    exceed `per_minute`, or while a rate-limit response has paused everyone.
+    """
+
+    def __init__(self, per_minute: int = COMPLEXITY_BUDGET):
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._used = 0
+        self._paused_until = 0.0
+        self.waited = 0.0
+
+
+    def acquire(self, estimate: int = 0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now - self._window_start >= 60:
+                    self._window_start, self._used = now, 0
+                wait = self._paused_until - now
+                if wait <= 0:
+                    # A lone request over the whole budget still goes; monday decides
+                    if self._used == 0 or self._used + estimate <= self.per_minute:
+                        self._used += estimate
+                        return
+                    wait = 60 - (now - self._window_start)
+                self.waited += wait
+            time.sleep(wait)
+
+
+    def record(self, used: int, estimate: int = 0) -> None:
+        """Replaces a request's estimate with what monday reported it cost."""
+        with self._lock:
+            self._used = max(0, self._used + used - estimate)
+
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+RATE_BUDGET = RateBudget()
+
+
+def with_complexity(query: str) -> str:
+    """Adds monday's `complexity { query }` field to the top level of a query so its cost is reported."""
+    i = query.index("{")
+    return f"{query[:i + 1]} complexity {{ query }} {query[i + 1:]}"
+
+
+def column_values_field(column_ids, fields=("id", "text")) -> str:
+    """
+    The `column_values` selection for an item, limited to `column_ids` with monday's `ids:` argument.
+    Columns we don't store (files, mirrors, formulas) then cost neither payload nor complexity.
+    MONDAY_PRUNE_COLUMNS=0 requests every column again, e.g. to measure what pruning saves.
+    """
+    args = f"(ids: {json.dumps(list(column_ids))})" if PRUNE_COLUMNS else ""
+    return f"column_values{args} {{ {' '.join(fields)} }}"
+
+
+def loads(body: bytes):
+    """
+    Parses a response body with orjson when it is installed, json otherwise. Either way the whole
+    page is parsed at once; orjson is several times faster but its parse buffer raises peak memory
+    by about 20 MB while a 500-item page is decoded (see benchmarks/bench_decode.py).
+    """
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def item_rows(items, column_ids, fields=("id", "name", "updated_at")):
+    """
+    Yields one tuple per item: the item `fields`, then the text of each of `column_ids` in that
+    order (None where the item has no such column). Rows are built straight from the parsed page,
+    without an intermediate dict per item; pair them with column names via DataFrame.from_records.
+    """
+    positions = {column_id: i for i, column_id in enumerate(column_ids, start=len(fields))}
+    width = len(fields) + len(positions)
+    for item in items:
+        row = [None] * width
+        for i, field in enumerate(fields):
+            row[i] = item[field]
+        for col in item["column_values"]:
+            i = positions.get(col["id"])
+            if i is not None:
+                row[i] = col["text"]
+        yield tuple(row)
+
+
+def _retry_delay(attempt: int, response=None, errors: str = "") -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    reset = RESET_IN.search(errors)
+    if reset:
+        # An exhausted complexity budget says when it refills; retrying sooner just fails again
+        return float(reset.group(1))
+    return min(2 ** attempt, 30)
+
+
+def post_graphql(query: str, headers: dict, metrics=None, retries: int = MAX_RETRIES,
+                 complexity: int = 0, budget: RateBudget | None = RATE_BUDGET) -> dict:
+    """
+    Posts a GraphQL query to monday.com and returns the parsed response body.
+    Rate limits (429), server errors and exhausted complexity budgets are retried with backoff;
+    any other non-200 response raises. With a SyncMetrics, the request, response bytes,
+    retries and complexity consumed are added to its current stage.
+    Requests first take their estimated `complexity` from the shared `budget`, and a rate limit
+    pauses every thread using it until monday's budget resets.
+    """
+    query = with_complexity(query)
+    attempt = 0
+    errors = ""
+    while True:
+        if budget is not None:
+            budget.acquire(complexity)
+        try:
+            response = requests.post(MONDAY_API_URL, headers=headers, json={"query": query})
+        except requests.ConnectionError:
+            if attempt >= retries:
+                raise
+            response = None
+        else:
+            if metrics is not None:
+                metrics.add(requests=1, bytes=len(response.content))
+            if response.status_code == 200:
+                data = loads(response.content)
+                errors = str(data.get("errors", ""))
+                if not (COMPLEXITY_ERROR.search(errors) and attempt < retries):
+                    break
+            elif response.status_code not in RETRY_STATUS or attempt >= retries:
+                raise Exception(f"Request failed: {response.status_code}, {response.text}")
+
+        delay = _retry_delay(attempt, response, errors)
+        if budget is not None:
+            budget.record(0, complexity)
+            if COMPLEXITY_ERROR.search(errors) or (response is not None and response.status_code == 429):
+                budget.pause(delay)
+        print(f"⏳ monday.com request failed, retrying in {delay:.0f}s...")
+        if metrics is not None:
+            metrics.add(retries=1)
+        time.sleep(delay)
+        attempt += 1
+
+    used = ((data.get("data") or {}).pop("complexity", None) or {}).get("query") or 0
+    if budget is not None:
+        budget.record(used, complexity)
+    if metrics is not None and used:
+        metrics.add(complexity=used)
+    return data
+
+
+def estimate_complexity(n_items: int, n_columns: int = 0) -> int:
+    """Rough monday cost of reading `n_items` items with `n_columns` column values each."""
+    return n_items * (10 + n_columns)
+
+
+def add_items_by_id(batch, item_ids, column_ids, fields=("id", "name", "updated_at"),
+                    chunk: int = ITEMS_BY_ID_LIMIT) -> None:
+    """Adds `items(ids:)` fields for `item_ids` to a QueryBatch, `chunk` ids per field, aliased items_0, items_1, ..."""
+    item_ids = list(item_ids)
+    selection = f"{{ {' '.join(fields)} {column_values_field(column_ids)} }}"
+    for n, i in enumerate(range(0, len(item_ids), chunk)):
+        ids = item_ids[i:i + chunk]
+        # json.dumps renders the id list as a GraphQL list literal
+        batch.add(f"items_{n}", f"items(ids: {json.dumps(ids)}) {selection}",
+                  estimate_complexity(len(ids), len(column_ids)))
+
+
+class QueryBatch:
+    """
+    Merges independent top-level GraphQL fields into as few requests as possible, each field under
+    its own alias, e.g. a board's columns together with its change scan, or several items(ids:)
+    chunks. Fields are packed in order until the next one would push a request past
+    `max_complexity` (by the caller's estimate) or `max_fields`. `results()` posts the documents
+    one at a time and yields each response's {alias: data}; `execute()` returns them merged.
+    """
+
+    def __init__(self, headers: dict, metrics=None, max_complexity: int = MAX_QUERY_COMPLEXITY,
+                 max_fields: int = MAX_BATCH_FIELDS):
+        self.headers = headers
+        self.metrics = metrics
+        # Leave room for the complexity field and for the estimates being off
+        self.max_complexity = int(max_complexity * 0.8)
+        self.max_fields = max_fields
+        self.fields = []
+
+
+    def add(self, alias: str, field: str, complexity: int = 1) -> None:
+        self.fields.append((alias, field, complexity))
+
+
+    def _packed(self) -> list[tuple[list[str], int]]:
+        packed, current, cost = [], [], 0
+        for alias, field, complexity in self.fields:
+            if current and (cost + complexity > self.max_complexity or len(current) >= self.max_fields):
+                packed.append((current, cost))
+                current, cost = [], 0
+            current.append(f"{alias}: {field}")
+            cost += complexity
+        if current:
+            packed.append((current, cost))
+        return packed
+
+
+    def documents(self) -> list[str]:
+        return ["query {\n" + "\n".join(fields) + "\n}" for fields, _ in self._packed()]
+
+
+    def complexities(self) -> list[int]:
+        """Estimated cost of each document in documents()."""
+        return [cost for _, cost in self._packed()]
+
+
+    def results(self):
+        for document, complexity in zip(self.documents(), self.complexities()):
+            data = post_graphql(document, self.headers, metrics=self.metrics, complexity=complexity)
+            if "errors" in data:
+                raise Exception(f"GraphQL errors returned: {data['errors']}")
+            yield data["data"]
+
+
+    def execute(self) -> dict:
+        merged = {}
+        for data in self.results():
+            merged.update(data)
+        return merged
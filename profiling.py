@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import datetime
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", 30))
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples every thread's Python stack at a fixed interval and counts them as collapsed stacks
+    ("thread;outer;...;inner count"), the input format of flamegraph.pl and speedscope. Unlike
+    cProfile it sees whole stacks, so time spent waiting on sockets shows up under its caller.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Profiles an entry point run under --profile. While active it keeps a cProfile profile, a
+    stack sampler and tracemalloc running; `stage(name)` records wall time and peak traced memory
+    per stage (SyncMetrics stages report here automatically when given the profiler).
+
+    On exit it writes, under PROFILE_DIR:
+      <name>_<stamp>.prof       cProfile stats (snakeviz, flameprof, pstats)
+      <name>_<stamp>.collapsed  sampled collapsed stacks (flamegraph.pl, speedscope)
+      <name>_<stamp>.txt        per-stage time/memory, top-N functions and top allocation sites
+    A disabled Profiler does nothing, so entry points can use it unconditionally.
+    """
+
+    def __init__(self, name: str, enabled: bool = True, out_dir: str = PROFILE_DIR, top_n: int = PROFILE_TOP):
+        self.name = name
+        self.enabled = enabled
+        self.out_dir = out_dir
+        self.top_n = top_n
+        self.stages = {}
+        self._stack = []
+        self._profile = None
+        self._sampler = None
+        self._started = None
+
+
+    def __enter__(self):
+        if self.enabled:
+            tracemalloc.start()
+            self._sampler = StackSampler()
+            self._sampler.start()
+            self._profile = cProfile.Profile()
+            self._started = time.perf_counter()
+            self._profile.enable()
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            self._profile.disable()
+            self._sampler.stop()
+            self.write()
+            tracemalloc.stop()
+        return False
+
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        # tracemalloc has a single peak counter: fold it into the enclosing stage before resetting it
+        if self._stack:
+            parent = self._stack[-1]
+            parent["peak"] = max(parent["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        current = {"name": name, "peak": 0}
+        self._stack.append(current)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            current["peak"] = max(current["peak"], tracemalloc.get_traced_memory()[1])
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], current["peak"])
+            stage = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "peak": 0, "top_allocations": []})
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            if current["peak"] > stage["peak"]:
+                stage["peak"] = current["peak"]
+                # What is still allocated when the stage's worst-case call ends; the snapshot itself
+                # is expensive, so keep it out of the CPU profile
+                self._profile.disable()
+                snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+                top = snapshot.statistics("lineno")[:10]
+                self._profile.enable()
+                stage["top_allocations"] = [f"{s.size / 1024:10.1f} KiB  {s.count:7d} blocks  {s.traceback[0]}"
+                                            for s in top]
+
+
+    def write(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(self.out_dir, f"{self.name}_{stamp}")
+        self._profile.dump_stats(f"{base}.prof")
+        self._sampler.write_collapsed(f"{base}.collapsed")
+        with open(f"{base}.txt", "w") as f:
+            f.write(self.report())
+        print(f"\n📈 profile written to {base}.txt (.prof for cProfile viewers, .collapsed for flamegraphs)")
+
+
+    def report(self) -> str:
+        wall = time.perf_counter() - self._started
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"profile: {self.name}",
+                 f"wall time {wall:.3f}s, {self._sampler.samples} stack samples, "
+                 f"peak traced memory {peak / 2**20:.1f} MiB (tracemalloc slows allocation-heavy code)", ""]
+
+        if self.stages:
+            lines.append(f"{'stage':<24} {'calls':>6} {'seconds':>10} {'% wall':>7} {'peak MiB':>9}")
+            for name, s in self.stages.items():
+                lines.append(f"{name:<24} {s['calls']:>6} {s['seconds']:>10.3f} {100 * s['seconds'] / wall:>6.1f}% "
+                             f"{s['peak'] / 2**20:>9.2f}")
+            lines.append("")
+
+        for sort_key, title in (("cumulative", "cumulative time"), ("tottime", "own time")):
+            lines.append(f"--- top {self.top_n} functions by {title} ---")
+            lines.append(f"{'calls':>9} {'own s':>9} {'cum s':>9}  function")
+            stats = pstats.Stats(self._profile)
+            stats.sort_stats(sort_key)
+            for func in stats.fcn_list[:self.top_n]:
+                cc, nc, tt, ct, _ = stats.stats[func]
+                filename, lineno, funcname = func
+                lines.append(f"{nc:>9} {tt:>9.3f} {ct:>9.3f}  {funcname} ({os.path.basename(filename)}:{lineno})")
+            lines.append("")
+
+        for name, s in self.stages.items():
+            if s["top_allocations"]:
+                lines.append(f"--- largest live allocations at the end of stage {name} ---")
+                lines.extend(s["top_allocations"])
+                lines.append("")
+        return "\n".join(lines)
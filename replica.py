@@ -0,0 +1,292 @@
+import os
+import re
+import glob
+import shutil
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+# --- Columnar replica ---
+# The sync keeps a DuckDB copy of the tables it writes, updated from the same DataFrames it writes
+# to Postgres, and exports each table as Parquet partitioned by received month:
+#   REPLICA_DIR/replica.duckdb
+#   REPLICA_DIR/parquet/worklog/received_month=2024-05/data.parquet
+#   REPLICA_DIR/parquet/column_renames/data.parquet
+# A batch only rewrites the partitions its rows left or landed in. The agent (setup_agent with
+# use_replica) queries in-memory DuckDB views over the Parquet files, so heavy aggregations run
+# vectorized and in parallel, off the OLTP database, and never contend for DuckDB's single-writer
+# file lock with the sync. Postgres stays the source of truth: `python replica.py --rebuild`
+# recreates the replica from it. Setting REPLICA_DIR enables the replica.
+# Needs duckdb, duckdb-engine and pytz. duckdb-engine (0.17) cannot reflect columns on SQLAlchemy 2.1,
+# so nothing here or in the agent reflects the replica: column lists come from DuckDB's
+# information_schema (schema_cache.catalog_columns). Keep it that way, or pin sqlalchemy<2.1.
+# Each completed replica write bumps the "replica" sync_state counter, which keys the agent's answer
+# cache while it reads the replica (the replica is written after Postgres commits, so it can lag).
+
+
+LOCK_RETRIES = int(os.getenv("REPLICA_LOCK_RETRIES", 20))  # another process writing the .duckdb file
+PARTITION_COLUMN = "received_date"
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("The columnar replica needs duckdb: pip install duckdb duckdb-engine pytz")
+    return duckdb
+
+
+def _quote(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _column_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE"
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return "TIMESTAMPTZ"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "TIMESTAMP"
+    # Everything else is text, as in Postgres (an all-None column would otherwise come out INTEGER)
+    return "VARCHAR"
+
+
+# Partition of a row: the YYYY-MM of received_date, 'unknown' when it is empty or not a date
+MONTH_EXPR = (f"CASE WHEN regexp_matches(CAST(\"{PARTITION_COLUMN}\" AS VARCHAR), '^\\d{{4}}-\\d{{2}}') "
+              f"THEN substr(CAST(\"{PARTITION_COLUMN}\" AS VARCHAR), 1, 7) ELSE 'unknown' END")
+
+
+class Replica:
+    """
+    The DuckDB + Parquet replica under `directory`. Writes from threads of one process are
+    serialized; a process that finds the database file locked by another retries with backoff.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.duckdb = _duckdb()
+        self.directory = directory
+        self.path = os.path.join(directory, "replica.duckdb")
+        self.parquet_dir = os.path.join(directory, "parquet")
+        os.makedirs(self.parquet_dir, exist_ok=True)
+
+
+    @contextmanager
+    def _connect(self):
+        with self._lock:
+            for attempt in range(LOCK_RETRIES):
+                try:
+                    con = self.duckdb.connect(self.path)
+                    break
+                except self.duckdb.IOException as e:
+                    if "lock" not in str(e).lower() or attempt == LOCK_RETRIES - 1:
+                        raise
+                    time.sleep(min(0.05 * 2 ** attempt, 2))
+            try:
+                yield con
+            finally:
+                con.close()
+
+
+    def _columns(self, con, table: str) -> list[str]:
+        return [row[0] for row in con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+            [table]).fetchall()]
+
+
+    def _ensure_table(self, con, table: str, df: pd.DataFrame) -> None:
+        """Creates the table from the DataFrame's columns, or adds the columns it lacks."""
+        existing = self._columns(con, table)
+        if not existing:
+            columns = ", ".join(f'"{c}" {_column_type(t)}' for c, t in df.dtypes.items())
+            con.execute(f'CREATE TABLE "{table}" ({columns})')
+            return
+        for c, t in df.dtypes.items():
+            if c not in existing:
+                con.execute(f'ALTER TABLE "{table}" ADD COLUMN "{c}" {_column_type(t)}')
+
+
+    def _partitions(self, con, table: str, relation: str | None = None, where: str = "") -> set:
+        """Partitions (months, or None for an unpartitioned table) of `relation`'s rows, default the table's."""
+        relation = relation or f'"{table}"'
+        if PARTITION_COLUMN not in self._columns(con, table):
+            return {None} if con.execute(f"SELECT 1 FROM {relation} {where} LIMIT 1").fetchone() else set()
+        return {row[0] for row in con.execute(f"SELECT DISTINCT {MONTH_EXPR} FROM {relation} {where}").fetchall()}
+
+
+    def _partition_path(self, table: str, month) -> str:
+        table_dir = os.path.join(self.parquet_dir, table)
+        if month is None:
+            return os.path.join(table_dir, "data.parquet")
+        return os.path.join(table_dir, f"received_month={month}", "data.parquet")
+
+
+    def _export(self, con, table: str, partitions: set) -> None:
+        """Rewrites the given partitions of the table's Parquet export and drops files of partitions that emptied."""
+        live = self._partitions(con, table)
+        for month in partitions - live:
+            path = self._partition_path(table, month)
+            if os.path.exists(path):
+                os.remove(path)
+                if month is not None:
+                    os.rmdir(os.path.dirname(path))
+        rewrite = partitions & live
+        if None in rewrite:
+            path = self._partition_path(table, None)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            con.execute(f'COPY "{table}" TO {_quote(path + ".tmp")} (FORMAT PARQUET)')
+            # Readers see the old file or the new one, never a partial write
+            os.replace(path + ".tmp", path)
+        elif rewrite:
+            # One pass over the table writes every partition, then each file is swapped into place
+            staging = os.path.join(self.parquet_dir, f".staging-{table}")
+            shutil.rmtree(staging, ignore_errors=True)
+            months = ", ".join(_quote(month) for month in sorted(rewrite))
+            con.execute(f'COPY (SELECT *, {MONTH_EXPR} AS received_month FROM "{table}" WHERE {MONTH_EXPR} IN ({months})) '
+                        f'TO {_quote(staging)} (FORMAT PARQUET, PARTITION_BY (received_month))')
+            for month in rewrite:
+                path = self._partition_path(table, month)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                written, = glob.glob(os.path.join(staging, f"received_month={month}", "*.parquet"))
+                os.replace(written, path)
+            shutil.rmtree(staging)
+        # Files from an earlier layout, e.g. written before the table had a received_date
+        keep = {self._partition_path(table, month) for month in live}
+        for path in glob.glob(os.path.join(self.parquet_dir, table, "**", "*.parquet"), recursive=True):
+            if path not in keep:
+                os.remove(path)
+
+
+    def upsert(self, table: str, df: pd.DataFrame, key: str = "monday_item_id") -> None:
+        """Replaces the rows of `table` whose `key` appears in `df` with `df`'s rows, then re-exports the partitions touched."""
+        if df.empty:
+            return
+        with self._connect() as con:
+            con.register("batch", df)
+            con.begin()
+            self._ensure_table(con, table, df)
+            matching = f'WHERE "{key}" IN (SELECT "{key}" FROM batch)'
+            touched = self._partitions(con, table, where=matching)
+            con.execute(f'DELETE FROM "{table}" {matching}')
+            con.execute(f'INSERT INTO "{table}" BY NAME SELECT * FROM batch')
+            con.commit()
+            self._export(con, table, touched | self._partitions(con, table, relation="batch"))
+
+
+    def replace(self, table: str, chunks) -> None:
+        """Replaces the whole table with a DataFrame, or with an iterable of DataFrame chunks."""
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+        with self._connect() as con:
+            touched = self._partitions(con, table) if self._columns(con, table) else set()
+            con.begin()
+            con.execute(f'DROP TABLE IF EXISTS "{table}"')
+            for df in chunks:
+                con.register("batch", df)
+                self._ensure_table(con, table, df)
+                con.execute(f'INSERT INTO "{table}" BY NAME SELECT * FROM batch')
+                con.unregister("batch")
+            con.commit()
+            if self._columns(con, table):
+                touched |= self._partitions(con, table)
+            self._export(con, table, touched)
+
+
+    def rebuild_from(self, engine, tables: list[str], chunksize: int = 50_000) -> None:
+        """Copies `tables` from the database behind `engine` (Postgres) into the replica."""
+        from sqlalchemy import inspect
+
+        existing = set(inspect(engine).get_table_names())
+        for table in tables:
+            if table not in existing:
+                continue
+            print(f"🦆 Copying {table} to the replica...")
+            with engine.connect() as conn:
+                self.replace(table, pd.read_sql_table(table, conn, chunksize=chunksize))
+
+
+def replica_from_env() -> Replica | None:
+    """The replica under REPLICA_DIR, or None when it is not set (the replica is disabled)."""
+    directory = os.getenv("REPLICA_DIR")
+    return Replica(directory) if directory else None
+
+
+def view_sources(directory: str) -> dict:
+    """{table: SELECT over its Parquet files} for every table exported under `directory`."""
+    sources = {}
+    for table_dir in sorted(glob.glob(os.path.join(directory, "parquet", "*"))):
+        table = os.path.basename(table_dir)
+        if glob.glob(os.path.join(table_dir, "received_month=*", "data.parquet")):
+            files = os.path.join(table_dir, "received_month=*", "data.parquet")
+            sources[table] = (f"SELECT * EXCLUDE (received_month) FROM read_parquet({_quote(files)}, "
+                              f"hive_partitioning = true, hive_types_autocast = false, union_by_name = true)")
+        elif os.path.exists(os.path.join(table_dir, "data.parquet")):
+            sources[table] = f"SELECT * FROM read_parquet({_quote(os.path.join(table_dir, 'data.parquet'))})"
+    return sources
+
+
+def replica_engine(directory: str | None = None):
+    """
+    A SQLAlchemy engine on an in-memory DuckDB database holding one view per table of the replica
+    under `directory` (default REPLICA_DIR).
+    Views read the Parquet files at query time, so each query sees the latest synced batches;
+    tables exported after a connection was opened appear on the next connection.
+    """
+    from sqlalchemy import create_engine, event
+
+    _duckdb()
+    directory = directory or os.getenv("REPLICA_DIR")
+    if not directory:
+        raise ValueError("REPLICA_DIR is not set")
+    engine = create_engine("duckdb:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def create_views(dbapi_connection, _):
+        for table, source in view_sources(directory).items():
+            dbapi_connection.execute(f'CREATE VIEW "{table}" AS {source}')
+
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintains the columnar (DuckDB + Parquet) replica under REPLICA_DIR.")
+    parser.add_argument("--rebuild", action="store_true", help="recreate the replica from Postgres")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine, inspect
+    from schema_cache import AGENT_TABLES
+    from sync_state import bump_sync_version
+
+    load_dotenv()
+    db = os.getenv("POSTGRES_DB")
+    user = os.getenv("POSTGRES_USER")
+    password = os.getenv("POSTGRES_PASSWORD")
+    host = os.getenv("POSTGRES_HOST")
+    port = os.getenv("POSTGRES_PORT", "5432")
+    engine = create_engine(f'postgresql://{user}:{password}@{host}:{port}/{db}')
+
+    replica = replica_from_env()
+    if replica is None:
+        raise SystemExit("REPLICA_DIR is not set")
+    # The agent tables plus the worklog_<board id> tables of other boards
+    board_tables = sorted(t for t in inspect(engine).get_table_names() if re.fullmatch(r"worklog_\d+", t))
+    replica.rebuild_from(engine, AGENT_TABLES + board_tables)
+    bump_sync_version(engine, "replica")
+    print("🦆 Replica rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import csv
+import glob
+import time
+import uuid
+import datetime
+from collections import namedtuple
+
+from sqlalchemy import text
+
+
+ExportHandle = namedtuple("ExportHandle", ["path", "rows", "columns", "truncated"], defaults=[False])
+
+
+def _truncate(value, length: int = 100):
+    s = str(value) if value is not None else None
+    if s is not None and len(s) > length:
+        return s[:length] + "..."
+    return value
+
+
+class ResultExporter:
+    """
+    Runs agent queries through a server-side cursor. Small results come back as usual; large ones
+    give the LLM only a preview and row count, while the full result streams to a CSV or Parquet
+    file under export_dir. `on_export` is called with the ExportHandle of every file written.
+    An export stops after max_rows rows (AGENT_EXPORT_MAX_ROWS, default 100000), and the
+    SQLCostGuard adds the same LIMIT up front when the planner expects more, so a query is never
+    pulled from the database in full just to be written to disk.
+
+    Retention: at startup and before every export, exports older than max_age_hours are deleted,
+    then the oldest ones until all of them fit in max_total_mb (AGENT_EXPORT_MAX_AGE_HOURS,
+    default 168, and AGENT_EXPORT_MAX_MB, default 1024; 0 turns a limit off). Only files this
+    class wrote (result_*.csv / result_*.parquet) are ever removed.
+    """
+
+    def __init__(self, export_dir: str = "exports", fmt: str = "csv", preview_rows: int = 20,
+                 batch_size: int = 2000, on_export=None, max_age_hours: float = 168,
+                 max_total_mb: float = 1024, max_rows: int = 100_000):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.export_dir = export_dir
+        self.fmt = fmt
+        self.preview_rows = preview_rows
+        self.batch_size = batch_size
+        self.on_export = on_export
+        self.max_age_hours = max_age_hours
+        self.max_total_mb = max_total_mb
+        self.max_rows = max_rows
+        self.sweep()
+
+
+    @classmethod
+    def from_env(cls, on_export=None) -> "ResultExporter":
+        return cls(export_dir=os.getenv("AGENT_EXPORT_DIR", "exports"),
+                   fmt=os.getenv("AGENT_EXPORT_FORMAT", "csv"),
+                   preview_rows=int(os.getenv("AGENT_PREVIEW_ROWS", 20)),
+                   on_export=on_export,
+                   max_age_hours=float(os.getenv("AGENT_EXPORT_MAX_AGE_HOURS", 168)),
+                   max_total_mb=float(os.getenv("AGENT_EXPORT_MAX_MB", 1024)),
+                   max_rows=int(os.getenv("AGENT_EXPORT_MAX_ROWS", 100_000)))
+
+
+    def sweep(self) -> int:
+        """Applies the retention limits to export_dir and returns the number of files deleted."""
+        exports = []
+        for pattern in ("result_*.csv", "result_*.parquet"):
+            for path in glob.glob(os.path.join(self.export_dir, pattern)):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                exports.append((st.st_mtime, st.st_size, path))
+        exports.sort()
+
+        expired = []
+        if self.max_age_hours:
+            cutoff = time.time() - self.max_age_hours * 3600
+            expired = [e for e in exports if e[0] < cutoff]
+            exports = [e for e in exports if e[0] >= cutoff]
+        if self.max_total_mb:
+            total = sum(size for _, size, _ in exports)
+            while exports and total > self.max_total_mb * 1024 * 1024:
+                expired.append(exports[0])
+                total -= exports.pop(0)[1]
+
+        deleted = 0
+        for _, _, path in expired:
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass  # another agent process swept it first
+        return deleted
+
+
+    def run(self, engine, query: str) -> str:
+        """Executes `query` and returns the text the LLM sees."""
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=self.batch_size).execute(text(query))
+            if not result.returns_rows:
+                return ""
+            columns = list(result.keys())
+            head = result.fetchmany(self.preview_rows + 1)
+            if len(head) <= self.preview_rows:
+                return str([tuple(_truncate(v, 300) for v in row) for row in head]) if head else ""
+
+            handle = self._export(columns, head, result)
+
+        if self.on_export is not None:
+            self.on_export(handle)
+        preview = [tuple(_truncate(v) for v in row) for row in head[:self.preview_rows]]
+        if handle.truncated:
+            returned, saved = f"more than {handle.rows} rows", f"The first {handle.rows} rows were exported"
+            told = "that file holds only part of the list"
+        else:
+            returned, saved = f"{handle.rows} rows", "The full result was exported"
+            told = "the complete list is in that file"
+        return (
+            f"The query returned {returned} with columns {columns}. "
+            f"First {self.preview_rows} rows: {preview}\n"
+            f"{saved} to {handle.path}. Summarize or count from SQL instead of listing rows, "
+            f"and tell the user {told}."
+        )
+
+
+    def _export(self, columns: list, head: list, result) -> ExportHandle:
+        os.makedirs(self.export_dir, exist_ok=True)
+        self.sweep()
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.export_dir, f"result_{stamp}_{uuid.uuid4().hex[:8]}.{self.fmt}")
+
+        truncated = False
+
+        def batches():
+            nonlocal truncated
+            yield head
+            left = self.max_rows - len(head)
+            while left > 0:
+                rows = result.fetchmany(min(self.batch_size, left))
+                if not rows:
+                    return
+                left -= len(rows)
+                yield rows
+            truncated = result.fetchone() is not None
+
+        n = 0
+        if self.fmt == "csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for rows in batches():
+                    writer.writerows(rows)
+                    n += len(rows)
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+            writer = None
+            try:
+                for rows in batches():
+                    # Everything is written as text; worklog columns are TEXT anyway
+                    table = pa.table({c: [None if r[i] is None else str(r[i]) for r in rows]
+                                      for i, c in enumerate(columns)})
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                    n += len(rows)
+            finally:
+                if writer is not None:
+                    writer.close()
+
+        return ExportHandle(path, n, columns, truncated)
@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+import threading
+
+from sqlalchemy import inspect, text, bindparam
+from langchain_community.utilities import SQLDatabase
+
+
+# Tables the agent is allowed to see. Everything else in the database is never reflected.
+AGENT_TABLES = ["worklog", "worklog_index", "column_renames", "column_descriptions", "status_map", "job_type_map"]
+SCHEMA_SNAPSHOT_PATH = os.getenv("SCHEMA_SNAPSHOT_PATH", ".schema_snapshot.json")
+
+
+# Dialects whose columns are read from information_schema rather than SQLAlchemy reflection. For
+# DuckDB (the columnar replica) this is required: duckdb-engine 0.17 reflects columns through a
+# Postgres catalog query that fails on SQLAlchemy 2.1 (pg_catalog.pg_collation does not exist).
+CATALOG_DIALECTS = ("postgresql", "duckdb")
+
+
+def catalog_columns(engine, tables: list[str]) -> list[tuple[str, str, str]]:
+    """(table, column, data type) of the given tables and views, in column order, in one information_schema query."""
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT table_name, column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name IN :tables
+            ORDER BY table_name, ordinal_position
+        """).bindparams(bindparam("tables", expanding=True)), {"tables": list(tables)}).fetchall()
+    return [tuple(r) for r in rows]
+
+
+def schema_fingerprint(engine, tables: list[str]) -> tuple[str, list[str]]:
+    """
+    Hashes (table, column, type) for the given tables in a single catalog query.
+    Returns the fingerprint and the subset of tables that actually exist.
+    """
+    if engine.dialect.name in CATALOG_DIALECTS:
+        columns = catalog_columns(engine, tables)
+    else:
+        inspector = inspect(engine)
+        existing = set(inspector.get_table_names())
+        columns = [
+            (table, col["name"], str(col["type"]))
+            for table in tables if table in existing
+            for col in inspector.get_columns(table)
+        ]
+
+    present = sorted({c[0] for c in columns})
+    digest = hashlib.sha256(json.dumps(columns).encode()).hexdigest()
+    return digest, present
+
+
+class SnapshotSQLDatabase(SQLDatabase):
+    """
+    SQLDatabase that serves table info strings from a local snapshot file.
+    Tables missing from the snapshot are reflected on first use and written back, so each table
+    is only reflected once per schema version (on DuckDB, described from information_schema
+    instead, see CATALOG_DIALECTS). Sample rows are off by default: they would put
+    customer data in the snapshot file, which is only rewritten when the schema changes.
+    """
+
+    def __init__(self, engine, snapshot_path: str, fingerprint: str, **kwargs):
+        kwargs.setdefault("sample_rows_in_table_info", 0)
+        self._snapshot_path = snapshot_path
+        # Snapshots written with a different sample row count (e.g. older ones holding rows) are discarded
+        fingerprint = f"{fingerprint}:rows={kwargs['sample_rows_in_table_info']}"
+        self._fingerprint = fingerprint
+        self._snapshot_lock = threading.Lock()
+        self._snapshot = _read_snapshot(snapshot_path, fingerprint)
+        super().__init__(engine, lazy_table_reflection=True, **kwargs)
+
+
+    def get_table_info(self, table_names: list[str] | None = None, get_col_comments: bool = False) -> str:
+        if get_col_comments and self.dialect != "duckdb":
+            return super().get_table_info(table_names, get_col_comments=True)
+
+        wanted = table_names if table_names is not None else sorted(self.get_usable_table_names())
+        missing = [t for t in wanted if t not in self._snapshot]
+        if missing:
+            # Validates names and reflects only the tables we have never described
+            for table in missing:
+                info = self._catalog_table_info(table) if self.dialect == "duckdb" else super().get_table_info([table])
+                with self._snapshot_lock:
+                    self._snapshot[table] = info
+            self._save_snapshot()
+
+        return "\n\n".join(self._snapshot[t] for t in wanted)
+
+
+    def _catalog_table_info(self, table: str) -> str:
+        """get_table_info's text for one table, built from information_schema instead of reflection."""
+        if table not in self.get_usable_table_names():
+            raise ValueError(f"table_names {{'{table}'}} not found in database")
+        columns = catalog_columns(self._engine, [table])
+        info = f"\nCREATE TABLE {table} (\n" + ", \n".join(f"\t{c} {t}" for _, c, t in columns) + "\n)"
+        if self._sample_rows_in_table_info:
+            with self._engine.connect() as conn:
+                rows = conn.execute(text(f'SELECT * FROM "{table}" LIMIT {self._sample_rows_in_table_info}')).fetchall()
+            lines = ["\t".join(c for _, c, _ in columns)] + ["\t".join(str(v)[:100] for v in row) for row in rows]
+            info += f"\n\n/*\n{self._sample_rows_in_table_info} rows from {table} table:\n" + "\n".join(lines) + "\n*/"
+        return info
+
+
+    def _save_snapshot(self) -> None:
+        with self._snapshot_lock:
+            payload = {"fingerprint": self._fingerprint, "table_info": dict(self._snapshot)}
+            tmp_path = f"{self._snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self._snapshot_path)
+
+
+def _read_snapshot(path: str, fingerprint: str) -> dict:
+    """Returns cached table info if the snapshot matches the current schema fingerprint."""
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if payload.get("fingerprint") != fingerprint:
+        return {}
+    return payload.get("table_info", {})
+
+
+def load_agent_database(engine, tables: list[str] = AGENT_TABLES,
+                        snapshot_path: str = SCHEMA_SNAPSHOT_PATH, **kwargs) -> SQLDatabase:
+    """Creates the agent's SQLDatabase restricted to `tables`, lazily reflected and backed by the schema snapshot."""
+    fingerprint, present = schema_fingerprint(engine, tables)
+    return SnapshotSQLDatabase(engine, snapshot_path, fingerprint, include_tables=present, **kwargs)
@@ -0,0 +1,124 @@
+import re
+import threading
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+
+# Columns whose values form a small, meaningful domain worth listing in the prompt
+DOMAIN_COLUMN_PATTERN = re.compile(r"status|product|scope|job_type|billing|invoice", re.IGNORECASE)
+MAX_DOMAIN_VALUES = 20
+SUMMARY_TABLES = ["worklog", "worklog_index"]
+
+
+def estimate_tokens(s: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting prompt context."""
+    return (len(s) + 3) // 4
+
+
+def _clean_col(col: str) -> str:
+    # Same normalization app_v2 applies to Monday column titles before writing them to worklog
+    return re.sub(r'\W+', '_', col.strip().lower())
+
+
+def load_column_docs(engine) -> dict:
+    """
+    Reads column_renames and column_descriptions into {key: (friendly_name, description)},
+    keyed on every spelling a synced worklog column may have (Monday id, title, cleaned title).
+    """
+    try:
+        with engine.connect() as conn:
+            renames = dict(conn.execute(text("SELECT column_id, friendly_name FROM column_renames")).fetchall())
+            descriptions = dict(conn.execute(text("SELECT column_id, description FROM column_descriptions")).fetchall())
+    except SQLAlchemyError:
+        return {}
+
+    docs = {}
+    for column_id in set(renames) | set(descriptions):
+        friendly = renames.get(column_id) or column_id
+        entry = (friendly, descriptions.get(column_id) or "")
+        for key in (column_id, friendly, _clean_col(friendly), _clean_col(column_id)):
+            docs.setdefault(key, entry)
+    return docs
+
+
+def _value_domain(conn, table: str, column: str) -> list[str] | None:
+    """Returns the distinct values of a column if there are few enough to list, else None."""
+    rows = conn.execute(text(
+        f'SELECT "{column}", COUNT(*) AS n FROM "{table}" WHERE "{column}" IS NOT NULL '
+        f'GROUP BY "{column}" ORDER BY n DESC LIMIT {MAX_DOMAIN_VALUES + 1}'
+    )).fetchall()
+    if not rows or len(rows) > MAX_DOMAIN_VALUES:
+        return None
+    return [str(r[0]) for r in rows if str(r[0]).strip()]
+
+
+def summarize_table(engine, table: str, docs: dict) -> list[str]:
+    """Builds one compact line per documented column: name, type, meaning and value domain."""
+    inspector = inspect(engine)
+    lines = []
+    with engine.connect() as conn:
+        for col in inspector.get_columns(table):
+            name = col["name"]
+            doc = docs.get(name)
+            if doc is None and name not in ("monday_item_id", "item_id", "item_name", "updated_at"):
+                # Undocumented columns (files, mirrors, formulas) are left to sql_db_schema
+                continue
+            line = f"  {name} {col['type']}"
+            if doc:
+                friendly, description = doc
+                line += f" -- {description or friendly}"
+            if DOMAIN_COLUMN_PATTERN.search(name):
+                domain = _value_domain(conn, table, name)
+                if domain:
+                    line += f"; values: {', '.join(domain)}"
+            lines.append(line)
+    return lines
+
+
+def build_schema_summary(engine, tables: list[str] = SUMMARY_TABLES, token_budget: int = 800) -> str:
+    """
+    Returns a compact description of `tables` built from the mapping tables, trimmed to
+    roughly `token_budget` tokens. Columns past the budget are counted but not listed.
+    """
+    docs = load_column_docs(engine)
+    existing = set(inspect(engine).get_table_names())
+    out = []
+    used = 0
+    for table in tables:
+        if table not in existing:
+            continue
+        header = f"Table {table}:"
+        out.append(header)
+        used += estimate_tokens(header)
+        lines = summarize_table(engine, table, docs)
+        for i, line in enumerate(lines):
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                out.append(f"  ... {len(lines) - i} more columns, use sql_db_schema for the full definition")
+                break
+            out.append(line)
+            used += cost
+    return "\n".join(out)
+
+
+_summaries = {}
+_summaries_lock = threading.Lock()
+
+
+def shared_schema_summary(engine, tables: list[str] = SUMMARY_TABLES, token_budget: int = 800) -> str:
+    """
+    build_schema_summary, built once per process and reused until the schema fingerprint or the
+    mapping tables change, so every agent of an AgentPool or TieredAgent shares one set of
+    value-domain scans instead of running its own.
+    """
+    from schema_cache import schema_fingerprint
+    from sync_state import get_sync_version
+
+    key = (str(engine.url), schema_fingerprint(engine, tables)[0], get_sync_version(engine, "mappings"),
+           tuple(tables), token_budget)
+    # Held while building, so agents set up in parallel wait for the first scan rather than repeat it
+    with _summaries_lock:
+        if key not in _summaries:
+            _summaries.clear()
+            _summaries[key] = build_schema_summary(engine, tables, token_budget)
+        return _summaries[key]
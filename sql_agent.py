@@ -1,15 +1,96 @@
-from utils import connect_postgres, setup_agent, get_result, pprint_sql
+import os
+import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from utils import connect_postgres, setup_agent, get_result
+from tracing import print_trace_summary
+from profiling import Profiler
+
+
+# The rest of the session's modules (and, through setup_agent, LangChain and the Gemini client)
+# are imported by start_session, which interactive runs start in the background before the prompt.
+Session = namedtuple("Session", ["agent_executor", "query_logger", "tiered", "answer_cache", "router", "fewshot"])
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Ask the SQL agent questions interactively or from a file.")
+    parser.add_argument("--batch", help="file of questions (one per line, or JSONL with a 'question' field)")
+    parser.add_argument("--out", help="JSONL file for batch results (default batch_<timestamp>.jsonl)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("AGENT_WORKERS", 4)),
+                        help="agents answering batch questions concurrently")
+    parser.add_argument("--profile", action="store_true",
+                        help="write CPU and per-stage memory profiles of the session to PROFILE_DIR")
+    args = parser.parse_args()
+
+    with Profiler("sql_agent", enabled=args.profile) as profiler:
+        run_session(args, profiler)
+
+
+def in_background(fn, *args) -> Future:
+    """Runs fn(*args) on a daemon thread, so quitting never waits for it, and returns a Future of its result."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=f"{fn.__name__}-background", daemon=True).start()
+    return future
+
+
+def start_session(profiler) -> Session | None:
+    """Connects, then builds the agent (or the model tiers), answer cache, intent router and few-shot index."""
+    from answer_cache import AnswerCache
+    from intent_router import IntentRouter
+    from mappings import MappingStore
+    from fewshot import FewShotIndex
+    from model_router import TieredAgent
+
     engine = connect_postgres()
     if not engine:
-        return
+        return None
+    mapping_store = MappingStore(engine)
+    agent_executor = query_logger = tiered = None
+    with profiler.stage("setup"):
+        if os.getenv("AGENT_TIERED", "false").lower() in ("1", "true", "yes"):
+            # Simple questions go to AGENT_FAST_MODEL, complex or failed ones to AGENT_STRONG_MODEL
+            tiered = TieredAgent(engine, mapping_store=mapping_store)
+        else:
+            setup = setup_agent(engine, mapping_store=mapping_store)
+            if not setup:
+                return None
+            agent_executor, query_logger = setup
+    answer_cache = AnswerCache(engine, max_entries=int(os.getenv("ANSWER_CACHE_SIZE", 256)))
+    return Session(agent_executor, query_logger, tiered, answer_cache, IntentRouter(engine, mapping_store),
+                   FewShotIndex.from_env())
+
 
-    setup = setup_agent(engine)
-    if not setup:
+def run_session(args, profiler):
+    if args.batch:
+        engine = connect_postgres()
+        if not engine:
+            return
+        from answer_cache import AnswerCache
+        from intent_router import IntentRouter
+        from agent_pool import AgentPool
+        from fewshot import FewShotIndex
+        import batch_agent
+
+        with profiler.stage("setup"):
+            pool = AgentPool(engine, size=args.workers)
+        answer_cache = AnswerCache(engine, max_entries=int(os.getenv("ANSWER_CACHE_SIZE", 256)))
+        with profiler.stage("batch"):
+            batch_agent.main(pool, args.batch, args.out, cache=answer_cache,
+                             router=IntentRouter(engine, pool.mapping_store), fewshot=FewShotIndex.from_env())
         return
-    agent_executor, query_logger = setup
+
+    # Connecting and agent setup (imports, schema fingerprint and summary, mapping tables)
+    # overlap with typing the first question
+    pending = in_background(start_session, profiler)
+    session = None
     print("\nsql agent is ready ask your questions\n")
     print("type 'exit' or 'quit' to end session")
 
@@ -23,12 +104,36 @@ def main():
             if not user_query.strip():
                 continue
 
-            answer, sql_query = get_result(user_query, agent_executor, query_logger)
+            if session is None:
+                if not pending.done():
+                    print("⏳ still starting up...")
+                try:
+                    session = pending.result()
+                except Exception as e:
+                    print(f"\n agent setup failed: {e}")
+                    return
+                if session is None:
+                    return
+
+            with profiler.stage("question"):
+                if session.tiered is not None:
+                    answer, sql_query, export_path = session.tiered.ask(user_query, cache=session.answer_cache,
+                                                                        router=session.router, fewshot=session.fewshot)
+                    query_logger = session.tiered.last_logger
+                else:
+                    query_logger = session.query_logger
+                    answer, sql_query, export_path = get_result(user_query, session.agent_executor, query_logger,
+                                                   cache=session.answer_cache, router=session.router,
+                                                   fewshot=session.fewshot)
 
             print("\n ---- generated SQL ---- ")
             print(sql_query)
             print("\n ---- answer ----")
             print(answer)
+            if export_path:
+                print(f"\n ---- full result exported to {export_path} ----")
+            if query_logger.last_trace and os.getenv("AGENT_TRACE_SUMMARY", "true").lower() in ("1", "true", "yes"):
+                print_trace_summary(query_logger.last_trace)
 
         except Exception as e:
             print(f"\n an error occurred: {e}")
@@ -36,6 +141,9 @@ def main():
             print("\n session ended by user")
             break
 
+    if session is not None and session.tiered is not None:
+        print(f"\n model tiers: {session.tiered.summary()}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+from typing import Any, List, Optional
+
+from sqlalchemy import text
+from langchain_core.tools import BaseTool
+from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+
+
+TRAILING_LIMIT = re.compile(r"\blimit\s+\d+(\s+offset\s+\d+)?\s*$", re.IGNORECASE)
+READ_STATEMENT = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+
+def clean_query(query: str) -> str:
+    """Strips markdown fences and trailing semicolons the model sometimes wraps around SQL."""
+    query = query.strip()
+    query = re.sub(r"^```(?:sql)?\s*|\s*```$", "", query, flags=re.IGNORECASE)
+    return query.strip().rstrip(";").strip()
+
+
+class SQLCostGuard:
+    """
+    Pre-execution gate for agent SQL, based on Postgres' planner estimates:
+    - estimated total cost above max_cost: the query is rejected with a hint to refine it
+    - estimated rows above the row cap and no LIMIT: the query is wrapped with LIMIT <cap>
+    The cap is max_rows for results that go into the prompt, or the exporter's max_rows when large
+    results stream to a file (see GuardedQuerySQLDatabaseTool). Dialects without EXPLAIN (FORMAT JSON) pass through ungated.
+    """
+
+    def __init__(self, max_cost: float = 1_000_000, max_rows: int = 200):
+        self.max_cost = max_cost
+        self.max_rows = max_rows
+
+
+    @classmethod
+    def from_env(cls) -> "SQLCostGuard":
+        return cls(max_cost=float(os.getenv("SQL_GUARD_MAX_COST", 1_000_000)),
+                   max_rows=int(os.getenv("SQL_GUARD_MAX_ROWS", 200)))
+
+
+    def estimate(self, engine, query: str) -> tuple[float, int] | None:
+        """Returns (total_cost, plan_rows) from EXPLAIN, or None if the dialect has no JSON plans."""
+        if engine.dialect.name != "postgresql":
+            return None
+        with engine.connect() as conn:
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        top = plan[0]["Plan"]
+        return float(top["Total Cost"]), int(top["Plan Rows"])
+
+
+    def check(self, engine, query: str, row_limit: int | None = None) -> tuple[str | None, str, str]:
+        """
+        Returns (query_to_run, note, rejection). query_to_run is None when the query is rejected,
+        note is a message to prepend to the results ("" if none). row_limit is the row cap to apply,
+        default max_rows.
+        """
+        row_limit = row_limit or self.max_rows
+        if not READ_STATEMENT.match(query):
+            return query, "", ""
+        estimate = self.estimate(engine, query)
+        if estimate is None:
+            return query, "", ""
+
+        cost, rows = estimate
+        if cost > self.max_cost:
+            return None, "", (
+                f"Error: query rejected before execution, estimated cost {cost:.0f} exceeds {self.max_cost:.0f} "
+                f"(~{rows} rows). Narrow it with WHERE filters (status, customer, date ranges), aggregate with "
+                f"COUNT/SUM/GROUP BY instead of listing rows, or select fewer columns, then try again."
+            )
+        if rows > row_limit and not TRAILING_LIMIT.search(query):
+            limited = f"SELECT * FROM ({query}) AS guarded_query LIMIT {row_limit}"
+            return limited, (
+                f"Note: the query was estimated to return ~{rows} rows, so only the first {row_limit} are returned. "
+                f"If the user needs totals, use COUNT/GROUP BY instead of listing rows.\n"
+            ), ""
+        return query, "", ""
+
+
+class GuardedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """
+    sql_db_query with the SQLCostGuard applied before anything reaches the database.
+    With an exporter, large results stream to a file, capped at the exporter's max_rows rather
+    than the guard's (much smaller) prompt cap.
+    """
+
+    guard: Any = None
+    exporter: Any = None
+
+    def _run(self, query: str, run_manager: Optional[Any] = None):
+        query = clean_query(query)
+        engine = self.db._engine
+        try:
+            row_limit = self.exporter.max_rows if self.exporter is not None else None
+            to_run, note, rejection = self.guard.check(engine, query, row_limit=row_limit)
+        except Exception:
+            # Let the normal execution path produce the error message the agent expects
+            return self.db.run_no_throw(query)
+        if to_run is None:
+            return rejection
+        if self.exporter is None:
+            return note + self.db.run_no_throw(to_run)
+        try:
+            return note + self.exporter.run(engine, to_run)
+        except Exception as e:
+            # Same shape as SQLDatabase.run_no_throw, so the agent knows to fix the query
+            return f"Error: {e}"
+
+
+class GuardedSQLDatabaseToolkit(SQLDatabaseToolkit):
+    """SQLDatabaseToolkit whose sql_db_query tool goes through a SQLCostGuard (and optional ResultExporter)."""
+
+    guard: Any = None
+    exporter: Any = None
+
+    def get_tools(self) -> List[BaseTool]:
+        tools = []
+        for tool in super().get_tools():
+            if isinstance(tool, QuerySQLDatabaseTool):
+                tool = GuardedQuerySQLDatabaseTool(db=self.db, description=tool.description,
+                                                   guard=self.guard, exporter=self.exporter)
+            tools.append(tool)
+        return tools
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import datetime
+from contextlib import contextmanager, nullcontext
+
+
+SYNC_METRICS_DIR = os.getenv("SYNC_METRICS_DIR", "metrics")
+STAGE_COUNTERS = ("items", "requests", "bytes", "retries", "complexity")
+
+
+class SyncMetrics:
+    """
+    Per-stage counters for one sync run. Stages are entered with `stage(name)`; a stage entered
+    more than once (e.g. once per page) accumulates. While a stage is open, `add()` (called by
+    monday_client.post_graphql for requests, bytes, retries and complexity) counts towards it.
+
+    Every finished stage is appended as a JSON line to <SYNC_METRICS_DIR>/sync_events.jsonl, and
+    `finish()` writes <SYNC_METRICS_DIR>/monday_sync_<job>.prom for node_exporter's textfile collector.
+    Used as a context manager, finish() runs on exit with the run marked failed if it raised.
+    Stages are also reported to `profiler` (a profiling.Profiler) when one is given.
+    `record_queue()` adds the sync_queue's batches per status, so failed batches show up in both.
+    """
+
+    def __init__(self, job: str, metrics_dir: str | None = SYNC_METRICS_DIR, profiler=None):
+        self.job = job
+        self.metrics_dir = metrics_dir
+        self.profiler = profiler
+        self.stages = {}
+        self._current = None
+        self._started = time.time()
+        self.queue = {}
+
+
+    def _stage(self, name: str) -> dict:
+        if name not in self.stages:
+            self.stages[name] = {"seconds": 0.0, **{c: 0 for c in STAGE_COUNTERS}}
+        return self.stages[name]
+
+
+    @contextmanager
+    def stage(self, name: str):
+        previous, self._current = self._current, name
+        stage = self._stage(name)
+        start = time.perf_counter()
+        try:
+            with self.profiler.stage(name) if self.profiler else nullcontext():
+                yield self
+        finally:
+            stage["seconds"] += time.perf_counter() - start
+            self._current = previous
+            self.log("stage", stage=name, **self.stage_summary(name))
+
+
+    def add(self, stage: str | None = None, **counts) -> None:
+        """Adds to the counters of `stage` (default: the open stage; ignored if none is open)."""
+        stage = stage or self._current
+        if stage is None:
+            return
+        target = self._stage(stage)
+        for key, value in counts.items():
+            target[key] += value
+
+
+    def merge(self, other: "SyncMetrics") -> None:
+        """Adds another run's stage seconds and counters to this one's, e.g. per-board runs into a total."""
+        for name, stage in other.stages.items():
+            target = self._stage(name)
+            for key, value in stage.items():
+                target[key] += value
+
+
+    def stage_summary(self, name: str) -> dict:
+        stage = self.stages[name]
+        rate = stage["items"] / stage["seconds"] if stage["seconds"] else 0.0
+        return {**stage, "seconds": round(stage["seconds"], 4), "items_per_second": round(rate, 2)}
+
+
+    def record_queue(self, counts: dict) -> None:
+        """Records sync_queue batches per status (sync_queue.queue_depth) as of the end of the run."""
+        self.queue = dict(counts)
+        self.log("queue", **self.queue)
+
+
+    def log(self, event: str, **fields) -> None:
+        if not self.metrics_dir:
+            return
+        record = {"ts": datetime.datetime.now(datetime.timezone.utc).isoformat(), "job": self.job,
+                  "event": event, **fields}
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        with open(os.path.join(self.metrics_dir, "sync_events.jsonl"), "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+    def to_prometheus(self, success: bool) -> str:
+        job = self.job.replace('"', "")
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in {"job": job, **labels}.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        summaries = {name: self.stage_summary(name) for name in self.stages}
+        metric("monday_sync_stage_duration_seconds", "Time spent in each sync stage during the last run.",
+               [({"stage": n}, s["seconds"]) for n, s in summaries.items()])
+        metric("monday_sync_stage_items_per_second", "Items processed per second in each stage.",
+               [({"stage": n}, s["items_per_second"]) for n, s in summaries.items()])
+        for counter in STAGE_COUNTERS:
+            metric(f"monday_sync_stage_{counter}", f"{counter.capitalize()} counted in each stage during the last run.",
+                   [({"stage": n}, s[counter]) for n, s in summaries.items()])
+        if self.queue:
+            metric("monday_sync_queue_batches", "Sync queue batches per status at the end of the last run.",
+                   [({"status": status}, count) for status, count in sorted(self.queue.items())])
+        metric("monday_sync_duration_seconds", "Wall time of the last sync run.",
+               [({}, round(time.time() - self._started, 4))])
+        metric("monday_sync_success", "1 if the last sync run completed, 0 if it failed.", [({}, int(success))])
+        metric("monday_sync_last_run_timestamp_seconds", "Unix time the last sync run finished.",
+               [({}, round(time.time(), 3))])
+        return "\n".join(lines) + "\n"
+
+
+    def finish(self, success: bool = True, error: str | None = None) -> None:
+        self.log("finish", success=success, error=error, seconds=round(time.time() - self._started, 4),
+                 stages={name: self.stage_summary(name) for name in self.stages})
+        if not self.metrics_dir:
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        # Written under a temporary name and renamed so the collector never reads a partial file
+        path = os.path.join(self.metrics_dir, f"monday_sync_{self.job}.prom")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.to_prometheus(success))
+        os.replace(tmp_path, path)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(success=exc_type is None, error=str(exc) if exc else None)
+        return False
@@ -0,0 +1,207 @@
+import os
+import json
+import socket
+import datetime
+from contextlib import contextmanager
+from sqlalchemy import text
+
+
+# --- Sync coordination ---
+# A scheduled run takes a per-board advisory lock, scans the board for changes and queues the
+# changed item ids in batches on sync_queue. Any number of worker processes, on any host, then
+# claim batches with FOR UPDATE SKIP LOCKED, fetch them from monday and write them. A run that
+# finds the board lock taken leaves the scan to the run holding it instead of repeating it.
+# Advisory locks and SKIP LOCKED are Postgres features; on other databases (SQLite in the
+# benchmarks) the locks always succeed and claims rely on the database serializing writers.
+
+
+QUEUE_BATCH_SIZE = int(os.getenv("SYNC_QUEUE_BATCH_SIZE", 500))
+STALE_AFTER_SECONDS = int(os.getenv("SYNC_QUEUE_STALE_SECONDS", 900))  # claims older than this are retried
+MAX_ATTEMPTS = int(os.getenv("SYNC_QUEUE_MAX_ATTEMPTS", 3))
+# Advisory lock keys are (namespace << 40) | board id, so they don't collide with other lock users
+SCAN_LOCK_NAMESPACE = 0x4D53
+WRITE_LOCK_NAMESPACE = 0x4D54
+
+
+def _is_postgres(engine_or_conn) -> bool:
+    return engine_or_conn.dialect.name == "postgresql"
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def lock_key(namespace: int, board_id) -> int:
+    return (namespace << 40) | (int(board_id) & ((1 << 40) - 1))
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def create_sync_queue_if_missing(engine):
+    """Ensures the sync_queue table exists."""
+    id_column = "BIGSERIAL PRIMARY KEY" if _is_postgres(engine) else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS sync_queue (
+                id {id_column},
+                board_id BIGINT NOT NULL,
+                item_ids TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                claimed_by TEXT,
+                claimed_at TIMESTAMP WITH TIME ZONE,
+                created_at TIMESTAMP WITH TIME ZONE,
+                error TEXT
+            );
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS sync_queue_status ON sync_queue (status, board_id, id)"))
+
+
+@contextmanager
+def board_lock(engine, board_id):
+    """
+    Holds the board's session-level advisory lock for the duration of the block, yielding False
+    (without waiting) if another run already holds it. The lock lives on its own connection, so
+    it is released when the block exits or the process dies.
+    """
+    if not _is_postgres(engine):
+        yield True
+        return
+    key = lock_key(SCAN_LOCK_NAMESPACE, board_id)
+    with engine.connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                conn.commit()
+
+
+def board_write_lock(conn, board_id):
+    """Serializes writers of one board's rows until the surrounding transaction ends."""
+    if _is_postgres(conn):
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": lock_key(WRITE_LOCK_NAMESPACE, board_id)})
+
+
+def _enqueue(conn, board_id, item_ids, batch_size):
+    queued = conn.execute(text("""
+        SELECT item_ids FROM sync_queue WHERE board_id = :board_id AND status = 'pending'
+    """), {"board_id": int(board_id)}).scalars()
+    already = {item_id for batch in queued for item_id in json.loads(batch)}
+    new_ids = sorted({int(i) for i in item_ids} - already)
+    now = _now()
+    for start in range(0, len(new_ids), batch_size):
+        conn.execute(text("""
+            INSERT INTO sync_queue (board_id, item_ids, status, attempts, created_at)
+            VALUES (:board_id, :item_ids, 'pending', 0, :now)
+        """), {"board_id": int(board_id), "item_ids": json.dumps(new_ids[start:start + batch_size]), "now": now})
+    return len(new_ids)
+
+
+def enqueue_items(engine, board_id, item_ids, batch_size=QUEUE_BATCH_SIZE):
+    """
+    Queues item ids for a board in batches, skipping ids already pending (a rescan before the
+    workers catch up finds the same items again). Ids in claimed batches are queued again: their
+    worker may have fetched the item before the change this scan found. Returns the number of ids queued.
+    """
+    with engine.begin() as conn:
+        queued = _enqueue(conn, board_id, item_ids, batch_size)
+        # Finished and retried batches are only kept for a day, for inspection
+        conn.execute(text("DELETE FROM sync_queue WHERE status IN ('done', 'retried') AND created_at < :cutoff"),
+                     {"cutoff": _now() - datetime.timedelta(days=1)})
+    return queued
+
+
+def requeue_failed(engine, board_id=None, batch_size=QUEUE_BATCH_SIZE):
+    """
+    Queues the item ids of failed batches (of `board_id`, or of every board) again as new pending
+    batches with a fresh attempt budget, behind anything already pending. The change scan's
+    watermark has usually moved past these items, so nothing else would ever fetch them again.
+    The failed rows are kept as 'retried', with their error, for a day. Returns the number of ids queued.
+    """
+    board_filter = "AND board_id = :board_id" if board_id is not None else ""
+    with engine.begin() as conn:
+        failed = conn.execute(text(f"SELECT id, board_id, item_ids FROM sync_queue WHERE status = 'failed' {board_filter}"),
+                              {"board_id": int(board_id)} if board_id is not None else {}).fetchall()
+        by_board = {}
+        for row in failed:
+            by_board.setdefault(row.board_id, set()).update(json.loads(row.item_ids))
+        queued = sum(_enqueue(conn, board, ids, batch_size) for board, ids in by_board.items())
+        for row in failed:
+            conn.execute(text("UPDATE sync_queue SET status = 'retried' WHERE id = :id"), {"id": row.id})
+    return queued
+
+
+def requeue_stale(engine):
+    """
+    Puts batches claimed more than STALE_AFTER_SECONDS ago (their worker died) back to pending,
+    or marks them failed once they have used MAX_ATTEMPTS, so a batch that kills its worker is not
+    retried forever.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text("""
+            UPDATE sync_queue
+            SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+                claimed_by = NULL,
+                error = CASE WHEN attempts >= :max_attempts THEN 'claim went stale too many times' ELSE error END
+            WHERE status = 'claimed' AND claimed_at < :cutoff
+        """), {"cutoff": _now() - datetime.timedelta(seconds=STALE_AFTER_SECONDS), "max_attempts": MAX_ATTEMPTS})
+        return result.rowcount
+
+
+def claim_batch(engine, board_id=None, worker=None, skip=()):
+    """
+    Claims the oldest pending batch (of `board_id`, or of any board, and not one of the batch ids
+    in `skip`) and returns {"id", "board_id", "item_ids"}, or None when there is nothing to do.
+    Concurrent workers skip rows another worker is claiming rather than waiting for it.
+    """
+    skip_locked = "FOR UPDATE SKIP LOCKED" if _is_postgres(engine) else ""
+    board_filter = "AND board_id = :board_id" if board_id is not None else ""
+    if skip:
+        board_filter += f" AND id NOT IN ({', '.join(str(int(i)) for i in skip)})"
+    with engine.begin() as conn:
+        row = conn.execute(text(f"""
+            UPDATE sync_queue
+            SET status = 'claimed', claimed_by = :worker, claimed_at = :now, attempts = attempts + 1
+            WHERE id = (
+                SELECT id FROM sync_queue
+                WHERE status = 'pending' {board_filter}
+                ORDER BY id
+                LIMIT 1
+                {skip_locked}
+            )
+            RETURNING id, board_id, item_ids
+        """), {"worker": worker or worker_name(), "now": _now(),
+               **({"board_id": int(board_id)} if board_id is not None else {})}).first()
+    if row is None:
+        return None
+    return {"id": row.id, "board_id": row.board_id, "item_ids": json.loads(row.item_ids)}
+
+
+def complete_batch(conn, batch_id):
+    """Marks a batch done. Call inside the transaction that wrote its rows, so both commit together."""
+    conn.execute(text("UPDATE sync_queue SET status = 'done', error = NULL WHERE id = :id"), {"id": batch_id})
+
+
+def fail_batch(engine, batch_id, error):
+    """Puts a batch back to pending, or marks it failed once it has used MAX_ATTEMPTS (see requeue_failed)."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            UPDATE sync_queue
+            SET status = CASE WHEN attempts >= :max_attempts THEN 'failed' ELSE 'pending' END,
+                claimed_by = NULL, error = :error
+            WHERE id = :id
+        """), {"id": batch_id, "error": str(error)[:2000], "max_attempts": MAX_ATTEMPTS})
+
+
+def queue_depth(engine, board_id=None):
+    """Counts of batches per status, e.g. {'pending': 3, 'done': 12}."""
+    board_filter = "WHERE board_id = :board_id" if board_id is not None else ""
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT status, COUNT(*) FROM sync_queue {board_filter} GROUP BY status"),
+                            {"board_id": int(board_id)} if board_id is not None else {}).fetchall()
+    return {status: count for status, count in rows}
@@ -0,0 +1,45 @@
+import datetime
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+
+# --- Sync version counters ---
+# Every sync bumps a counter per scope ("worklog", "mappings", ...) so anything
+# caching query results on the agent side can tell when the data underneath it
+# has changed without diffing tables.
+
+
+def create_sync_state_if_missing(engine):
+    """Ensures the sync_state counter table exists."""
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                scope TEXT PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP WITH TIME ZONE
+            );
+        """))
+
+
+def bump_sync_version(engine, scope="worklog"):
+    """Increments the version counter for a scope. Call once at the end of a successful sync."""
+    create_sync_state_if_missing(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO sync_state (scope, version, updated_at)
+            VALUES (:scope, 1, :now)
+            ON CONFLICT (scope) DO UPDATE SET
+                version = sync_state.version + 1,
+                updated_at = EXCLUDED.updated_at;
+        """), {"scope": scope, "now": datetime.datetime.now(datetime.timezone.utc)})
+
+
+def get_sync_version(engine, scope="worklog"):
+    """Returns the current version for a scope, 0 if never synced, or None if the table is unavailable."""
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(text("SELECT version FROM sync_state WHERE scope = :scope"), {"scope": scope})
+            version = result.scalar()
+            return int(version) if version is not None else 0
+    except SQLAlchemyError:
+        return None
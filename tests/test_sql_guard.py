@@ -0,0 +1,90 @@
+"""
+SQLCostGuard and the guarded sql_db_query tool, on SQLite with the planner estimate stubbed
+(EXPLAIN (FORMAT JSON) is Postgres-only).
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from langchain_community.utilities import SQLDatabase
+
+from sql_guard import SQLCostGuard, GuardedQuerySQLDatabaseTool
+from result_export import ResultExporter
+
+
+class StubGuard(SQLCostGuard):
+    """Reports a fixed (cost, rows) estimate instead of asking Postgres."""
+
+    def __init__(self, cost, rows, **kwargs):
+        super().__init__(**kwargs)
+        self.planned = (cost, rows)
+
+    def estimate(self, engine, query):
+        return self.planned
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE worklog (id INTEGER, job_name TEXT)"))
+        conn.execute(text("INSERT INTO worklog VALUES (:id, :name)"),
+                     [{"id": i, "name": f"job {i}"} for i in range(1000)])
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: executed.append(stmt))
+    engine.executed = executed
+    return engine
+
+
+def tool(engine, guard, exporter=None):
+    return GuardedQuerySQLDatabaseTool(db=SQLDatabase(engine), guard=guard, exporter=exporter)
+
+
+def test_check_caps_rows_at_max_rows_by_default():
+    to_run, note, rejection = StubGuard(10, 5000, max_rows=200).check(None, "SELECT * FROM worklog")
+    assert to_run.endswith("LIMIT 200")
+    assert "5000" in note and not rejection
+
+
+def test_check_uses_the_given_row_limit():
+    to_run, _, _ = StubGuard(10, 5000, max_rows=200).check(None, "SELECT * FROM worklog", row_limit=1000)
+    assert to_run.endswith("LIMIT 1000")
+
+
+def test_check_leaves_small_or_limited_queries_alone():
+    guard = StubGuard(10, 5000, max_rows=200)
+    assert guard.check(None, "SELECT * FROM worklog LIMIT 10")[0] == "SELECT * FROM worklog LIMIT 10"
+    assert StubGuard(10, 50).check(None, "SELECT * FROM worklog")[0] == "SELECT * FROM worklog"
+
+
+def test_check_rejects_expensive_queries():
+    to_run, _, rejection = StubGuard(5e6, 10, max_cost=1e6).check(None, "SELECT * FROM worklog")
+    assert to_run is None and rejection.startswith("Error: query rejected")
+
+
+def test_tool_without_exporter_limits_what_reaches_the_prompt(engine):
+    tool(engine, StubGuard(10, 1000, max_rows=20))._run("SELECT * FROM worklog")
+    assert any(stmt.endswith("LIMIT 20") for stmt in engine.executed)
+
+
+def test_tool_with_exporter_limits_the_export(engine, tmp_path):
+    exporter = ResultExporter(str(tmp_path), preview_rows=5, batch_size=100, max_rows=300)
+    out = tool(engine, StubGuard(10, 1000, max_rows=20), exporter)._run("SELECT * FROM worklog")
+    # The exporter's cap, not the prompt cap, and applied in SQL before anything is fetched
+    assert any(stmt.endswith("LIMIT 300") for stmt in engine.executed)
+    [path] = tmp_path.glob("result_*.csv")
+    assert sum(1 for _ in open(path)) == 301  # header + 300 rows
+    assert "300 rows" in out
+
+
+def test_exporter_stops_at_max_rows_without_an_estimate(engine, tmp_path):
+    handles = []
+    exporter = ResultExporter(str(tmp_path), preview_rows=5, batch_size=64, max_rows=250, on_export=handles.append)
+    out = exporter.run(engine, "SELECT * FROM worklog")
+    assert handles[0].rows == 250 and handles[0].truncated
+    assert "more than 250 rows" in out
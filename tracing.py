@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import threading
+import datetime
+
+
+TRACE_PATH = os.getenv("AGENT_TRACE_PATH", "traces/agent_traces.jsonl")
+_write_lock = threading.Lock()
+
+
+def count_result_rows(output) -> int | None:
+    """Best-effort row count from a sql_db_query observation."""
+    if not isinstance(output, str):
+        return None
+    if output.startswith("The query returned "):
+        return int(output.split()[3])
+    body = output.split("\n", 1)[-1] if output.startswith("Note:") else output
+    if body.startswith("[("):
+        return body.count("), (") + 1
+    if body == "":
+        return 0
+    return None
+
+
+def summarize_trace(question: str, source: str, spans: list, total_seconds: float) -> dict:
+    """Rolls a question's spans up into one trace record."""
+    llm = [s for s in spans if s["type"] == "llm"]
+    sql = [s for s in spans if s["type"] == "tool" and s["name"] == "sql_db_query"]
+    return {
+        "ts": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "question": question,
+        "source": source,
+        "total_seconds": round(total_seconds, 4),
+        "iterations": sum(1 for s in spans if s["type"] == "tool"),
+        "llm_calls": len(llm),
+        "llm_seconds": round(sum(s["seconds"] for s in llm), 4),
+        "input_tokens": sum(s.get("input_tokens") or 0 for s in llm),
+        "output_tokens": sum(s.get("output_tokens") or 0 for s in llm),
+        "sql_queries": len(sql),
+        "sql_seconds": round(sum(s["seconds"] for s in sql), 4),
+        "rows_returned": sum(s.get("rows") or 0 for s in sql),
+        "spans": spans,
+    }
+
+
+def write_trace(trace: dict, path: str = TRACE_PATH) -> None:
+    """Appends a trace record as one JSONL line. AGENT_TRACE_PATH=off disables writing."""
+    if not path or path == "off":
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(trace, default=str)
+    with _write_lock, open(path, "a") as f:
+        f.write(line + "\n")
+
+
+def print_trace_summary(trace: dict) -> None:
+    """Prints one row per span plus totals, so it is obvious where an answer's time went."""
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"trace ({trace['source']}): {trace['total_seconds']:.2f}s, "
+                        f"{trace['iterations']} iterations, {trace['llm_calls']} LLM calls")
+    for col in ("#", "step", "seconds", "tokens in/out", "rows", "detail"):
+        table.add_column(col, justify="right" if col in ("#", "seconds", "rows") else "left")
+    for i, span in enumerate(trace["spans"], 1):
+        if span["type"] == "llm":
+            tokens = f"{span.get('input_tokens') or '?'}/{span.get('output_tokens') or '?'}"
+            if span.get("estimated"):
+                tokens += " (est)"
+            table.add_row(str(i), "llm", f"{span['seconds']:.3f}", tokens, "", span.get("model") or "")
+        else:
+            detail = (span.get("input") or "").replace("\n", " ")[:60]
+            if span.get("error"):
+                detail = f"ERROR {span['error'][:50]}"
+            rows = "" if span.get("rows") is None else str(span["rows"])
+            table.add_row(str(i), span["name"], f"{span['seconds']:.3f}", "", rows, detail)
+    table.add_row("", "total", f"{trace['total_seconds']:.3f}",
+                  f"{trace['input_tokens']}/{trace['output_tokens']}", str(trace["rows_returned"]),
+                  f"llm {trace['llm_seconds']:.2f}s, sql {trace['sql_seconds']:.2f}s")
+    Console().print(table)
+
+
+class SpanTimer:
+    """Tracks open spans by LangChain run_id."""
+
+    def __init__(self):
+        self._open = {}
+
+
+    def start(self, run_id, **fields) -> None:
+        self._open[run_id] = (time.perf_counter(), fields)
+
+
+    def finish(self, run_id, **fields) -> dict | None:
+        started = self._open.pop(run_id, None)
+        if started is None:
+            return None
+        start, span = started
+        span.update(fields)
+        span["seconds"] = round(time.perf_counter() - start, 4)
+        return span
+
+
+    def clear(self) -> None:
+        self._open.clear()
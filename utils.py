@@ -1,28 +1,38 @@
 import os
-import pandas as pd
-import sqlparse
-from rich.console import Console
-from rich.syntax import Syntax
-from sqlalchemy import create_engine, Engine
-from langchain.callbacks.base import BaseCallbackHandler
-from langchain.callbacks.manager import CallbackManager
-from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits import create_sql_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from langchain_core.callbacks.base import BaseCallbackHandler
 from dotenv import load_dotenv
+from tracing import SpanTimer, count_result_rows, summarize_trace, write_trace
 load_dotenv()
 
-from langchain.prompts import (
-    ChatPromptTemplate,
-    SystemMessagePromptTemplate,
-    HumanMessagePromptTemplate
-)
+# SQLAlchemy, sqlparse, rich, the LangChain agent toolkits and the Gemini client take seconds to
+# import between them, so they are imported in the functions that use them. sql_agent.py runs
+# setup_agent in the background while the first question is typed, which is when they load.
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+    from fewshot import FewShotIndex
 
 
 class SQLQueryLogger(BaseCallbackHandler):
     def __init__(self):
         super().__init__()
         self.intermediate_steps = []
+        # ExportHandles for results the query tool streamed to disk during the current question
+        self.exports = []
+        # Structured timing spans for every LLM call and tool run of the current question
+        self.spans = []
+        self.last_trace = None
+        self._timer = SpanTimer()
+
+
+    def reset(self):
+        self.intermediate_steps.clear()
+        self.exports.clear()
+        self.spans.clear()
+        self.last_trace = None
+        self._timer.clear()
 
 
     def on_agent_action(self, action, **kwargs):
@@ -35,20 +45,138 @@ class SQLQueryLogger(BaseCallbackHandler):
         self.intermediate_steps.append(("finish", finish))
 
 
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        from schema_summary import estimate_tokens
+        prompt = "".join(str(m.content) for batch in messages for m in batch)
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name")
+        self._timer.start(run_id, type="llm", model=model, prompt_chars=len(prompt),
+                          prompt_tokens_estimate=estimate_tokens(prompt))
+
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = (kwargs.get("invocation_params") or {}).get("model") or (serialized or {}).get("name")
+        from schema_summary import estimate_tokens
+        prompt = "".join(prompts)
+        self._timer.start(run_id, type="llm", model=model, prompt_chars=len(prompt),
+                          prompt_tokens_estimate=estimate_tokens(prompt))
+
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if getattr(message, "usage_metadata", None):
+                    usage = message.usage_metadata
+        if not usage and response.llm_output:
+            usage = response.llm_output.get("usage_metadata") or response.llm_output.get("token_usage") or {}
+
+        span = self._timer.finish(run_id)
+        if span is None:
+            return
+        prompt_tokens_estimate = span.pop("prompt_tokens_estimate")
+        input_tokens = usage.get("input_tokens") or usage.get("prompt_tokens")
+        output_tokens = usage.get("output_tokens") or usage.get("completion_tokens")
+        if input_tokens is None:
+            # Providers without usage metadata (fake models, some cache hits): estimate from text length
+            from schema_summary import estimate_tokens
+            span["estimated"] = True
+            input_tokens = prompt_tokens_estimate
+            output_tokens = sum(estimate_tokens(g.text) for gens in response.generations for g in gens)
+        span.update(input_tokens=input_tokens, output_tokens=output_tokens)
+        self.spans.append(span)
+
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        span = self._timer.finish(run_id, error=str(error))
+        if span is not None:
+            span.pop("prompt_tokens_estimate", None)
+            self.spans.append(span)
+
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._timer.start(run_id, type="tool", name=(serialized or {}).get("name"), input=input_str)
+
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        span = self._timer.finish(run_id)
+        if span is None:
+            return
+        output = getattr(output, "content", output)
+        if span["name"] == "sql_db_query":
+            span["rows"] = count_result_rows(output)
+            if isinstance(output, str) and output.startswith("Error:"):
+                span["error"] = output[:300]
+        self.spans.append(span)
+
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        span = self._timer.finish(run_id, error=str(error))
+        if span is not None:
+            span.pop("prompt_tokens_estimate", None)
+            self.spans.append(span)
+
+
 # ---- MAPPING TABLE-AWARE PROMPT ----
-system_message = SystemMessagePromptTemplate.from_template(
+SYSTEM_MESSAGE = (
     "You are a helpful SQL assistant with access to these mapping tables in the database:\n\n"
     "1. 'column_renames' (column_id, friendly_name): Use this table to show users human-friendly column names in results and explanations.\n"
     "2. 'column_descriptions' (column_id, description): Use this table to provide explanations of column meanings when asked.\n"
     "3. 'job_type_map' (job_type, description): Use this to explain or translate job types to users.\n"
     "4. 'status_map' (status, description): Use this to explain or translate statuses to users.\n\n"
-    "When a user asks a question, JOIN or SELECT from these tables as needed to provide clear, readable, and helpful answers.\n"
-    "Example: If a user asks 'What does status Delivered mean?', do: SELECT description FROM status_map WHERE status = 'Delivered'.\n"
-    "If asked for available columns, use column_renames and column_descriptions.\n"
-    "Always prioritize displaying friendly names and explanations for codes when possible."
+    "These tables are already loaded: the status and job type meanings are listed below, and the mapping_lookup tool "
+    "answers from memory for any of the four. Use them instead of querying the mapping tables.\n"
+    "Example: If a user asks 'What does status Delivered mean?', answer from the list below or call mapping_lookup with 'status_map: Delivered'.\n"
+    "If asked for available columns, use the schema summary or mapping_lookup with 'column_renames:'.\n"
+    "Always prioritize displaying friendly names and explanations for codes when possible.\n\n"
+    "{mapping_context}\n\n"
+    "{schema_context}"
 )
-human_message = HumanMessagePromptTemplate.from_template("{input}")
-chat_prompt = ChatPromptTemplate.from_messages([system_message, human_message])
+
+
+@lru_cache(maxsize=None)
+def chat_prompt():
+    from langchain_core.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+
+    return ChatPromptTemplate.from_messages([SystemMessagePromptTemplate.from_template(SYSTEM_MESSAGE),
+                                             HumanMessagePromptTemplate.from_template("{input}")])
+
+
+# Replaces the stock SQL_SUFFIX, which tells the model to start every question by listing tables
+COMPACT_SCHEMA_SUFFIX = (
+    "Begin!\n\n"
+    "Question: {input}\n"
+    "Thought: The schema summary above describes the main tables. "
+    "I should only query the schema if it is missing something I need.\n"
+    "{agent_scratchpad}"
+)
+
+
+def build_agent_prefix(schema_context: str = "", mapping_context: str = "") -> str:
+    """Renders the system message of chat_prompt, with the schema summary and mappings filled in, as the SQL agent prefix."""
+    from langchain_community.agent_toolkits.sql.prompt import SQL_PREFIX
+
+    system_text = chat_prompt().messages[0].format(schema_context=schema_context,
+                                                 mapping_context=mapping_context).content
+    # create_sql_agent str.formats the prefix and then parses it as a template again, so no braces may survive
+    system_text = system_text.replace("{", "(").replace("}", ")")
+    return f"{SQL_PREFIX}\n\n{system_text}"
+
+
+def build_agent_prompt(schema_context: str, mapping_store, suffix: str | None = None):
+    """
+    The ReAct prompt create_sql_agent would build around build_agent_prefix, except that the mapping
+    context is filled in from mapping_store every time the prompt is formatted. Long-lived agents
+    (AgentPool, agent_server) then see new status and job type descriptions after local_db_update.
+    """
+    from langchain.agents.mrkl.prompt import FORMAT_INSTRUCTIONS
+    from langchain_community.agent_toolkits.sql.prompt import SQL_SUFFIX
+    from langchain_core.prompts import PromptTemplate
+
+    # A marker without braces survives build_agent_prefix's escaping and becomes the placeholder
+    prefix = build_agent_prefix(schema_context, "@@mapping_context@@").replace("@@mapping_context@@", "{mapping_context}")
+    template = "\n\n".join([prefix, "{tools}", FORMAT_INSTRUCTIONS, suffix or SQL_SUFFIX])
+    return PromptTemplate.from_template(template).partial(mapping_context=mapping_store.as_prompt_context)
 
 # def setup_database(csv_path: str, db_name: str) -> object:
 #     """Loads CSV data into a SQLite database and returns the engine."""
@@ -59,12 +187,31 @@ chat_prompt = ChatPromptTemplate.from_messages([system_message, human_message])
 #     return engine
 
 
-def connect_postgres() -> Engine | None:
+def agent_session_options() -> str:
+    """
+    libpq `options` applied to every agent connection: a statement timeout so one runaway query
+    cannot hold a connection, read-only transactions, and a per-sort/hash work_mem cap.
+    """
+    options = [
+        f"-c statement_timeout={int(os.getenv('AGENT_STATEMENT_TIMEOUT_MS', 15000))}",
+        f"-c work_mem={os.getenv('AGENT_WORK_MEM', '16MB')}",
+    ]
+    if os.getenv("AGENT_READ_ONLY", "true").lower() in ("1", "true", "yes"):
+        options.append("-c default_transaction_read_only=on")
+    return " ".join(options)
+
+
+def connect_postgres() -> "Engine | None":
     """
     Connects to the PostgreSQL database using credentials from environment variables.
+    Pool sizing comes from AGENT_POOL_SIZE / AGENT_POOL_MAX_OVERFLOW / AGENT_POOL_RECYCLE / AGENT_POOL_TIMEOUT,
+    and every session is guarded by agent_session_options(). Pool usage is available through db_pool.pool_stats.
     Returns a SQLAlchemy Engine object.
     """
     try:
+        from sqlalchemy import create_engine
+        from db_pool import InstrumentedQueuePool
+
         user = os.getenv("POSTGRES_USER")
         password = os.getenv("POSTGRES_PASSWORD")
         host = os.getenv("POSTGRES_HOST")
@@ -76,7 +223,16 @@ def connect_postgres() -> Engine | None:
             return None
 
         db_url = f"postgresql://{user}:{password}@{host}:{port}/{database}"
-        engine = create_engine(db_url)
+        engine = create_engine(
+            db_url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=int(os.getenv("AGENT_POOL_SIZE", 5)),
+            max_overflow=int(os.getenv("AGENT_POOL_MAX_OVERFLOW", 5)),
+            pool_recycle=int(os.getenv("AGENT_POOL_RECYCLE", 1800)),
+            pool_timeout=float(os.getenv("AGENT_POOL_TIMEOUT", 30)),
+            pool_pre_ping=True,
+            connect_args={"options": agent_session_options()},
+        )
 
         # Test the connection
         connection = engine.connect()
@@ -92,38 +248,126 @@ def connect_postgres() -> Engine | None:
         return None
 
 
-def setup_agent(engine: object) -> tuple:
-    """Sets up the SQL agent along with the callback logger. Returns the agent_executor and query_logger."""
+def setup_agent(engine: object, llm_cache=None, compact_schema: bool = True, mapping_store=None,
+                llm=None, verbose: bool = True, model: str = "gemini-2.0-flash-exp",
+                use_replica: bool | None = None) -> tuple:
+    """
+    Sets up the SQL agent along with the callback logger. Returns the agent_executor and query_logger.
+    LLM calls go through llm_cache (an SQLiteLLMCache); when none is passed it is configured from LLM_CACHE_MODE.
+    With compact_schema, a token-budgeted summary of worklog built from the mapping tables is put in the prompt.
+    Pass mapping_store to share one MappingStore with an IntentRouter, and llm to replace Gemini (e.g. a fake model).
+    model picks the Gemini model when no llm is passed.
+    With use_replica (default from AGENT_USE_REPLICA), the agent's SQL runs on the DuckDB views over
+    the columnar replica under REPLICA_DIR instead of on engine; mappings and the summary still come from engine.
+    """
+    from langchain_core.callbacks.manager import CallbackManager
+    from langchain_community.agent_toolkits import create_sql_agent
+    from llm_cache import llm_cache_from_env, tool_schema_hash
+    from schema_cache import load_agent_database, SCHEMA_SNAPSHOT_PATH
+    from schema_summary import shared_schema_summary
+    from mappings import MappingStore
+    from sql_guard import GuardedSQLDatabaseToolkit, SQLCostGuard
+    from result_export import ResultExporter
+
     query_logger = SQLQueryLogger()
     callback_manager = CallbackManager([query_logger])
-    # Initialize the SQL database interface
-    db = SQLDatabase(engine=engine)
+    # Initialize the SQL database interface, limited to the agent tables and backed by the schema snapshot
+    if use_replica is None:
+        use_replica = os.getenv("AGENT_USE_REPLICA", "0") == "1"
+    if use_replica:
+        from replica import replica_engine
+        # Its own snapshot: the replica's DuckDB types would otherwise invalidate the Postgres one
+        db = load_agent_database(replica_engine(), snapshot_path=f"{SCHEMA_SNAPSHOT_PATH}.replica", view_support=True)
+    else:
+        db = load_agent_database(engine)
     # Set up the language model
-    api_key = os.getenv("GEMINI_KEY")
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0, google_api_key=api_key)
+    if llm is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        api_key = os.getenv("GEMINI_KEY")
+        if llm_cache is None:
+            llm_cache = llm_cache_from_env()
+        # The agent calls .stream(), which skips the LLM cache; with streaming disabled it falls back to invoke
+        llm = ChatGoogleGenerativeAI(model=model, temperature=0, google_api_key=api_key,
+                                     cache=llm_cache, disable_streaming=llm_cache is not None)
+    elif llm_cache is not None:
+        llm.cache = llm_cache
+        llm.disable_streaming = True
+
+    # Mapping tables are tiny and only change on local_db_update runs, so keep them in memory
+    if mapping_store is None:
+        mapping_store = MappingStore(engine)
+    extra_tools = [mapping_store.as_tool()]
+
+    # sql_db_query is gated on EXPLAIN estimates so unbounded scans never reach the DB or the prompt
+    # Large results stream to disk through a server-side cursor; the LLM only sees a preview
+    exporter = ResultExporter.from_env(on_export=query_logger.exports.append)
+    toolkit = GuardedSQLDatabaseToolkit(db=db, llm=llm, guard=SQLCostGuard.from_env(), exporter=exporter)
+    # Recorded completions are only valid for the tool set they were recorded against
+    if llm_cache is not None:
+        llm_cache.tool_schema = tool_schema_hash(toolkit.get_tools() + extra_tools)
+
+    schema_context = ""
+    if compact_schema:
+        summary = shared_schema_summary(engine, token_budget=int(os.getenv("SCHEMA_CONTEXT_TOKENS", 800)))
+        schema_context = ("Schema summary (usually enough to write the query without calling sql_db_schema):\n"
+                          + summary)
 
     # Create the SQL agent
     agent_executor = create_sql_agent(llm,
-                                      db=db,
-                                      verbose=True,
+                                      toolkit=toolkit,
+                                      verbose=verbose,
                                       callback_manager=callback_manager,
-                                      agent_prompt=chat_prompt
+                                      prompt=build_agent_prompt(schema_context, mapping_store,
+                                                                COMPACT_SCHEMA_SUFFIX if compact_schema else None),
+                                      extra_tools=extra_tools
                                     )
-    # , agent_prompt=chat_prompt)
 
     return agent_executor, query_logger
 
 
-def get_result(query: str, agent_executor: object, query_logger: SQLQueryLogger) -> tuple:
+def get_result(query: str, agent_executor: object, query_logger: SQLQueryLogger, cache=None, router=None,
+               fewshot: "FewShotIndex | None" = None, trace_fields: dict | None = None) -> tuple:
     """
     Executes the agent with the given query, then extracts the SQL query generated from the logger.
-    Returns a tuple of (agent_output, sql_query).
+    If an AnswerCache is passed, a repeat of a question against the same data version is answered
+    from the cache without invoking the agent. If an IntentRouter is passed, templated questions it
+    recognises are answered with direct SQL and never reach the agent.
+    Returns a tuple of (agent_output, sql_query, export_path); export_path is the file holding the full
+    result when the query returned more rows than fit in the prompt, else None.
+    If a FewShotIndex is passed, the closest previously answered questions and their SQL are put in front
+    of the question, and the pair is added to the index when the agent's last query ran without error.
+    A trace of the run (see tracing.py) is left on query_logger.last_trace and appended to AGENT_TRACE_PATH,
+    with trace_fields (e.g. the model tier that answered) merged in.
     """
+    from fewshot import FewShotIndex
+
+    start = time.perf_counter()
+    trace_fields = trace_fields or {}
     # Clear previous intermediate steps
-    query_logger.intermediate_steps.clear()
+    query_logger.reset()
+
+    version = None
+    if cache is not None:
+        version = cache.data_version()
+        cached = cache.get(query, version)
+        if cached is not None:
+            _record_trace(query_logger, query, "cache", start, **trace_fields)
+            return cached.answer, cached.sql_query, cached.export_path
+
+    if router is not None:
+        routed = router.route(query)
+        if routed is not None:
+            if cache is not None:
+                cache.put(query, version, routed.answer, routed.sql_query)
+            _record_trace(query_logger, query, f"router:{routed.intent}", start, **trace_fields)
+            return routed.answer, routed.sql_query, None
 
     # Invoke the agent with the provided query
-    result = agent_executor.invoke({"input": query})
+    # Passed per call as well so LLM and tool runs inside the agent report their spans
+    # (handlers attached to the executor itself are not inherited by child runs)
+    examples = fewshot.search(query) if fewshot is not None else []
+    result = agent_executor.invoke({"input": FewShotIndex.as_prompt(examples) + query},
+                                   config={"callbacks": [query_logger]})
 
     # Look through logged events to capture the SQL query
     captured_query = None
@@ -131,10 +375,30 @@ def get_result(query: str, agent_executor: object, query_logger: SQLQueryLogger)
         if event_type == "action" and getattr(event, "tool", None) == 'sql_db_query':
             captured_query = getattr(event, "tool_input", None)
 
-    return result.get('output', None), captured_query
+    answer = result.get('output', None)
+    export_path = query_logger.exports[-1].path if query_logger.exports else None
+    if cache is not None and answer is not None:
+        cache.put(query, version, answer, captured_query, export_path)
+
+    sql_spans = [s for s in query_logger.spans if s["type"] == "tool" and s["name"] == "sql_db_query"]
+    if fewshot is not None and answer is not None and captured_query and sql_spans and not sql_spans[-1].get("error"):
+        fewshot.add(query, captured_query)
+
+    _record_trace(query_logger, query, "agent", start, fewshot_examples=len(examples), **trace_fields)
+    return answer, captured_query, export_path
+
+
+def _record_trace(query_logger: SQLQueryLogger, query: str, source: str, start: float, **extra) -> None:
+    query_logger.last_trace = summarize_trace(query, source, list(query_logger.spans), time.perf_counter() - start)
+    query_logger.last_trace.update(extra)
+    write_trace(query_logger.last_trace)
 
 
 def pprint_sql(q):
+    import sqlparse
+    from rich.console import Console
+    from rich.syntax import Syntax
+
     formatted_sql = sqlparse.format(q, reindent=True, keyword_case='upper')
     console = Console()
     syntax = Syntax(formatted_sql, "sql", theme="monokai", line_numbers=True)